@@ -0,0 +1,391 @@
+import argparse
+import datetime
+
+from database_manager import DatabaseManager, SQLiteBackend
+
+# Uso:
+#   python archivo.py estado
+#   python archivo.py archivar                         (deja MESES_VIVOS meses en las tablas vivas)
+#   python archivo.py archivar --antes-de 2025-01-01
+# Sin --sqlite usa el backend de SEARS_DB_BACKEND (MySQL por defecto).
+#
+# Las ventas cerradas (con su detalle) y los movimientos de inventario
+# viejos pasan a tablas *_historico, sin llaves foráneas. En MySQL se
+# particionan por año: InnoDB no particiona tablas con llaves foráneas,
+# así que las tablas vivas se mantienen chicas moviendo filas en lugar de
+# particionarlas. Las vistas *_con_historico unen ambas para consultas a
+# mano; los reportes y los totales consultan cada juego de tablas por
+# separado (segmentos()), porque un JOIN entre dos vistas UNION ALL no
+# puede usar los índices de cada tabla.
+
+MESES_VIVOS = 13            # meses completos que se quedan en las tablas vivas
+LOTE_ARCHIVO = 1000         # ventas (o movimientos) por transacción
+ANIO_INICIAL = 2000         # la partición p_inicial guarda lo anterior
+
+COLUMNAS_VENTAS = "id_venta, folio, fecha, id_empleado, id_cliente, subtotal, iva, total, estado, metodo_pago"
+COLUMNAS_DETALLE = "id_detalle, id_venta, id_producto, cantidad, precio_unitario, importe"
+COLUMNAS_INVENTARIO = "id_movimiento, id_producto, tipo_movimiento, cantidad, fecha, id_usuario, motivo"
+
+# El siguiente lote a archivar, del más viejo al más nuevo. Las ventas
+# pendientes se quedan en las tablas vivas aunque sean viejas: todavía se
+# pueden completar o cancelar
+VENTAS_POR_ARCHIVAR = """SELECT id_venta FROM ventas WHERE fecha < %s AND estado <> 'pendiente'
+    ORDER BY fecha, id_venta LIMIT %s FOR UPDATE"""
+INVENTARIO_POR_ARCHIVAR = """SELECT id_movimiento FROM inventario WHERE fecha < %s
+    ORDER BY fecha, id_movimiento LIMIT %s FOR UPDATE"""
+
+# Nombres que usan las consultas de reportes y totales ({ventas} v, ...)
+TABLAS = {'ventas': 'ventas', 'detalle_ventas': 'detalle_ventas', 'inventario': 'inventario'}
+TABLAS_ARCHIVADAS = {
+    'ventas': 'ventas_historico',
+    'detalle_ventas': 'detalle_ventas_historico',
+    'inventario': 'inventario_historico',
+}
+
+_PARTICIONES = (
+    f" PARTITION BY RANGE (YEAR(fecha)) (PARTITION p_inicial VALUES LESS THAN ({ANIO_INICIAL}),"
+    " PARTITION p_max VALUES LESS THAN MAXVALUE)"
+)
+
+# La llave primaria incluye fecha porque MySQL lo exige para particionar;
+# detalle_ventas_historico copia la fecha de la venta por lo mismo
+ESQUEMA_MYSQL = [
+    """CREATE TABLE IF NOT EXISTS ventas_historico (
+        id_venta INT NOT NULL,
+        folio VARCHAR(20),
+        fecha DATETIME NOT NULL,
+        id_empleado INT NOT NULL,
+        id_cliente INT,
+        subtotal DECIMAL(10,2) NOT NULL,
+        iva DECIMAL(10,2) NOT NULL,
+        total DECIMAL(10,2) NOT NULL,
+        estado ENUM('pendiente', 'completada', 'cancelada'),
+        metodo_pago ENUM('efectivo', 'tarjeta', 'transferencia', 'mixto'),
+        PRIMARY KEY (id_venta, fecha),
+        INDEX idx_ventas_historico_fecha (fecha),
+        INDEX idx_ventas_historico_empleado_fecha (id_empleado, fecha)
+    ) ROW_FORMAT=COMPRESSED""" + _PARTICIONES,
+    """CREATE TABLE IF NOT EXISTS detalle_ventas_historico (
+        id_detalle INT NOT NULL,
+        id_venta INT NOT NULL,
+        id_producto INT NOT NULL,
+        cantidad INT NOT NULL,
+        precio_unitario DECIMAL(10,2) NOT NULL,
+        importe DECIMAL(10,2) NOT NULL,
+        fecha DATETIME NOT NULL,
+        PRIMARY KEY (id_detalle, fecha),
+        INDEX idx_detalle_historico_venta (id_venta, id_producto, cantidad, importe),
+        INDEX idx_detalle_historico_producto (id_producto)
+    ) ROW_FORMAT=COMPRESSED""" + _PARTICIONES,
+    """CREATE TABLE IF NOT EXISTS inventario_historico (
+        id_movimiento INT NOT NULL,
+        id_producto INT NOT NULL,
+        tipo_movimiento ENUM('entrada', 'salida', 'ajuste'),
+        cantidad INT NOT NULL,
+        fecha DATETIME NOT NULL,
+        id_usuario INT,
+        motivo TEXT,
+        PRIMARY KEY (id_movimiento, fecha),
+        INDEX idx_inventario_historico_producto_fecha (id_producto, fecha)
+    ) ROW_FORMAT=COMPRESSED""" + _PARTICIONES,
+    "CREATE TABLE IF NOT EXISTS archivo_en_curso (id INT NOT NULL PRIMARY KEY)",
+    f"""CREATE OR REPLACE VIEW ventas_con_historico AS
+        SELECT {COLUMNAS_VENTAS} FROM ventas
+        UNION ALL SELECT {COLUMNAS_VENTAS} FROM ventas_historico""",
+    f"""CREATE OR REPLACE VIEW detalle_ventas_con_historico AS
+        SELECT {COLUMNAS_DETALLE} FROM detalle_ventas
+        UNION ALL SELECT {COLUMNAS_DETALLE} FROM detalle_ventas_historico""",
+    f"""CREATE OR REPLACE VIEW inventario_con_historico AS
+        SELECT {COLUMNAS_INVENTARIO} FROM inventario
+        UNION ALL SELECT {COLUMNAS_INVENTARIO} FROM inventario_historico""",
+    # Al archivar, borrar el detalle no debe regresar el stock
+    "DROP TRIGGER IF EXISTS after_venta_delete",
+    """CREATE TRIGGER after_venta_delete
+    AFTER DELETE ON detalle_ventas
+    FOR EACH ROW
+    BEGIN
+        IF NOT EXISTS (SELECT 1 FROM archivo_en_curso) THEN
+            UPDATE productos SET stock = stock + OLD.cantidad
+            WHERE id_producto = OLD.id_producto;
+
+            INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
+            VALUES (OLD.id_producto, 'entrada', OLD.cantidad,
+                   (SELECT id_empleado FROM ventas WHERE id_venta = OLD.id_venta),
+                   CONCAT('Cancelación venta #', OLD.id_venta));
+        END IF;
+    END""",
+]
+
+ESQUEMA_SQLITE = [
+    """CREATE TABLE IF NOT EXISTS ventas_historico (
+        id_venta INT NOT NULL PRIMARY KEY,
+        folio VARCHAR(20),
+        fecha DATETIME NOT NULL,
+        id_empleado INT NOT NULL,
+        id_cliente INT,
+        subtotal DECIMAL(10,2) NOT NULL,
+        iva DECIMAL(10,2) NOT NULL,
+        total DECIMAL(10,2) NOT NULL,
+        estado TEXT,
+        metodo_pago TEXT
+    )""",
+    "CREATE INDEX IF NOT EXISTS idx_ventas_historico_fecha ON ventas_historico (fecha)",
+    "CREATE INDEX IF NOT EXISTS idx_ventas_historico_empleado_fecha ON ventas_historico (id_empleado, fecha)",
+    """CREATE TABLE IF NOT EXISTS detalle_ventas_historico (
+        id_detalle INT NOT NULL PRIMARY KEY,
+        id_venta INT NOT NULL,
+        id_producto INT NOT NULL,
+        cantidad INT NOT NULL,
+        precio_unitario DECIMAL(10,2) NOT NULL,
+        importe DECIMAL(10,2) NOT NULL,
+        fecha DATETIME NOT NULL
+    )""",
+    """CREATE INDEX IF NOT EXISTS idx_detalle_historico_venta
+        ON detalle_ventas_historico (id_venta, id_producto, cantidad, importe)""",
+    "CREATE INDEX IF NOT EXISTS idx_detalle_historico_producto ON detalle_ventas_historico (id_producto)",
+    """CREATE TABLE IF NOT EXISTS inventario_historico (
+        id_movimiento INT NOT NULL PRIMARY KEY,
+        id_producto INT NOT NULL,
+        tipo_movimiento TEXT,
+        cantidad INT NOT NULL,
+        fecha DATETIME NOT NULL,
+        id_usuario INT,
+        motivo TEXT
+    )""",
+    """CREATE INDEX IF NOT EXISTS idx_inventario_historico_producto_fecha
+        ON inventario_historico (id_producto, fecha)""",
+    "CREATE TABLE IF NOT EXISTS archivo_en_curso (id INT NOT NULL PRIMARY KEY)",
+    "DROP VIEW IF EXISTS ventas_con_historico",
+    f"""CREATE VIEW ventas_con_historico AS
+        SELECT {COLUMNAS_VENTAS} FROM ventas
+        UNION ALL SELECT {COLUMNAS_VENTAS} FROM ventas_historico""",
+    "DROP VIEW IF EXISTS detalle_ventas_con_historico",
+    f"""CREATE VIEW detalle_ventas_con_historico AS
+        SELECT {COLUMNAS_DETALLE} FROM detalle_ventas
+        UNION ALL SELECT {COLUMNAS_DETALLE} FROM detalle_ventas_historico""",
+    "DROP VIEW IF EXISTS inventario_con_historico",
+    f"""CREATE VIEW inventario_con_historico AS
+        SELECT {COLUMNAS_INVENTARIO} FROM inventario
+        UNION ALL SELECT {COLUMNAS_INVENTARIO} FROM inventario_historico""",
+    "DROP TRIGGER IF EXISTS after_venta_delete",
+    """CREATE TRIGGER after_venta_delete
+    AFTER DELETE ON detalle_ventas
+    FOR EACH ROW WHEN NOT EXISTS (SELECT 1 FROM archivo_en_curso)
+    BEGIN
+        UPDATE productos SET stock = stock + OLD.cantidad
+        WHERE id_producto = OLD.id_producto;
+
+        INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
+        VALUES (OLD.id_producto, 'entrada', OLD.cantidad,
+               (SELECT id_empleado FROM ventas WHERE id_venta = OLD.id_venta),
+               'Cancelación venta #' || OLD.id_venta);
+    END""",
+]
+
+
+def tablas(archivadas=False):
+    return TABLAS_ARCHIVADAS if archivadas else TABLAS
+
+
+def corte_archivo(db):
+    # Primer día que sigue en las tablas vivas, o None si no se ha archivado
+    # nada. Se archivan días completos: lo anterior está todo archivado.
+    # Sin la migración (no hay tabla histórica) execute_query regresa None.
+    filas = db.execute_query("SELECT MAX(fecha) AS ultima FROM ventas_historico", fetch=True)
+    if not filas or filas[0]['ultima'] is None:
+        return None
+    return _a_fecha(filas[0]['ultima']) + datetime.timedelta(days=1)
+
+
+def segmentos(db, desde, hasta):
+    # Parte el rango en el corte: [(desde, hasta, archivadas)], primero lo
+    # archivado. Ninguna venta queda repartida entre los dos segmentos.
+    corte = corte_archivo(db)
+    if corte is None or corte <= desde:
+        return [(desde, hasta, False)]
+    if corte > hasta:
+        return [(desde, hasta, True)]
+    return [(desde, corte - datetime.timedelta(days=1), True), (corte, hasta, False)]
+
+
+def corte_por_defecto(hoy=None):
+    # Primer día del mes, MESES_VIVOS meses atrás: solo se archivan meses cerrados
+    hoy = hoy or datetime.date.today()
+    meses = hoy.year * 12 + hoy.month - 1 - MESES_VIVOS
+    return datetime.date(meses // 12, meses % 12 + 1, 1)
+
+
+# ------------------------- ARCHIVO -------------------------
+def archivar(db, antes_de, lote=LOTE_ARCHIVO, progreso=None):
+    # Mueve las ventas anteriores a antes_de (con su detalle) y los
+    # movimientos de inventario anteriores a esa fecha a las tablas
+    # históricas, un lote por transacción para no bloquear las cajas.
+    # Los totales por día no se tocan. Regresa {tabla: filas movidas}.
+    if antes_de > datetime.date.today().replace(day=1):
+        raise ValueError("Solo se archivan meses cerrados")
+    corte = f"{antes_de.isoformat()} 00:00:00"
+    _asegurar_particiones(db, antes_de)
+    movidas = {'ventas': 0, 'detalle_ventas': 0, 'inventario': 0}
+    while True:
+        ventas, detalle = _archivar_ventas(db, corte, lote)
+        if not ventas:
+            break
+        movidas['ventas'] += ventas
+        movidas['detalle_ventas'] += detalle
+        if progreso is not None:
+            progreso(movidas)
+    while True:
+        movimientos = _archivar_inventario(db, corte, lote)
+        if not movimientos:
+            break
+        movidas['inventario'] += movimientos
+        if progreso is not None:
+            progreso(movidas)
+    return movidas
+
+
+def _archivar_ventas(db, corte, lote):
+    with db.transaction() as cursor:
+        # Visible solo dentro de esta transacción: el trigger de borrado de
+        # detalle_ventas no regresa el stock. La llave primaria hace que
+        # dos procesos de archivo no corran a la vez.
+        cursor.execute("INSERT INTO archivo_en_curso (id) VALUES (1)")
+        cursor.execute(VENTAS_POR_ARCHIVAR, (corte, lote))
+        ids = [fila['id_venta'] for fila in cursor.fetchall()]
+        detalle = 0
+        if ids:
+            marcadores = ", ".join(["%s"] * len(ids))
+            cursor.execute(
+                f"""INSERT INTO ventas_historico ({COLUMNAS_VENTAS})
+                SELECT {COLUMNAS_VENTAS} FROM ventas WHERE id_venta IN ({marcadores})""",
+                ids
+            )
+            columnas = ", ".join(f"dv.{c.strip()}" for c in COLUMNAS_DETALLE.split(","))
+            cursor.execute(
+                f"""INSERT INTO detalle_ventas_historico ({COLUMNAS_DETALLE}, fecha)
+                SELECT {columnas}, v.fecha FROM detalle_ventas dv
+                JOIN ventas v ON v.id_venta = dv.id_venta
+                WHERE dv.id_venta IN ({marcadores})""",
+                ids
+            )
+            detalle = cursor.rowcount
+            cursor.execute(f"DELETE FROM detalle_ventas WHERE id_venta IN ({marcadores})", ids)
+            cursor.execute(f"DELETE FROM ventas WHERE id_venta IN ({marcadores})", ids)
+        cursor.execute("DELETE FROM archivo_en_curso")
+    return len(ids), detalle
+
+
+def _archivar_inventario(db, corte, lote):
+    with db.transaction() as cursor:
+        cursor.execute(INVENTARIO_POR_ARCHIVAR, (corte, lote))
+        ids = [fila['id_movimiento'] for fila in cursor.fetchall()]
+        if ids:
+            marcadores = ", ".join(["%s"] * len(ids))
+            cursor.execute(
+                f"""INSERT INTO inventario_historico ({COLUMNAS_INVENTARIO})
+                SELECT {COLUMNAS_INVENTARIO} FROM inventario WHERE id_movimiento IN ({marcadores})""",
+                ids
+            )
+            cursor.execute(f"DELETE FROM inventario WHERE id_movimiento IN ({marcadores})", ids)
+    return len(ids)
+
+
+def _asegurar_particiones(db, antes_de):
+    # MySQL: una partición por año hasta el del corte, separada de p_max.
+    # Solo se agregan años posteriores al último que ya tiene partición.
+    if db.backend.nombre != 'mysql':
+        return
+    ultimo_anio = (antes_de - datetime.timedelta(days=1)).year
+    for tabla in TABLAS_ARCHIVADAS.values():
+        with db.transaction() as cursor:
+            cursor.execute(
+                """SELECT partition_name AS nombre FROM information_schema.partitions
+                WHERE table_schema = DATABASE() AND table_name = %s""",
+                (tabla,)
+            )
+            anios = [
+                int(fila['nombre'][1:]) for fila in cursor.fetchall()
+                if fila['nombre'] and fila['nombre'][1:].isdigit()
+            ]
+        primero = max(anios) + 1 if anios else _primer_anio(db)
+        for anio in range(max(primero, ANIO_INICIAL), ultimo_anio + 1):
+            with db.transaction() as cursor:
+                cursor.execute(
+                    f"""ALTER TABLE {tabla} REORGANIZE PARTITION p_max INTO (
+                    PARTITION p{anio} VALUES LESS THAN ({anio + 1}),
+                    PARTITION p_max VALUES LESS THAN MAXVALUE)"""
+                )
+
+
+def _primer_anio(db):
+    filas = db.execute_query(
+        """SELECT LEAST(
+            COALESCE((SELECT MIN(fecha) FROM ventas), NOW()),
+            COALESCE((SELECT MIN(fecha) FROM inventario), NOW())) AS primera""",
+        fetch=True
+    )
+    return _a_fecha(filas[0]['primera']).year
+
+
+def _a_fecha(valor):
+    # MySQL devuelve datetime; SQLite, texto
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    return datetime.date.fromisoformat(str(valor)[:10])
+
+
+def estado(db):
+    # Filas y rango de fechas en las tablas vivas y en las históricas
+    resultado = []
+    for tabla in ['ventas', 'ventas_historico', 'detalle_ventas', 'detalle_ventas_historico',
+                  'inventario', 'inventario_historico']:
+        con_fecha = tabla != 'detalle_ventas'
+        filas = db.execute_query(
+            f"SELECT COUNT(*) AS filas{', MIN(fecha) AS desde, MAX(fecha) AS hasta' if con_fecha else ''} FROM {tabla}",
+            fetch=True
+        )
+        if filas:
+            fila = filas[0]
+            resultado.append((tabla, fila['filas'], fila.get('desde'), fila.get('hasta')))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archivo de ventas e inventario de periodos cerrados")
+    parser.add_argument('comando', choices=['estado', 'archivar'])
+    parser.add_argument('--antes-de', type=datetime.date.fromisoformat,
+                        help=f"AAAA-MM-DD (por defecto, deja {MESES_VIVOS} meses vivos)")
+    parser.add_argument('--lote', type=int, default=LOTE_ARCHIVO)
+    parser.add_argument('--sqlite', metavar='RUTA', help="usar una base SQLite en lugar de MySQL")
+    args = parser.parse_args()
+
+    db = DatabaseManager(SQLiteBackend(args.sqlite) if args.sqlite else None)
+    try:
+        if args.comando == 'estado':
+            for tabla, filas, desde, hasta in estado(db):
+                rango = f"  {desde} a {hasta}" if desde else ""
+                print(f"{tabla:<26}{filas:>12}{rango}")
+            return 0
+
+        antes_de = args.antes_de or corte_por_defecto()
+        try:
+            movidas = archivar(
+                db, antes_de, args.lote,
+                progreso=lambda m: print(
+                    f"\rVentas: {m['ventas']}  detalle: {m['detalle_ventas']}  inventario: {m['inventario']}",
+                    end="", flush=True
+                )
+            )
+        except ValueError as e:
+            print(e)
+            return 1
+        print(f"\nArchivado lo anterior a {antes_de}: {movidas}")
+        return 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
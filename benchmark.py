@@ -0,0 +1,592 @@
+import argparse
+import json
+import random
+import threading
+import time
+
+from cache_productos import ProductoCache
+from carrito import Carrito
+from database_manager import DatabaseManager, SQLiteBackend, DB_ERRORS
+from folios import GeneradorFolios
+from instrumentacion import accion
+from migraciones import aplicar as aplicar_migraciones
+from reservas import ReservasStock
+from resumenes import reconstruir
+from services import SalesService
+from sincronizacion import crear_sincronizadores
+from ventas import StockInsuficienteError, calcular_totales
+
+# Uso:
+#   python benchmark.py sembrar --productos 20000 --clientes 5000 --ventas 20000
+#   python benchmark.py correr --cajas 8 --duracion 30
+#   python benchmark.py correr --sqlite /tmp/bench.sqlite --mezcla venta=1,busqueda=4
+#   python benchmark.py apartados --cajas 32 --productos 3 --stock 200 --duracion 10
+# Sin --sqlite usa el backend de SEARS_DB_BACKEND (MySQL por defecto).
+
+LOTE = 1000
+STOCK_INICIAL = 1000000
+
+PALABRAS = [
+    "playera", "pantalon", "zapato", "tenis", "chamarra", "vestido", "camisa", "bolsa",
+    "reloj", "lampara", "silla", "mesa", "toalla", "sarten", "licuadora", "audifonos",
+    "pantalla", "bocina", "cargador", "muñeca", "pelota", "bicicleta", "mochila", "cobija"
+]
+ADJETIVOS = [
+    "deportivo", "formal", "casual", "grande", "chico", "infantil", "negro", "blanco",
+    "azul", "rojo", "premium", "basico", "inalambrico", "plegable", "de piel", "de algodon"
+]
+MEZCLA = {'venta': 1, 'busqueda': 4, 'refresco': 1}
+
+
+def nombre_aleatorio(rng):
+    return f"{rng.choice(PALABRAS).capitalize()} {rng.choice(ADJETIVOS)} {rng.randint(1, 999)}"
+
+
+# ------------------------- DATOS SINTÉTICOS -------------------------
+def sembrar(db, productos, clientes, ventas, semilla=1):
+    rng = random.Random(semilla)
+    prefijo = f"{int(time.time()) % 100000:05d}"
+
+    ids = db.execute_query("SELECT id_departamento FROM departamentos", fetch=True) or []
+    departamentos = [fila['id_departamento'] for fila in ids] or [None]
+    ids = db.execute_query("SELECT id_proveedor FROM proveedores", fetch=True) or []
+    proveedores = [fila['id_proveedor'] for fila in ids] or [None]
+
+    for inicio in range(0, productos, LOTE):
+        filas = []
+        for n in range(inicio, min(inicio + LOTE, productos)):
+            costo = round(rng.uniform(10, 5000), 2)
+            filas.append((
+                f"99{prefijo}{n:08d}", nombre_aleatorio(rng), "Producto sintético",
+                costo, round(costo * 1.4, 2), STOCK_INICIAL,
+                rng.choice(departamentos), rng.choice(proveedores)
+            ))
+        with db.transaction() as cursor:
+            cursor.executemany(
+                """INSERT INTO productos
+                (codigo_barras, nombre, descripcion, precio_costo, precio_publico, stock,
+                 id_departamento, id_proveedor)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)""",
+                filas
+            )
+
+    for inicio in range(0, clientes, LOTE):
+        filas = [
+            (f"Cliente {prefijo}-{n}", f"cliente{prefijo}.{n}@bench.local", f"55{n:08d}")
+            for n in range(inicio, min(inicio + LOTE, clientes))
+        ]
+        with db.transaction() as cursor:
+            cursor.executemany(
+                "INSERT INTO clientes (nombre, correo, telefono) VALUES (%s, %s, %s)", filas
+            )
+
+    if ventas:
+        _sembrar_ventas(db, ventas, rng, prefijo)
+        # El historial se escribió sin pasar por registrar_venta
+        reconstruir(db)
+
+
+def _sembrar_ventas(db, ventas, rng, prefijo):
+    # Historial de ventas escrito directo (sin validar stock) para tener
+    # volumen en ventas/detalle_ventas; el trigger de stock sigue activo
+    productos = db.execute_query("SELECT id_producto, precio_publico FROM productos", fetch=True)
+    clientes = [f['id_cliente'] for f in db.execute_query("SELECT id_cliente FROM clientes", fetch=True)]
+    empleados = [f['id_empleado'] for f in db.execute_query("SELECT id_empleado FROM empleados", fetch=True)]
+    if not productos or not empleados:
+        print("No hay productos o empleados para sembrar ventas")
+        return
+
+    for inicio in range(0, ventas, LOTE):
+        with db.transaction() as cursor:
+            for n in range(inicio, min(inicio + LOTE, ventas)):
+                lineas = _lineas_aleatorias(rng, productos)
+                subtotal, iva, total = calcular_totales(lineas)
+                cursor.execute(
+                    """INSERT INTO ventas
+                    (folio, id_cliente, id_empleado, fecha, subtotal, iva, total, estado, metodo_pago)
+                    VALUES (%s, %s, %s, NOW(), %s, %s, %s, 'completada', 'efectivo')""",
+                    (f"H{prefijo}{n:09d}", rng.choice(clientes), rng.choice(empleados), subtotal, iva, total)
+                )
+                id_venta = cursor.lastrowid
+                cursor.executemany(
+                    """INSERT INTO detalle_ventas
+                    (id_venta, id_producto, cantidad, precio_unitario, importe)
+                    VALUES (%s, %s, %s, %s, %s)""",
+                    [
+                        (id_venta, linea['id'], linea['cantidad'], linea['precio_unitario'], linea['subtotal'])
+                        for linea in lineas
+                    ]
+                )
+
+
+def _lineas_aleatorias(rng, productos, maximo=5):
+    lineas = {}
+    for producto in rng.sample(productos, min(len(productos), rng.randint(1, maximo))):
+        cantidad = rng.randint(1, 3)
+        precio = float(producto['precio_publico'])
+        lineas[producto['id_producto']] = {
+            'id': producto['id_producto'],
+            'nombre': producto.get('nombre', ''),
+            'cantidad': cantidad,
+            'precio_unitario': precio,
+            'subtotal': precio * cantidad
+        }
+    return list(lineas.values())
+
+
+# ------------------------- CARGA CONCURRENTE -------------------------
+class Resultados:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencias = {}     # escenario -> [segundos]
+        self.errores = {}
+        self.rechazos = 0       # ventas rechazadas por stock
+        self.conteos = {}
+
+    def registrar(self, escenario, segundos):
+        with self._lock:
+            self.latencias.setdefault(escenario, []).append(segundos)
+
+    def error(self, escenario, e):
+        with self._lock:
+            self.errores[escenario] = self.errores.get(escenario, 0) + 1
+            if self.errores[escenario] <= 3:
+                print(f"Error en {escenario}: {e}")
+
+    def rechazo(self):
+        with self._lock:
+            self.rechazos += 1
+
+    def contar(self, nombre, cantidad=1):
+        with self._lock:
+            self.conteos[nombre] = self.conteos.get(nombre, 0) + cantidad
+
+
+def percentil(valores, p):
+    if not valores:
+        return 0.0
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(len(ordenados) * p / 100))]
+
+
+class Caja(threading.Thread):
+    # Una caja simulada: repite escenarios al azar según la mezcla hasta
+    # que se cumple la duración
+    def __init__(self, numero, db, servicio, catalogo, mezcla, fin, resultados, semilla=1):
+        super().__init__(name=f"caja-{numero}", daemon=True)
+        self.numero = numero
+        self.db = db
+        self.servicio = servicio
+        self.catalogo = catalogo
+        self.fin = fin
+        self.resultados = resultados
+        self.rng = random.Random(semilla * 1000 + numero)
+        self.escenarios = [nombre for nombre, peso in mezcla.items() for _ in range(peso)]
+        self.sincronizadores = crear_sincronizadores(db)
+        # Cada caja es una terminal con su propio contador de folios y sus
+        # apartados; la caché y el índice de búsqueda son compartidos
+        self.folios = GeneradorFolios(db, f"B{numero:02d}")
+        self.servicio = SalesService(
+            db, servicio.cache, servicio.buscador, folios=self.folios,
+            reservas=ReservasStock(db, self.folios.terminal)
+        )
+
+    def run(self):
+        while time.monotonic() < self.fin:
+            escenario = self.rng.choice(self.escenarios)
+            inicio = time.perf_counter()
+            try:
+                with accion(f"benchmark.{escenario}"):
+                    getattr(self, escenario)()
+            except StockInsuficienteError:
+                self.resultados.rechazo()
+            except (DB_ERRORS + (RuntimeError,)) as e:
+                self.resultados.error(escenario, e)
+                continue
+            self.resultados.registrar(escenario, time.perf_counter() - inicio)
+
+    def venta(self):
+        # El flujo de confirmar_venta: armar el carrito y cobrar
+        carrito = Carrito()
+        try:
+            for producto in self.rng.sample(self.catalogo, min(len(self.catalogo), self.rng.randint(1, 5))):
+                self.servicio.agregar_al_carrito(carrito, producto, 1)
+            self.servicio.cobrar(1, 1, carrito.lineas())
+        except StockInsuficienteError:
+            self.servicio.liberar()
+            raise
+
+    def busqueda(self):
+        # Mitad códigos de barras (como un escáner), mitad texto libre
+        if self.rng.random() < 0.5:
+            self.servicio.buscar(self.rng.choice(self.catalogo)['codigo_barras'] or "")
+        else:
+            self.servicio.buscar(self.rng.choice(PALABRAS)[:5])
+
+    def refresco(self):
+        # Refresco incremental de las tablas del catálogo
+        for sincronizador in self.sincronizadores.values():
+            cambios = sincronizador.consultar()
+            if cambios is None:
+                raise RuntimeError(f"No se pudo refrescar {sincronizador.tabla}")
+            sincronizador.confirmar(cambios)
+
+
+def estado_bloqueos(db):
+    # Espera por bloqueos de fila (solo InnoDB); en SQLite las esperas por el
+    # candado de escritura quedan dentro de la latencia de las ventas
+    if db.backend.nombre != 'mysql':
+        return None
+    filas = db.execute_query("SHOW GLOBAL STATUS LIKE 'Innodb_row_lock%'", fetch=True) or []
+    return {fila['Variable_name']: int(fila['Value']) for fila in filas}
+
+
+def correr(db, cajas, duracion, mezcla, semilla=1):
+    # Igual que en la caja: caché de productos caliente e índice de búsqueda
+    cache = ProductoCache(db)
+    cache.calentar()
+    servicio = SalesService(db, cache)
+    catalogo = db.execute_query(
+        "SELECT id_producto, codigo_barras, nombre, precio_publico, stock FROM productos WHERE stock > 100",
+        fetch=True
+    )
+    if not catalogo:
+        raise SystemExit("No hay productos con stock; correr primero: python benchmark.py sembrar")
+
+    resultados = Resultados()
+    bloqueos_antes = estado_bloqueos(db)
+    db.instrumentacion.reiniciar()
+    pool_antes = db.pool.stats()
+    sentencias_antes = db.stats_sentencias()
+    fin = time.monotonic() + duracion
+    hilos = [
+        Caja(n, db, servicio, catalogo, mezcla, fin, resultados, semilla)
+        for n in range(cajas)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    reporte = {
+        'backend': db.backend.nombre,
+        'cajas': cajas,
+        'duracion': round(transcurrido, 2),
+        'escenarios': {},
+        'rechazos_por_stock': resultados.rechazos,
+        'errores': resultados.errores,
+    }
+    for escenario, latencias in sorted(resultados.latencias.items()):
+        reporte['escenarios'][escenario] = {
+            'operaciones': len(latencias),
+            'por_segundo': round(len(latencias) / transcurrido, 1),
+            'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+            'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+        }
+
+    pool = db.pool.stats()
+    reporte['pool'] = {
+        'esperas': pool['esperas'] - pool_antes['esperas'],
+        'tiempo_espera_ms': round((pool['tiempo_espera'] - pool_antes['tiempo_espera']) * 1000, 1),
+        'timeouts': pool['timeouts'] - pool_antes['timeouts'],
+    }
+    sentencias = db.stats_sentencias()
+    if sentencias:
+        reporte['sentencias'] = {
+            clave: sentencias[clave] - sentencias_antes.get(clave, 0)
+            for clave in ('aciertos', 'preparadas', 'sin_preparar')
+        }
+        usos = sum(reporte['sentencias'].values())
+        reporte['sentencias']['tasa_aciertos'] = round(reporte['sentencias']['aciertos'] / usos, 4) if usos else 0.0
+    # Las consultas que más tiempo sumaron, con su huella
+    reporte['consultas'] = db.instrumentacion.resumen(limite=10)
+    reporte['n_mas_1'] = list(db.instrumentacion.n_mas_1)
+    bloqueos = estado_bloqueos(db)
+    if bloqueos is not None:
+        reporte['bloqueos_fila'] = {
+            'esperas': bloqueos.get('Innodb_row_lock_waits', 0) - bloqueos_antes.get('Innodb_row_lock_waits', 0),
+            'tiempo_ms': bloqueos.get('Innodb_row_lock_time', 0) - bloqueos_antes.get('Innodb_row_lock_time', 0),
+        }
+    return reporte
+
+
+def imprimir_reporte(reporte):
+    print(f"\nBackend: {reporte['backend']}  Cajas: {reporte['cajas']}  Duración: {reporte['duracion']}s")
+    print(f"{'Escenario':<12}{'Ops':>8}{'Ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for escenario, datos in reporte['escenarios'].items():
+        print(
+            f"{escenario:<12}{datos['operaciones']:>8}{datos['por_segundo']:>10}"
+            f"{datos['p50_ms']:>10}{datos['p95_ms']:>10}{datos['p99_ms']:>10}"
+        )
+    pool = reporte['pool']
+    print(f"\nEsperas por conexión: {pool['esperas']} ({pool['tiempo_espera_ms']} ms), timeouts: {pool['timeouts']}")
+    if 'bloqueos_fila' in reporte:
+        bloqueos = reporte['bloqueos_fila']
+        print(f"Esperas por bloqueo de fila: {bloqueos['esperas']} ({bloqueos['tiempo_ms']} ms)")
+    if 'sentencias' in reporte:
+        sentencias = reporte['sentencias']
+        print(
+            f"Sentencias preparadas: {sentencias['aciertos']} reutilizadas, "
+            f"{sentencias['preparadas']} preparadas, {sentencias['sin_preparar']} sin preparar "
+            f"({sentencias['tasa_aciertos']:.1%} de aciertos)"
+        )
+    print(f"Ventas rechazadas por stock: {reporte['rechazos_por_stock']}")
+    if reporte['errores']:
+        print(f"Errores: {reporte['errores']}")
+
+
+# ------------------------- APARTADOS EN PRODUCTOS MUY VENDIDOS -------------------------
+def crear_productos_calientes(db, productos, stock):
+    # Productos nuevos con poco stock para que todas las cajas se los
+    # disputen; no se toca el stock de los que ya existen
+    prefijo = f"{int(time.time()) % 100000:05d}"
+    codigos = [f"98{prefijo}{n:08d}" for n in range(productos)]
+    with db.transaction() as cursor:
+        cursor.executemany(
+            """INSERT INTO productos
+            (codigo_barras, nombre, descripcion, precio_costo, precio_publico, stock)
+            VALUES (%s, %s, 'Producto sintético muy vendido', 100, 140, %s)""",
+            [(codigo, f"Oferta {prefijo}-{n}", stock) for n, codigo in enumerate(codigos)]
+        )
+        cursor.execute(
+            f"""SELECT id_producto, codigo_barras, nombre, precio_publico, stock FROM productos
+            WHERE codigo_barras IN ({', '.join(['%s'] * len(codigos))}) ORDER BY id_producto""",
+            codigos
+        )
+        return cursor.fetchall()
+
+
+class CajaApartados(threading.Thread):
+    # Arma carritos solo con los productos calientes, con una pausa entre
+    # producto y producto (el cajero escaneando) para que los apartados se
+    # traslapen, y a veces abandona el carrito
+    def __init__(self, numero, db, calientes, fin, resultados, pausa, abandono, semilla=1):
+        super().__init__(name=f"caja-apartados-{numero}", daemon=True)
+        self.calientes = calientes
+        self.fin = fin
+        self.resultados = resultados
+        self.pausa = pausa
+        self.abandono = abandono
+        self.rng = random.Random(semilla * 1000 + numero)
+        folios = GeneradorFolios(db, f"A{numero:02d}")
+        self.servicio = SalesService(db, folios=folios, reservas=ReservasStock(db, folios.terminal))
+
+    def run(self):
+        while time.monotonic() < self.fin:
+            try:
+                self.carrito()
+            except DB_ERRORS as e:
+                self.resultados.error('apartados', e)
+                self.servicio.liberar()
+        self.servicio.liberar()
+
+    def carrito(self):
+        carrito = Carrito()
+        for _ in range(self.rng.randint(1, 3)):
+            producto = self.rng.choice(self.calientes)
+            inicio = time.perf_counter()
+            try:
+                with accion("benchmark.apartar"):
+                    self.servicio.agregar_al_carrito(carrito, producto, self.rng.randint(1, 2))
+                self.resultados.registrar('apartar', time.perf_counter() - inicio)
+            except StockInsuficienteError:
+                self.resultados.contar('apartados_rechazados')
+            time.sleep(self.rng.uniform(0, self.pausa))
+        if not carrito:
+            return
+        if self.rng.random() < self.abandono:
+            self.servicio.liberar()
+            self.resultados.contar('carritos_abandonados')
+            return
+        inicio = time.perf_counter()
+        try:
+            with accion("benchmark.cobro"):
+                self.servicio.cobrar(1, 1, carrito.lineas())
+        except StockInsuficienteError:
+            # Lo apartado no alcanzó al cobrar (p. ej. un apartado que venció)
+            self.resultados.contar('cobros_rechazados')
+            self.servicio.liberar()
+            return
+        self.resultados.registrar('cobro', time.perf_counter() - inicio)
+        self.resultados.contar('unidades_vendidas', sum(linea.cantidad for linea in carrito))
+
+
+def correr_apartados(db, cajas, productos, stock, duracion, pausa=0.005, abandono=0.1, semilla=1):
+    # Muchas cajas sobre pocos productos con poco stock. Al final revisa en
+    # la base que no se vendió de más: stock final = inicial - vendido,
+    # nunca negativo, y sin apartados colgados
+    calientes = crear_productos_calientes(db, productos, stock)
+    ids = [p['id_producto'] for p in calientes]
+    marcadores = ', '.join(['%s'] * len(ids))
+    resultados = Resultados()
+    bloqueos_antes = estado_bloqueos(db)
+    fin = time.monotonic() + duracion
+    hilos = [
+        CajaApartados(n, db, calientes, fin, resultados, pausa, abandono, semilla)
+        for n in range(cajas)
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    transcurrido = time.perf_counter() - inicio
+
+    finales = {
+        fila['id_producto']: fila['stock']
+        for fila in db.execute_query(
+            f"SELECT id_producto, stock FROM productos WHERE id_producto IN ({marcadores})", ids, fetch=True
+        )
+    }
+    vendidas = {
+        fila['id_producto']: int(fila['vendidas'])
+        for fila in db.execute_query(
+            f"""SELECT id_producto, SUM(cantidad) AS vendidas FROM detalle_ventas
+            WHERE id_producto IN ({marcadores}) GROUP BY id_producto""",
+            ids, fetch=True
+        )
+    }
+    colgados = db.execute_query(
+        f"SELECT COUNT(*) AS n FROM reservas_stock WHERE id_producto IN ({marcadores})", ids, fetch=True
+    )[0]['n']
+
+    reporte = {
+        'backend': db.backend.nombre,
+        'cajas': cajas,
+        'duracion': round(transcurrido, 2),
+        'escenarios': {},
+        'conteos': resultados.conteos,
+        'errores': resultados.errores,
+        'productos': [
+            {
+                'id_producto': i,
+                'stock_inicial': stock,
+                'vendidas': vendidas.get(i, 0),
+                'stock_final': finales.get(i),
+            }
+            for i in ids
+        ],
+        'apartados_colgados': colgados,
+    }
+    reporte['sin_sobreventa'] = all(
+        p['stock_final'] is not None and p['stock_final'] >= 0
+        and p['vendidas'] <= stock and p['stock_final'] == stock - p['vendidas']
+        for p in reporte['productos']
+    ) and resultados.conteos.get('unidades_vendidas', 0) == sum(vendidas.values())
+    for escenario, latencias in sorted(resultados.latencias.items()):
+        reporte['escenarios'][escenario] = {
+            'operaciones': len(latencias),
+            'por_segundo': round(len(latencias) / transcurrido, 1),
+            'p50_ms': round(percentil(latencias, 50) * 1000, 2),
+            'p95_ms': round(percentil(latencias, 95) * 1000, 2),
+            'p99_ms': round(percentil(latencias, 99) * 1000, 2),
+        }
+    bloqueos = estado_bloqueos(db)
+    if bloqueos is not None:
+        reporte['bloqueos_fila'] = {
+            'esperas': bloqueos.get('Innodb_row_lock_waits', 0) - bloqueos_antes.get('Innodb_row_lock_waits', 0),
+            'tiempo_ms': bloqueos.get('Innodb_row_lock_time', 0) - bloqueos_antes.get('Innodb_row_lock_time', 0),
+        }
+    return reporte
+
+
+def imprimir_reporte_apartados(reporte):
+    print(f"\nBackend: {reporte['backend']}  Cajas: {reporte['cajas']}  Duración: {reporte['duracion']}s")
+    print(f"{'Paso':<12}{'Ops':>8}{'Ops/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for escenario, datos in reporte['escenarios'].items():
+        print(
+            f"{escenario:<12}{datos['operaciones']:>8}{datos['por_segundo']:>10}"
+            f"{datos['p50_ms']:>10}{datos['p95_ms']:>10}{datos['p99_ms']:>10}"
+        )
+    if 'bloqueos_fila' in reporte:
+        bloqueos = reporte['bloqueos_fila']
+        print(f"\nEsperas por bloqueo de fila: {bloqueos['esperas']} ({bloqueos['tiempo_ms']} ms)")
+    print()
+    for nombre, valor in sorted(reporte['conteos'].items()):
+        print(f"{nombre.replace('_', ' ').capitalize()}: {valor}")
+    for producto in reporte['productos']:
+        print(
+            f"Producto {producto['id_producto']}: {producto['vendidas']} de {producto['stock_inicial']} "
+            f"vendidas, stock final {producto['stock_final']}"
+        )
+    print(f"Apartados sin liberar: {reporte['apartados_colgados']}")
+    print("Sin sobreventa" if reporte['sin_sobreventa'] else "SOBREVENTA: el stock no cuadra con lo vendido")
+    if reporte['errores']:
+        print(f"Errores: {reporte['errores']}")
+
+
+def leer_mezcla(texto):
+    mezcla = {}
+    for parte in texto.split(','):
+        nombre, _, peso = parte.partition('=')
+        nombre = nombre.strip()
+        if nombre not in MEZCLA:
+            raise argparse.ArgumentTypeError(f"Escenario desconocido: {nombre}")
+        mezcla[nombre] = int(peso or 1)
+    return mezcla
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Carga sintética y benchmark de caja y búsqueda")
+    parser.add_argument('--sqlite', metavar='RUTA', help="usar una base SQLite en lugar de MySQL")
+    parser.add_argument('--pool', type=int, default=10, help="conexiones en el pool")
+    sub = parser.add_subparsers(dest='comando', required=True)
+
+    p_sembrar = sub.add_parser('sembrar', help="insertar datos sintéticos")
+    p_sembrar.add_argument('--productos', type=int, default=10000)
+    p_sembrar.add_argument('--clientes', type=int, default=1000)
+    p_sembrar.add_argument('--ventas', type=int, default=5000)
+    p_sembrar.add_argument('--semilla', type=int, default=1)
+
+    p_correr = sub.add_parser('correr', help="simular cajas concurrentes")
+    p_correr.add_argument('--cajas', type=int, default=4)
+    p_correr.add_argument('--duracion', type=float, default=10.0, help="segundos")
+    p_correr.add_argument('--mezcla', type=leer_mezcla, default=dict(MEZCLA),
+                          help="pesos por escenario, p. ej. venta=1,busqueda=4,refresco=1")
+    p_correr.add_argument('--semilla', type=int, default=1)
+    p_correr.add_argument('--json', metavar='ARCHIVO', help="guardar el reporte en JSON")
+
+    p_apartados = sub.add_parser('apartados', help="muchas cajas apartando pocos productos con poco stock")
+    p_apartados.add_argument('--cajas', type=int, default=32)
+    p_apartados.add_argument('--productos', type=int, default=3, help="productos calientes")
+    p_apartados.add_argument('--stock', type=int, default=200, help="stock inicial de cada uno")
+    p_apartados.add_argument('--duracion', type=float, default=10.0, help="segundos")
+    p_apartados.add_argument('--pausa', type=float, default=0.005, help="segundos máximos entre productos")
+    p_apartados.add_argument('--abandono', type=float, default=0.1, help="fracción de carritos abandonados")
+    p_apartados.add_argument('--semilla', type=int, default=1)
+    p_apartados.add_argument('--json', metavar='ARCHIVO', help="guardar el reporte en JSON")
+
+    args = parser.parse_args()
+    backend = SQLiteBackend(args.sqlite) if args.sqlite else None
+    db = DatabaseManager(backend, pool_size=args.pool)
+    try:
+        # Una base creada antes de los índices y totales se pone al día
+        aplicar_migraciones(db)
+        if args.comando == 'sembrar':
+            inicio = time.perf_counter()
+            sembrar(db, args.productos, args.clientes, args.ventas, args.semilla)
+            print(f"Datos sembrados en {time.perf_counter() - inicio:.1f}s")
+        else:
+            if args.comando == 'apartados':
+                reporte = correr_apartados(
+                    db, args.cajas, args.productos, args.stock, args.duracion,
+                    args.pausa, args.abandono, args.semilla
+                )
+                imprimir_reporte_apartados(reporte)
+            else:
+                reporte = correr(db, args.cajas, args.duracion, args.mezcla, args.semilla)
+                imprimir_reporte(reporte)
+            if args.json:
+                with open(args.json, 'w', encoding='utf-8') as archivo:
+                    json.dump(reporte, archivo, indent=2, ensure_ascii=False)
+            if args.comando == 'apartados' and not reporte['sin_sobreventa']:
+                raise SystemExit(1)
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    main()
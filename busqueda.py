@@ -0,0 +1,171 @@
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+from sincronizacion import SincronizadorTabla
+
+LIMITE_RESULTADOS = 50
+PUNTAJE_MINIMO = 0.5
+INTERVALO_SINCRONIZACION = 15.0  # segundos entre consultas de cambios sin ProductoCache
+
+COLUMNAS = "id_producto, nombre, precio_publico, stock"
+POR_CODIGO = f"SELECT {COLUMNAS} FROM productos WHERE codigo_barras = %s"
+POR_ID = f"SELECT {COLUMNAS} FROM productos WHERE id_producto = %s"
+POR_IDS = f"SELECT {COLUMNAS} FROM productos WHERE id_producto IN ({{marcadores}})"
+
+
+def normalizar(texto):
+    # Minúsculas y sin acentos: "Cámara" y "camara" deben coincidir
+    texto = unicodedata.normalize('NFKD', (texto or '').lower())
+    return ''.join(c for c in texto if not unicodedata.combining(c))
+
+
+def trigramas(texto):
+    resultado = set()
+    for palabra in normalizar(texto).split():
+        palabra = f"  {palabra} "
+        for i in range(len(palabra) - 2):
+            resultado.add(palabra[i:i + 3])
+    return resultado
+
+
+class BuscadorProductos:
+    # Índice de trigramas en memoria sobre productos.nombre. Evita el
+    # LIKE '%texto%' (que recorre toda la tabla) en la búsqueda de la caja:
+    # el índice elige y ordena los ids y la base solo se consulta por llave.
+    # Con una ProductoCache, los códigos exactos se resuelven en memoria y el
+    # índice se mantiene con los cambios que detecta la caché. Sin ella,
+    # buscar() trae los cambios y borrados cada INTERVALO_SINCRONIZACION.
+    def __init__(self, db, limite=LIMITE_RESULTADOS, cache=None, intervalo=INTERVALO_SINCRONIZACION):
+        self.db = db
+        self.limite = limite
+        self.cache = cache
+        self.intervalo = intervalo
+        self.sincronizador = SincronizadorTabla(
+            db, 'productos', 'id_producto',
+            "SELECT id_producto, nombre FROM productos {filtro}",
+            "WHERE fecha_actualizacion >= %s"
+        )
+        self._lock = threading.Lock()
+        self._nombres = {}     # id_producto -> nombre normalizado
+        self._indice = {}      # trigrama -> set(id_producto)
+        self._ultima_sincronizacion = 0.0
+        self.cargado = False
+        if cache is not None:
+            cache.suscribir(self.aplicar_cambios)
+
+    # ------------------------- MANTENIMIENTO DEL ÍNDICE -------------------------
+    def cargar(self):
+        self.sincronizador.reiniciar()
+        return self.sincronizar()
+
+    def sincronizar(self):
+        # Solo los productos modificados o borrados desde la última
+        # sincronización; la primera vez, el catálogo completo
+        cambios = self.sincronizador.consultar()
+        if not self.sincronizador.confirmar(cambios):
+            return False
+        self.aplicar_cambios(cambios.filas, cambios.completo, cambios.eliminados)
+        self._ultima_sincronizacion = time.monotonic()
+        return True
+
+    def aplicar_cambios(self, productos, completo=False, eliminados=()):
+        with self._lock:
+            if completo:
+                self._nombres.clear()
+                self._indice.clear()
+            for producto in productos:
+                self._desindexar(producto['id_producto'])
+                self._indexar(producto['id_producto'], producto['nombre'])
+            for id_producto in eliminados:
+                self._desindexar(id_producto)
+            if completo:
+                self.cargado = True
+
+    def eliminar(self, id_producto):
+        with self._lock:
+            self._desindexar(int(id_producto))
+
+    def _indexar(self, id_producto, nombre):
+        self._nombres[id_producto] = normalizar(nombre)
+        for trigrama in trigramas(nombre):
+            self._indice.setdefault(trigrama, set()).add(id_producto)
+
+    def _desindexar(self, id_producto):
+        nombre = self._nombres.pop(id_producto, None)
+        if nombre is None:
+            return
+        for trigrama in trigramas(nombre):
+            ids = self._indice.get(trigrama)
+            if ids is not None:
+                ids.discard(id_producto)
+                if not ids:
+                    del self._indice[trigrama]
+
+    # ------------------------- BÚSQUEDA -------------------------
+    def buscar(self, texto, limite=None):
+        texto = (texto or '').strip()
+        limite = limite or self.limite
+
+        # Código de barras o id: ir directo por el índice único / llave primaria
+        if texto.isdigit():
+            exacto = self.buscar_exacto(texto)
+            if exacto:
+                return exacto
+
+        if not self.cargado:
+            self.cargar()
+        elif self.cache is None and time.monotonic() - self._ultima_sincronizacion >= self.intervalo:
+            self.sincronizar()
+        ids = self.rankear(texto, limite)
+        return self._obtener_productos(ids)
+
+    def buscar_exacto(self, texto):
+        if self.cache is not None:
+            producto = self.cache.por_codigo(texto)
+            if producto is not None:
+                return [producto]
+        productos = self.db.execute_query(POR_CODIGO, (texto,), fetch=True)
+        # Un código largo no puede ser un id (INT)
+        if not productos and len(texto) <= 9:
+            productos = self.db.execute_query(POR_ID, (int(texto),), fetch=True)
+        return productos or []
+
+    def rankear(self, texto, limite):
+        consulta = normalizar(texto)
+        with self._lock:
+            if not consulta:
+                ordenados = sorted(self._nombres, key=lambda id_producto: self._nombres[id_producto])
+                return ordenados[:limite]
+
+            trigramas_consulta = trigramas(texto)
+            coincidencias = Counter()
+            for trigrama in trigramas_consulta:
+                coincidencias.update(self._indice.get(trigrama, ()))
+
+            puntajes = []
+            for id_producto, comunes in coincidencias.items():
+                puntaje = comunes / len(trigramas_consulta)
+                if puntaje < PUNTAJE_MINIMO:
+                    continue
+                nombre = self._nombres[id_producto]
+                if consulta in nombre:
+                    puntaje += 1
+                    if nombre.startswith(consulta):
+                        puntaje += 0.5
+                puntajes.append((-puntaje, nombre, id_producto))
+
+        puntajes.sort()
+        return [id_producto for _, _, id_producto in puntajes[:limite]]
+
+    def _obtener_productos(self, ids):
+        if not ids:
+            return []
+        marcadores = ", ".join(["%s"] * len(ids))
+        productos = self.db.execute_query(POR_IDS.format(marcadores=marcadores), ids, fetch=True)
+        if not productos:
+            return []
+        # Respetar el orden del ranking
+        por_id = {producto['id_producto']: producto for producto in productos}
+        return [por_id[id_producto] for id_producto in ids if id_producto in por_id]
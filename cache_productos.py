@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import OrderedDict
+
+from instrumentacion import accion
+from sincronizacion import ELIMINACIONES, ULTIMA_ELIMINACION, hora_marca
+
+CAPACIDAD = 100000
+TTL = 300.0                 # segundos que un dato vale sin sincronizar
+INTERVALO_REFRESCO = 15.0   # segundos entre consultas de cambios
+
+COLUMNAS = "id_producto, codigo_barras, nombre, precio_publico, stock"
+RECIENTES = f"SELECT {COLUMNAS} FROM productos ORDER BY fecha_actualizacion DESC LIMIT %s"
+CAMBIOS = f"SELECT {COLUMNAS} FROM productos WHERE fecha_actualizacion >= %s"
+
+
+class ProductoCacheado:
+    __slots__ = ('id_producto', 'codigo_barras', 'nombre', 'precio_publico', 'stock', 'cargado')
+
+    def __init__(self, fila, cargado):
+        self.id_producto = fila['id_producto']
+        self.codigo_barras = fila['codigo_barras']
+        self.nombre = fila['nombre']
+        self.precio_publico = float(fila['precio_publico'])
+        self.stock = fila['stock']
+        self.cargado = cargado
+
+    def como_fila(self):
+        return {
+            'id_producto': self.id_producto,
+            'codigo_barras': self.codigo_barras,
+            'nombre': self.nombre,
+            'precio_publico': self.precio_publico,
+            'stock': self.stock
+        }
+
+
+class ProductoCache:
+    # Caché local de productos por código de barras e id para el escaneo en
+    # caja: un acierto se resuelve en memoria sin tocar MySQL. Se calienta al
+    # iniciar y se mantiene al día consultando productos.fecha_actualizacion.
+    def __init__(self, db, capacidad=CAPACIDAD, ttl=TTL):
+        self.db = db
+        self.capacidad = capacidad
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._por_id = OrderedDict()   # orden LRU: el más reciente al final
+        self._por_codigo = {}
+        self._marca = None             # hora del servidor de la última sincronización (hora_marca)
+        self._ultima_eliminacion = 0   # último id de eliminaciones procesado
+        self._ultima_sincronizacion = 0.0
+        self._en_linea = True          # False si la última sincronización falló
+        self._oyentes = []
+        self._detener = threading.Event()
+        self._hilo = None
+        self.aciertos = 0
+        self.fallos = 0
+
+    # ------------------------- CONSULTA -------------------------
+    def por_codigo(self, codigo_barras):
+        with self._lock:
+            id_producto = self._por_codigo.get(codigo_barras)
+            return self._obtener(id_producto)
+
+    def por_id(self, id_producto):
+        with self._lock:
+            return self._obtener(id_producto)
+
+    def _obtener(self, id_producto):
+        producto = self._por_id.get(id_producto)
+        if producto is None:
+            self.fallos += 1
+            return None
+        if not self._vigente(producto):
+            self._quitar(id_producto)
+            self.fallos += 1
+            return None
+        self._por_id.move_to_end(id_producto)
+        self.aciertos += 1
+        return producto.como_fila()
+
+    def _vigente(self, producto):
+        # Sin conexión se sigue vendiendo con lo que hay en memoria
+        if not self._en_linea:
+            return True
+        return time.monotonic() - max(producto.cargado, self._ultima_sincronizacion) <= self.ttl
+
+    # ------------------------- MANTENIMIENTO -------------------------
+    def calentar(self):
+        ahora = hora_marca(self.db)
+        ultima = self.db.execute_query(ULTIMA_ELIMINACION, ('productos',), fetch=True)
+        productos = self.db.execute_query(RECIENTES, (self.capacidad,), fetch=True)
+        if productos is None or ultima is None:
+            self._en_linea = False
+            return False
+        with self._lock:
+            self._ultima_eliminacion = ultima[0]['ultima'] or 0
+            self._por_id.clear()
+            self._por_codigo.clear()
+            # Los más recientes quedan al final (los últimos en ser desalojados)
+            for fila in reversed(productos):
+                self._guardar(fila)
+            self._marcar_sincronizado(ahora)
+        # Si cupo todo el catálogo, los oyentes reciben la lista completa
+        self._avisar(productos, len(productos) < self.capacidad, [])
+        return True
+
+    def refrescar(self):
+        # Trae solo los productos modificados o borrados desde la última sincronización
+        if self._marca is None:
+            return self.calentar()
+        ahora = hora_marca(self.db)
+        productos = self.db.execute_query(CAMBIOS, (self._marca,), fetch=True)
+        eliminaciones = self.db.execute_query(
+            ELIMINACIONES, ('productos', self._ultima_eliminacion), fetch=True
+        )
+        if productos is None or eliminaciones is None:
+            self._en_linea = False
+            return False
+        eliminados = [e['id_registro'] for e in eliminaciones]
+        with self._lock:
+            for fila in productos:
+                self._guardar(fila)
+            for id_producto in eliminados:
+                self._quitar(id_producto)
+            if eliminaciones:
+                self._ultima_eliminacion = eliminaciones[-1]['id_eliminacion']
+            self._marcar_sincronizado(ahora)
+        if productos or eliminados:
+            self._avisar(productos, False, eliminados)
+        return True
+
+    def cargar_copia(self, filas):
+        # Arranque sin conexión con la copia local del catálogo (diario_ventas).
+        # Sin marca, el primer refresco con conexión vuelve a calentar completo.
+        with self._lock:
+            self._en_linea = False
+            for fila in filas:
+                self._guardar(fila)
+        self._avisar(filas, len(filas) < self.capacidad, [])
+
+    def guardar(self, fila):
+        with self._lock:
+            self._guardar(fila)
+
+    def descontar(self, id_producto, cantidad):
+        # Ajuste local tras una venta; el siguiente refresco trae el valor real
+        with self._lock:
+            producto = self._por_id.get(id_producto)
+            if producto is not None:
+                producto.stock -= cantidad
+
+    def invalidar(self, id_producto):
+        with self._lock:
+            self._quitar(id_producto)
+
+    def suscribir(self, oyente):
+        # oyente(filas, completo, eliminados) se llama con los productos que
+        # cambiaron; completo indica que filas es el catálogo entero
+        self._oyentes.append(oyente)
+
+    def _guardar(self, fila):
+        id_producto = fila['id_producto']
+        anterior = self._por_id.pop(id_producto, None)
+        if anterior is not None and anterior.codigo_barras:
+            self._por_codigo.pop(anterior.codigo_barras, None)
+        producto = ProductoCacheado(fila, time.monotonic())
+        self._por_id[id_producto] = producto
+        if producto.codigo_barras:
+            self._por_codigo[producto.codigo_barras] = id_producto
+        while len(self._por_id) > self.capacidad:
+            viejo_id = next(iter(self._por_id))
+            self._quitar(viejo_id)
+
+    def _quitar(self, id_producto):
+        producto = self._por_id.pop(id_producto, None)
+        if producto is not None and producto.codigo_barras:
+            self._por_codigo.pop(producto.codigo_barras, None)
+
+    def _marcar_sincronizado(self, ahora):
+        if ahora is not None:
+            self._marca = ahora
+        self._ultima_sincronizacion = time.monotonic()
+        self._en_linea = True
+
+    def _avisar(self, filas, completo, eliminados):
+        for oyente in self._oyentes:
+            try:
+                oyente(filas, completo, eliminados)
+            except Exception as e:
+                print(f"Error al notificar cambios de productos: {e}")
+
+    # ------------------------- REFRESCO EN SEGUNDO PLANO -------------------------
+    def iniciar_refresco(self, intervalo=INTERVALO_REFRESCO):
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(
+            target=self._ciclo_refresco, args=(intervalo,),
+            name="refresco-cache-productos", daemon=True
+        )
+        self._hilo.start()
+
+    def _ciclo_refresco(self, intervalo):
+        while not self._detener.is_set():
+            try:
+                with accion("cache_productos.refresco"):
+                    self.refrescar()
+            except Exception as e:
+                print(f"Error al refrescar la caché de productos: {e}")
+            self._detener.wait(intervalo)
+
+    def detener_refresco(self):
+        self._detener.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                'productos': len(self._por_id),
+                'aciertos': self.aciertos,
+                'fallos': self.fallos
+            }
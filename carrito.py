@@ -0,0 +1,76 @@
+class LineaCarrito:
+    __slots__ = ('id', 'nombre', 'cantidad', 'precio_unitario', 'subtotal', 'stock_disponible')
+
+    def __init__(self, id_producto, nombre, precio_unitario, stock_disponible):
+        self.id = id_producto
+        self.nombre = nombre
+        self.cantidad = 0
+        self.precio_unitario = precio_unitario
+        self.subtotal = 0.0
+        self.stock_disponible = stock_disponible
+
+    def como_dict(self):
+        # Como la esperan registrar_venta, el diario y el ticket
+        return {campo: getattr(self, campo) for campo in self.__slots__}
+
+
+class Carrito:
+    # Líneas en el orden en que se agregaron, con un índice id -> fila y el
+    # total al día: agregar, buscar una línea y leer el total no recorren el
+    # carrito, aunque sea un pedido de mayoreo con cientos de líneas. No es
+    # seguro entre hilos; la caja lo usa desde el hilo de la interfaz.
+    def __init__(self):
+        self._lineas = []
+        self._pos = {}          # id_producto -> fila
+        self.total = 0.0
+
+    def __len__(self):
+        return len(self._lineas)
+
+    def __iter__(self):
+        return iter(self._lineas)
+
+    def fila(self, row):
+        return self._lineas[row]
+
+    def posicion(self, id_producto):
+        return self._pos.get(id_producto)
+
+    def cantidad(self, id_producto):
+        row = self._pos.get(id_producto)
+        return 0 if row is None else self._lineas[row].cantidad
+
+    def agregar(self, producto, cantidad, disponible):
+        # Suma la cantidad si el producto ya está en el carrito
+        id_producto = producto["id_producto"]
+        row = self._pos.get(id_producto)
+        if row is None:
+            linea = LineaCarrito(id_producto, producto["nombre"], float(producto["precio_publico"]), disponible)
+            self._pos[id_producto] = len(self._lineas)
+            self._lineas.append(linea)
+        else:
+            linea = self._lineas[row]
+            linea.stock_disponible = disponible
+        importe = linea.precio_unitario * cantidad
+        linea.cantidad += cantidad
+        linea.subtotal += importe
+        self.total += importe
+        return linea
+
+    def quitar(self, row):
+        linea = self._lineas.pop(row)
+        del self._pos[linea.id]
+        for siguiente in range(row, len(self._lineas)):
+            self._pos[self._lineas[siguiente].id] = siguiente
+        # Sin líneas el total vuelve a cero exacto, sin residuos de redondeo
+        self.total = self.total - linea.subtotal if self._lineas else 0.0
+        return linea
+
+    def vaciar(self):
+        self._lineas.clear()
+        self._pos.clear()
+        self.total = 0.0
+
+    def lineas(self):
+        # Copia en dicts para cobrar en otro hilo mientras el carrito sigue en pantalla
+        return [linea.como_dict() for linea in self._lineas]
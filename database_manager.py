@@ -0,0 +1,732 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+
+import mysql.connector
+from mysql.connector import Error
+from mysql.connector import errors as mysql_errors
+
+from instrumentacion import Instrumentacion, CursorInstrumentado, logger
+
+# Configuración de producción (MySQL)
+MYSQL_CONFIG = {
+    'host': 'localhost',
+    'port': 3307,
+    'user': 'root',
+    'password': 'root',
+    'database': 'sears_db'
+}
+
+# Base embebida para pruebas de carga locales (SEARS_DB_BACKEND=sqlite)
+SQLITE_PATH = 'sears_db.sqlite'
+SQLITE_SCHEMA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'db23270652_sqlite.sql')
+
+# Errores que puede lanzar cualquiera de los backends
+DB_ERRORS = (Error, sqlite3.Error)
+# Los que se deben a los datos de la sentencia y no a la conexión: repetirla no sirve
+DATA_ERRORS = (mysql_errors.IntegrityError, mysql_errors.DataError, sqlite3.IntegrityError)
+
+# Una sentencia se prepara a partir de su segunda ejecución; las de texto
+# variable (p. ej. listas IN de distinto largo) no llenan el registro
+UMBRAL_PREPARAR = 2
+SENTENCIAS_POR_CONEXION = 64
+SENTENCIAS_PREPARABLES = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+# Filas por fetchmany al recorrer resultados grandes sin cargarlos en memoria
+LOTE_STREAMING = 1000
+
+
+class PoolTimeoutError(Error):
+    pass
+
+
+# ------------------------- SENTENCIAS PREPARADAS -------------------------
+class RegistroSentencias:
+    # Cursores preparados por conexión y por texto de sentencia: la sentencia
+    # se analiza una vez en el servidor y las siguientes ejecuciones solo
+    # envían los parámetros. Una conexión del pool la usa un solo hilo a la
+    # vez, así que sus cursores se pueden reutilizar sin más candados.
+    def __init__(self, crear_cursor, umbral=UMBRAL_PREPARAR, capacidad=SENTENCIAS_POR_CONEXION):
+        self.crear_cursor = crear_cursor
+        self.umbral = umbral
+        self.capacidad = capacidad
+        self.soportado = True
+        self._lock = threading.Lock()
+        self._vistas = {}           # sql -> ejecuciones
+        self._por_conexion = {}     # id(conexión) -> OrderedDict(sql -> cursor), en orden LRU
+        self.aciertos = 0
+        self.preparadas = 0
+        self.sin_preparar = 0
+
+    def obtener(self, conn, query):
+        # Cursor preparado para query, o None si todavía no conviene prepararla
+        if not self.soportado or not query.lstrip()[:6].upper().startswith(SENTENCIAS_PREPARABLES):
+            return None
+        desalojado = None
+        with self._lock:
+            cursores = self._por_conexion.get(id(conn))
+            if cursores is not None and query in cursores:
+                cursores.move_to_end(query)
+                self.aciertos += 1
+                return cursores[query]
+
+            veces = self._vistas.get(query, 0) + 1
+            if query in self._vistas or len(self._vistas) < 10000:
+                self._vistas[query] = veces
+            if veces < self.umbral:
+                self.sin_preparar += 1
+                return None
+
+            try:
+                cursor = self.crear_cursor(conn)
+            except (ValueError, TypeError, NotImplementedError) as e:
+                # Conector sin cursores preparados con diccionario: se sigue
+                # sin preparar, con un aviso en el log de SQL
+                logger.warning("Sentencias preparadas no disponibles: %s", e)
+                self.soportado = False
+                return None
+            self.preparadas += 1
+            cursores = self._por_conexion.setdefault(id(conn), OrderedDict())
+            cursores[query] = cursor
+            if len(cursores) > self.capacidad:
+                _, desalojado = cursores.popitem(last=False)
+        if desalojado is not None:
+            self._cerrar(desalojado)
+        return cursor
+
+    def descartar(self, conn, query):
+        # Tras un error el cursor puede quedar inservible
+        with self._lock:
+            cursor = self._por_conexion.get(id(conn), {}).pop(query, None)
+        if cursor is not None:
+            self._cerrar(cursor)
+
+    def olvidar(self, conn):
+        with self._lock:
+            cursores = self._por_conexion.pop(id(conn), None)
+        for cursor in (cursores or {}).values():
+            self._cerrar(cursor)
+
+    def _cerrar(self, cursor):
+        try:
+            cursor.close()
+        except Exception:
+            pass
+
+    def stats(self):
+        with self._lock:
+            usos = self.aciertos + self.preparadas + self.sin_preparar
+            return {
+                'aciertos': self.aciertos,
+                'preparadas': self.preparadas,
+                'sin_preparar': self.sin_preparar,
+                'tasa_aciertos': round(self.aciertos / usos, 4) if usos else 0.0,
+                'cursores_abiertos': sum(len(c) for c in self._por_conexion.values())
+            }
+
+
+# ------------------------- BACKENDS -------------------------
+class DatabaseBackend:
+    # Interfaz común: cada backend sabe abrir conexiones, crear cursores
+    # que devuelven filas como diccionarios y detectar conexiones caídas.
+    nombre = "base"
+    sentencias = None   # RegistroSentencias, si el backend reutiliza cursores
+
+    def connect(self):
+        raise NotImplementedError
+
+    def cursor(self, conn):
+        raise NotImplementedError
+
+    def cursor_streaming(self, conn):
+        # Cursor que devuelve tuplas y trae las filas conforme se piden
+        raise NotImplementedError
+
+    def cursor_preparado(self, conn, query):
+        # Cursor reutilizable ya preparado para query en esta conexión, o None
+        if self.sentencias is None:
+            return None
+        return self.sentencias.obtener(conn, query)
+
+    def ping(self, conn):
+        raise NotImplementedError
+
+    def begin(self, conn):
+        raise NotImplementedError
+
+    def is_disconnect(self, error):
+        return False
+
+    # Migraciones (migraciones.py): lo que cambia entre motores
+    def existe_indice(self, cursor, tabla, nombre):
+        raise NotImplementedError
+
+    def existe_columna(self, cursor, tabla, columna):
+        raise NotImplementedError
+
+    def existe_disparador(self, cursor, nombre):
+        raise NotImplementedError
+
+    def borrar_indice(self, tabla, nombre):
+        raise NotImplementedError
+
+    def plan(self, cursor, query, params=()):
+        # [(tabla, detalle, recorre_toda_la_tabla)] según EXPLAIN
+        raise NotImplementedError
+
+    def close(self, conn):
+        if self.sentencias is not None:
+            self.sentencias.olvidar(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+
+class MySQLBackend(DatabaseBackend):
+    nombre = "mysql"
+
+    def __init__(self, **config):
+        self.config = dict(MYSQL_CONFIG, **config)
+        # Cursores con protocolo binario: COM_STMT_PREPARE una vez por
+        # conexión y COM_STMT_EXECUTE en cada uso
+        self.sentencias = RegistroSentencias(
+            lambda conn: conn.cursor(prepared=True, dictionary=True)
+        )
+
+    def connect(self):
+        # autocommit evita que las conexiones del pool se queden con una
+        # transacción abierta (y una foto vieja de los datos) tras un SELECT
+        return mysql.connector.connect(autocommit=True, **self.config)
+
+    def cursor(self, conn):
+        return conn.cursor(dictionary=True)
+
+    def cursor_streaming(self, conn):
+        # Sin buffer: el servidor manda las filas conforme se leen. Mientras
+        # el cliente escribe el archivo el servidor espera; se le da más
+        # margen que el de por defecto (60 s) antes de cortar la conexión.
+        cursor = conn.cursor()
+        cursor.execute("SET SESSION net_write_timeout = 600")
+        cursor.close()
+        return conn.cursor(buffered=False)
+
+    def ping(self, conn):
+        try:
+            conn.ping(reconnect=False)
+            return True
+        except Error:
+            return False
+
+    def begin(self, conn):
+        conn.start_transaction()
+
+    def is_disconnect(self, error):
+        return isinstance(error, (mysql_errors.OperationalError, mysql_errors.InterfaceError))
+
+    def existe_indice(self, cursor, tabla, nombre):
+        cursor.execute(
+            """SELECT 1 FROM information_schema.statistics
+            WHERE table_schema = DATABASE() AND table_name = %s AND index_name = %s LIMIT 1""",
+            (tabla, nombre)
+        )
+        return bool(cursor.fetchall())
+
+    def borrar_indice(self, tabla, nombre):
+        return f"DROP INDEX {nombre} ON {tabla}"
+
+    def existe_columna(self, cursor, tabla, columna):
+        cursor.execute(
+            """SELECT 1 FROM information_schema.columns
+            WHERE table_schema = DATABASE() AND table_name = %s AND column_name = %s LIMIT 1""",
+            (tabla, columna)
+        )
+        return bool(cursor.fetchall())
+
+    def existe_disparador(self, cursor, nombre):
+        cursor.execute(
+            """SELECT 1 FROM information_schema.triggers
+            WHERE trigger_schema = DATABASE() AND trigger_name = %s LIMIT 1""",
+            (nombre,)
+        )
+        return bool(cursor.fetchall())
+
+    def plan(self, cursor, query, params=()):
+        # type ALL: lee la tabla completa; 'index' recorre un índice en orden
+        # (aceptable con LIMIT)
+        cursor.execute(f"EXPLAIN {query}", params)
+        return [
+            (
+                fila['table'],
+                f"{fila['type']} key={fila['key']} rows={fila['rows']} {fila['Extra'] or ''}".strip(),
+                fila['type'] == 'ALL'
+            )
+            for fila in cursor.fetchall()
+        ]
+
+
+def _dict_factory(cursor, row):
+    return {col[0]: row[idx] for idx, col in enumerate(cursor.description)}
+
+
+_SQLITE_TRADUCCIONES = [
+    # NOW() + INTERVAL %s SECOND (antes de traducir %s y NOW())
+    (re.compile(r'\bNOW\(\)\s*\+\s*INTERVAL\s+%s\s+SECOND\b', re.IGNORECASE),
+     "datetime('now', %s || ' seconds')"),
+    (re.compile(r'%s'), '?'),
+    (re.compile(r'\bNOW\(\)', re.IGNORECASE), 'CURRENT_TIMESTAMP'),
+    (re.compile(r'\s+FOR\s+UPDATE\b', re.IGNORECASE), ''),
+    # INSERT ... ON DUPLICATE KEY UPDATE x = x + VALUES(x)
+    (re.compile(r'\bON\s+DUPLICATE\s+KEY\s+UPDATE\b', re.IGNORECASE), 'ON CONFLICT DO UPDATE SET'),
+    (re.compile(r'\bVALUES\((\w+)\)', re.IGNORECASE), r'excluded.\1'),
+]
+
+
+class _SQLiteCursor:
+    # Adapta el SQL escrito para MySQL (placeholders %s, NOW(), INTERVAL,
+    # FOR UPDATE, ON DUPLICATE KEY UPDATE) al dialecto de SQLite para que
+    # execute_query no tenga que cambiar.
+    _cache = {}
+
+    def __init__(self, conn, tuplas=False):
+        self._cursor = conn.cursor()
+        if tuplas:
+            self._cursor.row_factory = None
+
+    @classmethod
+    def traducir(cls, query):
+        traducida = cls._cache.get(query)
+        if traducida is None:
+            traducida = query
+            for patron, reemplazo in _SQLITE_TRADUCCIONES:
+                traducida = patron.sub(reemplazo, traducida)
+            cls._cache[query] = traducida
+        return traducida
+
+    def execute(self, query, params=()):
+        self._cursor.execute(self.traducir(query), params)
+
+    def executemany(self, query, seq_params):
+        self._cursor.executemany(self.traducir(query), seq_params)
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchmany(self, size=1):
+        return self._cursor.fetchmany(size)
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    @property
+    def rowcount(self):
+        return self._cursor.rowcount
+
+    @property
+    def lastrowid(self):
+        return self._cursor.lastrowid
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    def close(self):
+        self._cursor.close()
+
+
+class SQLiteBackend(DatabaseBackend):
+    nombre = "sqlite"
+
+    def __init__(self, path=SQLITE_PATH, schema=SQLITE_SCHEMA, timeout=5.0):
+        self.path = path
+        self.schema = schema
+        self.timeout = timeout
+        self._schema_lock = threading.Lock()
+        self._schema_listo = False
+        # sqlite3 ya guarda las sentencias compiladas por conexión
+        # (cached_statements); aquí solo se reutilizan los cursores
+        self.sentencias = RegistroSentencias(_SQLiteCursor)
+
+    def connect(self):
+        conn = sqlite3.connect(
+            self.path,
+            timeout=self.timeout,
+            check_same_thread=False,
+            isolation_level=None,
+            cached_statements=SENTENCIAS_POR_CONEXION * 4
+        )
+        conn.row_factory = _dict_factory
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        self._crear_esquema(conn)
+        return conn
+
+    def _crear_esquema(self, conn):
+        with self._schema_lock:
+            if self._schema_listo:
+                return
+            existe = conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table' AND name = 'productos'"
+            ).fetchone()
+            if not existe:
+                with open(self.schema, encoding='utf-8') as f:
+                    conn.executescript(f.read())
+            self._schema_listo = True
+
+    def cursor(self, conn):
+        return _SQLiteCursor(conn)
+
+    def cursor_streaming(self, conn):
+        # sqlite3 ya avanza por el resultado paso a paso
+        return _SQLiteCursor(conn, tuplas=True)
+
+    def ping(self, conn):
+        try:
+            conn.execute("SELECT 1")
+            return True
+        except sqlite3.Error:
+            return False
+
+    def existe_indice(self, cursor, tabla, nombre):
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND tbl_name = %s AND name = %s",
+            (tabla, nombre)
+        )
+        return bool(cursor.fetchall())
+
+    def borrar_indice(self, tabla, nombre):
+        return f"DROP INDEX IF EXISTS {nombre}"
+
+    def existe_columna(self, cursor, tabla, columna):
+        cursor.execute("SELECT 1 FROM pragma_table_info(%s) WHERE name = %s", (tabla, columna))
+        return bool(cursor.fetchall())
+
+    def existe_disparador(self, cursor, nombre):
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'trigger' AND name = %s", (nombre,))
+        return bool(cursor.fetchall())
+
+    _ESCANEO = re.compile(r'^SCAN (?:TABLE )?(?!CONSTANT ROW)(\w+)')
+
+    def plan(self, cursor, query, params=()):
+        # "SCAN t" sin índice lee la tabla completa; "SCAN t USING INDEX"
+        # recorre un índice en orden y "SEARCH" busca por índice
+        cursor.execute(f"EXPLAIN QUERY PLAN {query}", params)
+        resultado = []
+        for fila in cursor.fetchall():
+            detalle = fila['detail']
+            escaneo = self._ESCANEO.match(detalle)
+            resultado.append((
+                escaneo.group(1) if escaneo else "",
+                detalle,
+                bool(escaneo) and "USING" not in detalle
+            ))
+        return resultado
+
+    def begin(self, conn):
+        # IMMEDIATE toma el bloqueo de escritura al inicio, el equivalente
+        # más cercano a SELECT ... FOR UPDATE en SQLite
+        conn.execute("BEGIN IMMEDIATE")
+
+
+def backend_desde_entorno():
+    if os.environ.get('SEARS_DB_BACKEND', 'mysql').lower() == 'sqlite':
+        return SQLiteBackend(os.environ.get('SEARS_SQLITE_PATH', SQLITE_PATH))
+    return MySQLBackend()
+
+
+# ------------------------- POOL DE CONEXIONES -------------------------
+class ConnectionPool:
+    def __init__(self, backend, size=5, timeout=5.0, ping_interval=30.0):
+        self.backend = backend
+        self.size = size
+        self.timeout = timeout
+        self.ping_interval = ping_interval
+        self._idle = deque()  # (conexión, último uso)
+        self._creadas = 0
+        self._cerrado = False
+        self._cond = threading.Condition()
+        self.esperas = 0
+        self.tiempo_espera = 0.0
+        self.timeouts = 0
+        self.reconexiones = 0
+
+    def acquire(self, timeout=None):
+        limite = time.monotonic() + (self.timeout if timeout is None else timeout)
+        inicio = None
+        with self._cond:
+            while True:
+                if self._cerrado:
+                    raise Error("El pool de conexiones está cerrado")
+                if self._idle:
+                    conn, ultimo_uso = self._idle.pop()
+                    break
+                if self._creadas < self.size:
+                    self._creadas += 1
+                    conn, ultimo_uso = None, None
+                    break
+                restante = limite - time.monotonic()
+                if restante <= 0:
+                    self.timeouts += 1
+                    if inicio is not None:
+                        self.tiempo_espera += time.monotonic() - inicio
+                    raise PoolTimeoutError(
+                        f"No hay conexiones libres tras esperar {self.timeout:.1f}s"
+                    )
+                if inicio is None:
+                    inicio = time.monotonic()
+                    self.esperas += 1
+                self._cond.wait(restante)
+            if inicio is not None:
+                self.tiempo_espera += time.monotonic() - inicio
+
+        if conn is None:
+            return self._conectar()
+
+        # Verificar conexiones ociosas (p. ej. tras reiniciar el servidor)
+        if time.monotonic() - ultimo_uso > self.ping_interval and not self.backend.ping(conn):
+            self.backend.close(conn)
+            self.reconexiones += 1
+            return self._conectar()
+        return conn
+
+    def _conectar(self):
+        try:
+            return self.backend.connect()
+        except Exception:
+            with self._cond:
+                self._creadas -= 1
+                self._cond.notify()
+            raise
+
+    def release(self, conn, broken=False):
+        with self._cond:
+            if broken or self._cerrado:
+                self._creadas -= 1
+            else:
+                self._idle.append((conn, time.monotonic()))
+                conn = None
+            self._cond.notify()
+        if conn is not None:
+            self.backend.close(conn)
+
+    @contextmanager
+    def connection(self, timeout=None):
+        conn = self.acquire(timeout)
+        broken = False
+        try:
+            yield conn
+        except DB_ERRORS as e:
+            broken = self.backend.is_disconnect(e)
+            raise
+        finally:
+            self.release(conn, broken)
+
+    def stats(self):
+        with self._cond:
+            return {
+                'tamano': self.size,
+                'creadas': self._creadas,
+                'libres': len(self._idle),
+                'esperas': self.esperas,
+                'tiempo_espera': self.tiempo_espera,
+                'timeouts': self.timeouts,
+                'reconexiones': self.reconexiones
+            }
+
+    def close(self):
+        with self._cond:
+            self._cerrado = True
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+            self._creadas -= len(idle)
+            self._cond.notify_all()
+        for conn in idle:
+            self.backend.close(conn)
+
+
+# ------------------------- DATABASE MANAGER -------------------------
+class DatabaseManager:
+    def __init__(self, backend=None, pool_size=5, pool_timeout=5.0, instrumentacion=None, validar=True):
+        # validar=False: arranca aunque el servidor no responda (la caja
+        # trabaja sin conexión, ver diario_ventas.py) y el pool reconecta después
+        self.backend = backend or backend_desde_entorno()
+        self.pool = ConnectionPool(self.backend, size=pool_size, timeout=pool_timeout)
+        # Tiempos, filas y acción de la interfaz por consulta (ver instrumentacion.py)
+        self.instrumentacion = instrumentacion or Instrumentacion()
+        self.conectado_al_iniciar = False
+        try:
+            # Validar la conexión al arrancar
+            conn = self.pool.acquire()
+            self.pool.release(conn)
+            self.conectado_al_iniciar = True
+            print(f"¡Conexión exitosa a {self.backend.nombre}!")
+        except DB_ERRORS as e:
+            print(f"Error al conectar a la base de datos: {e}")
+            if validar:
+                raise
+
+    def execute_query(self, query, params=None, fetch=False, insert=False):
+        # fetch=True devuelve las filas; insert=True devuelve la llave generada
+        # (lastrowid del mismo cursor que ejecutó el INSERT); si no, rowcount
+        for intento in range(2):
+            try:
+                conn = self.pool.acquire()
+            except DB_ERRORS as e:
+                print(f"Error al obtener conexión: {e}")
+                return None
+
+            inicio = time.perf_counter()
+            preparado = None
+            try:
+                preparado = self.backend.cursor_preparado(conn, query)
+                cursor = preparado or self.backend.cursor(conn)
+                cursor.execute(query, params or ())
+
+                if fetch:
+                    result = cursor.fetchall()
+                else:
+                    conn.commit()
+                    result = cursor.lastrowid if insert else cursor.rowcount
+
+                if preparado is None:
+                    cursor.close()
+                self.pool.release(conn)
+                self.instrumentacion.registrar(
+                    query, time.perf_counter() - inicio, len(result) if fetch else 0
+                )
+                return result
+            except DB_ERRORS as e:
+                self.instrumentacion.registrar(query, time.perf_counter() - inicio, error=True)
+                if preparado is not None:
+                    self.backend.sentencias.descartar(conn, query)
+                perdida = self.backend.is_disconnect(e)
+                if not perdida:
+                    try:
+                        conn.rollback()
+                    except DB_ERRORS:
+                        perdida = True
+                self.pool.release(conn, broken=perdida)
+
+                # Una lectura se puede repetir con otra conexión sin riesgo
+                if perdida and fetch and intento == 0:
+                    continue
+                print(f"Error en la consulta: {e}")
+                return None
+
+    @contextmanager
+    def transaction(self):
+        # Ejecuta varias sentencias en una sola transacción con la misma
+        # conexión: commit al salir del bloque, rollback si hay excepción
+        conn = self.pool.acquire()
+        broken = False
+        cursor = None
+        try:
+            cursor = self.backend.cursor(conn)
+            self.backend.begin(conn)
+            yield CursorInstrumentado(_CursorTransaccion(cursor, conn, self.backend), self.instrumentacion)
+            conn.commit()
+        except BaseException as e:
+            broken = isinstance(e, DB_ERRORS) and self.backend.is_disconnect(e)
+            if not broken:
+                try:
+                    conn.rollback()
+                except DB_ERRORS:
+                    broken = True
+            raise
+        finally:
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except DB_ERRORS:
+                    broken = True
+            self.pool.release(conn, broken)
+
+    @contextmanager
+    def streaming(self, query, params=None, tam_lote=LOTE_STREAMING):
+        # Para resultados que no caben en memoria (p. ej. exportaciones):
+        #     with db.streaming(query, params) as (columnas, lotes):
+        #         for filas in lotes: ...
+        # Las filas son tuplas y llegan en lotes de tam_lote. La conexión
+        # queda ocupada hasta salir del bloque.
+        conn = self.pool.acquire()
+        cursor = None
+        broken = False
+        error = False
+        terminado = False
+        filas = 0
+        inicio = time.perf_counter()
+
+        def lotes():
+            nonlocal filas, terminado
+            while True:
+                lote = cursor.fetchmany(tam_lote)
+                if not lote:
+                    terminado = True
+                    return
+                filas += len(lote)
+                yield lote
+
+        try:
+            cursor = self.backend.cursor_streaming(conn)
+            cursor.execute(query, params or ())
+            yield [columna[0] for columna in cursor.description], lotes()
+        except Exception as e:
+            error = True
+            broken = isinstance(e, DB_ERRORS) and self.backend.is_disconnect(e)
+            raise
+        finally:
+            self.instrumentacion.registrar(query, time.perf_counter() - inicio, filas, error=error)
+            # Un cursor sin buffer que no se leyó completo deja filas
+            # pendientes en la conexión: no se regresa al pool
+            if not terminado:
+                broken = True
+            if cursor is not None:
+                try:
+                    cursor.close()
+                except DB_ERRORS:
+                    broken = True
+            self.pool.release(conn, broken)
+
+    def stats_sentencias(self):
+        sentencias = self.backend.sentencias
+        return sentencias.stats() if sentencias is not None else {}
+
+    def close(self):
+        self.pool.close()
+
+
+class _CursorTransaccion:
+    # Cursor de una transacción que usa las sentencias preparadas de la
+    # conexión cuando las hay. fetch*, lastrowid y rowcount se leen del
+    # último cursor que ejecutó. executemany se queda en el cursor normal:
+    # MySQL lo convierte en un solo INSERT de varias filas, que es mejor que
+    # una ejecución preparada por fila.
+    def __init__(self, cursor, conn, backend):
+        self._cursor = cursor
+        self._conn = conn
+        self._backend = backend
+        self._actual = cursor
+
+    def execute(self, query, params=()):
+        preparado = self._backend.cursor_preparado(self._conn, query)
+        self._actual = preparado or self._cursor
+        try:
+            return self._actual.execute(query, params)
+        except DB_ERRORS:
+            if preparado is not None:
+                self._backend.sentencias.descartar(self._conn, query)
+            raise
+
+    def executemany(self, query, seq_params):
+        self._actual = self._cursor
+        return self._cursor.executemany(query, seq_params)
+
+    def close(self):
+        self._cursor.close()
+
+    def __getattr__(self, nombre):
+        return getattr(self._actual, nombre)
@@ -8,7 +8,11 @@ CREATE TABLE departamentos (
     id_departamento INT AUTO_INCREMENT PRIMARY KEY,
     nombre VARCHAR(100) NOT NULL,
     ubicacion VARCHAR(255),
-    encargado VARCHAR(100)
+    encargado VARCHAR(100),
+    version INT NOT NULL DEFAULT 0, -- Control de concurrencia optimista
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_departamentos_nombre (nombre),
+    INDEX idx_departamentos_actualizacion (fecha_actualizacion)
 );
 
 -- 3️⃣ Tabla: `proveedores`
@@ -18,7 +22,11 @@ CREATE TABLE proveedores (
     contacto VARCHAR(100),
     telefono VARCHAR(20),
     email VARCHAR(100),
-    direccion TEXT
+    direccion TEXT,
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_proveedores_nombre (nombre),
+    INDEX idx_proveedores_actualizacion (fecha_actualizacion)
 );
 
 -- 4️⃣ Tabla: `productos` con soporte para códigos de barras
@@ -33,7 +41,11 @@ CREATE TABLE productos (
     id_departamento INT,
     id_proveedor INT,
     fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 0,
     fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_productos_nombre (nombre), -- Paginación y búsqueda por nombre
+    INDEX idx_productos_actualizacion (fecha_actualizacion), -- Refresco incremental
+    INDEX idx_productos_stock (stock, nombre), -- Productos con poco stock
     FOREIGN KEY (id_departamento) REFERENCES departamentos(id_departamento),
     FOREIGN KEY (id_proveedor) REFERENCES proveedores(id_proveedor)
 );
@@ -48,6 +60,11 @@ CREATE TABLE empleados (
     usuario VARCHAR(50) UNIQUE, -- Para sistema de login
     contrasena VARCHAR(255), -- Contraseña encriptada
     nivel_acceso INT DEFAULT 1, -- 1=basico, 2=admin, etc.
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_empleados_nombre (nombre),
+    INDEX idx_empleados_actualizacion (fecha_actualizacion),
+    INDEX idx_empleados_nivel_acceso (nivel_acceso), -- Combo de cajeros
     FOREIGN KEY (id_departamento) REFERENCES departamentos(id_departamento)
 );
 
@@ -59,7 +76,11 @@ CREATE TABLE clientes (
     telefono VARCHAR(20),
     direccion TEXT,
     rfc VARCHAR(20),
-    puntos_acumulados INT DEFAULT 0 -- Para programas de lealtad
+    puntos_acumulados INT DEFAULT 0, -- Para programas de lealtad
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+    INDEX idx_clientes_nombre (nombre),
+    INDEX idx_clientes_actualizacion (fecha_actualizacion)
 );
 
 -- 7️⃣ Tabla: `ventas` (Cabecera de la venta)
@@ -74,6 +95,8 @@ CREATE TABLE ventas (
     total DECIMAL(10,2) NOT NULL,
     estado ENUM('pendiente', 'completada', 'cancelada') DEFAULT 'completada',
     metodo_pago ENUM('efectivo', 'tarjeta', 'transferencia', 'mixto'),
+    INDEX idx_ventas_fecha (fecha), -- Reportes por rango de fechas
+    INDEX idx_ventas_empleado_fecha (id_empleado, fecha), -- Ventas de un cajero
     FOREIGN KEY (id_empleado) REFERENCES empleados(id_empleado),
     FOREIGN KEY (id_cliente) REFERENCES clientes(id_cliente)
 );
@@ -86,6 +109,8 @@ CREATE TABLE detalle_ventas (
     cantidad INT NOT NULL CHECK (cantidad > 0),
     precio_unitario DECIMAL(10,2) NOT NULL, -- Precio en el momento de la venta
     importe DECIMAL(10,2) NOT NULL,
+    -- Cubre la cancelación y los totales por venta sin leer la tabla
+    INDEX idx_detalle_ventas_venta_producto (id_venta, id_producto, cantidad, importe),
     FOREIGN KEY (id_venta) REFERENCES ventas(id_venta),
     FOREIGN KEY (id_producto) REFERENCES productos(id_producto)
 );
@@ -99,10 +124,152 @@ CREATE TABLE inventario (
     fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
     id_usuario INT, -- Empleado que realizó el movimiento
     motivo TEXT,
+    INDEX idx_inventario_producto_fecha (id_producto, fecha),
+    INDEX idx_inventario_fecha (fecha), -- Archivo por fecha
     FOREIGN KEY (id_producto) REFERENCES productos(id_producto),
     FOREIGN KEY (id_usuario) REFERENCES empleados(id_empleado)
 );
 
+-- Tabla: `eliminaciones` (registros borrados, para refrescar tablas de forma incremental)
+CREATE TABLE eliminaciones (
+    id_eliminacion INT AUTO_INCREMENT PRIMARY KEY,
+    tabla VARCHAR(30) NOT NULL,
+    id_registro INT NOT NULL,
+    fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_eliminaciones_tabla (tabla, id_eliminacion)
+);
+
+-- Totales de ventas por día (resumenes.py). Se actualizan en la misma
+-- transacción que registra o cancela cada venta; `python resumenes.py
+-- reconstruir` los recalcula desde ventas y detalle_ventas.
+CREATE TABLE resumen_ventas_dia (
+    fecha DATE NOT NULL PRIMARY KEY,
+    ventas INT NOT NULL DEFAULT 0,
+    subtotal DECIMAL(14,2) NOT NULL DEFAULT 0,
+    iva DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE resumen_empleados_dia (
+    fecha DATE NOT NULL,
+    id_empleado INT NOT NULL,
+    ventas INT NOT NULL DEFAULT 0,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_empleado)
+);
+
+CREATE TABLE resumen_productos_dia (
+    fecha DATE NOT NULL,
+    id_producto INT NOT NULL,
+    unidades INT NOT NULL DEFAULT 0,
+    importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_producto)
+);
+
+-- id_departamento = 0 para productos sin departamento
+CREATE TABLE resumen_departamentos_dia (
+    fecha DATE NOT NULL,
+    id_departamento INT NOT NULL,
+    unidades INT NOT NULL DEFAULT 0,
+    importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_departamento)
+);
+
+-- Ventas, detalle e inventario de periodos cerrados (archivo.py). Sin
+-- llaves foráneas: InnoDB no particiona tablas que las tienen, así que las
+-- tablas vivas se mantienen chicas moviendo aquí lo viejo, y estas se
+-- particionan por año. La llave primaria incluye fecha para poder particionar.
+CREATE TABLE ventas_historico (
+    id_venta INT NOT NULL,
+    folio VARCHAR(20),
+    fecha DATETIME NOT NULL,
+    id_empleado INT NOT NULL,
+    id_cliente INT,
+    subtotal DECIMAL(10,2) NOT NULL,
+    iva DECIMAL(10,2) NOT NULL,
+    total DECIMAL(10,2) NOT NULL,
+    estado ENUM('pendiente', 'completada', 'cancelada'),
+    metodo_pago ENUM('efectivo', 'tarjeta', 'transferencia', 'mixto'),
+    PRIMARY KEY (id_venta, fecha),
+    INDEX idx_ventas_historico_fecha (fecha),
+    INDEX idx_ventas_historico_empleado_fecha (id_empleado, fecha)
+) ROW_FORMAT=COMPRESSED
+PARTITION BY RANGE (YEAR(fecha)) (
+    PARTITION p_inicial VALUES LESS THAN (2000),
+    PARTITION p_max VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE detalle_ventas_historico (
+    id_detalle INT NOT NULL,
+    id_venta INT NOT NULL,
+    id_producto INT NOT NULL,
+    cantidad INT NOT NULL,
+    precio_unitario DECIMAL(10,2) NOT NULL,
+    importe DECIMAL(10,2) NOT NULL,
+    fecha DATETIME NOT NULL,
+    PRIMARY KEY (id_detalle, fecha),
+    INDEX idx_detalle_historico_venta (id_venta, id_producto, cantidad, importe),
+    INDEX idx_detalle_historico_producto (id_producto)
+) ROW_FORMAT=COMPRESSED
+PARTITION BY RANGE (YEAR(fecha)) (
+    PARTITION p_inicial VALUES LESS THAN (2000),
+    PARTITION p_max VALUES LESS THAN MAXVALUE
+);
+
+CREATE TABLE inventario_historico (
+    id_movimiento INT NOT NULL,
+    id_producto INT NOT NULL,
+    tipo_movimiento ENUM('entrada', 'salida', 'ajuste'),
+    cantidad INT NOT NULL,
+    fecha DATETIME NOT NULL,
+    id_usuario INT,
+    motivo TEXT,
+    PRIMARY KEY (id_movimiento, fecha),
+    INDEX idx_inventario_historico_producto_fecha (id_producto, fecha)
+) ROW_FORMAT=COMPRESSED
+PARTITION BY RANGE (YEAR(fecha)) (
+    PARTITION p_inicial VALUES LESS THAN (2000),
+    PARTITION p_max VALUES LESS THAN MAXVALUE
+);
+
+-- Marca que solo ve la transacción que archiva (ver after_venta_delete)
+CREATE TABLE archivo_en_curso (
+    id INT NOT NULL PRIMARY KEY
+);
+
+-- Contador de folios por terminal (folios.py)
+CREATE TABLE folios (
+    terminal VARCHAR(4) NOT NULL PRIMARY KEY,
+    ultimo BIGINT NOT NULL DEFAULT 0
+);
+
+-- Stock apartado por el carrito de cada caja (reservas.py)
+CREATE TABLE reservas_stock (
+    caja VARCHAR(40) NOT NULL,
+    id_producto INT NOT NULL,
+    cantidad INT NOT NULL,
+    vence DATETIME NOT NULL,
+    PRIMARY KEY (caja, id_producto),
+    INDEX idx_reservas_producto_vence (id_producto, vence) -- Apartado por producto
+);
+
+-- Migraciones aplicadas (migraciones.py). Este script ya incluye todas.
+CREATE TABLE schema_version (
+    version INT NOT NULL PRIMARY KEY,
+    descripcion VARCHAR(200) NOT NULL,
+    aplicada DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_version (version, descripcion) VALUES
+(1, 'Totales por día e índice de ventas por fecha'),
+(2, 'Índices para las consultas frecuentes'),
+(3, 'Tablas históricas de ventas e inventario'),
+(4, 'Contador de folios por terminal'),
+(5, 'Versión de fila en los catálogos'),
+(6, 'Apartados de stock por caja'),
+(7, 'Fecha de actualización y registro de borrados en los catálogos'),
+(8, 'Índice de empleados por nivel de acceso');
+
 -- 🔟 Crear cliente general por defecto
 INSERT INTO clientes (id_cliente, nombre, correo, telefono) 
 VALUES (1, 'CLIENTE GENERAL', 'general@example.com', '0000000000');
@@ -110,7 +277,10 @@ VALUES (1, 'CLIENTE GENERAL', 'general@example.com', '0000000000');
 -- 🔟1️⃣ Crear triggers para manejo de inventario
 DELIMITER //
 
--- Trigger para actualizar stock al vender
+-- Trigger para actualizar stock al vender.
+-- El stock de las ventas es responsabilidad de este trigger: la aplicación
+-- no lo descuenta (ventas.MANEJO_STOCK = 'trigger'). Si se elimina el trigger,
+-- cambiar MANEJO_STOCK a 'aplicacion'.
 CREATE TRIGGER after_venta_insert
 AFTER INSERT ON detalle_ventas
 FOR EACH ROW
@@ -126,22 +296,45 @@ BEGIN
            CONCAT('Venta #', NEW.id_venta));
 END//
 
--- Trigger para revertir stock si se elimina una venta
+-- Trigger para revertir stock si se elimina una venta (no al archivarla)
 CREATE TRIGGER after_venta_delete
 AFTER DELETE ON detalle_ventas
 FOR EACH ROW
 BEGIN
-    -- Sumar al inventario
-    UPDATE productos SET stock = stock + OLD.cantidad 
-    WHERE id_producto = OLD.id_producto;
-    
-    -- Registrar movimiento de inventario
-    INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
-    VALUES (OLD.id_producto, 'entrada', OLD.cantidad, 
-           (SELECT id_empleado FROM ventas WHERE id_venta = OLD.id_venta),
-           CONCAT('Cancelación venta #', OLD.id_venta));
+    IF NOT EXISTS (SELECT 1 FROM archivo_en_curso) THEN
+        -- Sumar al inventario
+        UPDATE productos SET stock = stock + OLD.cantidad 
+        WHERE id_producto = OLD.id_producto;
+        
+        -- Registrar movimiento de inventario
+        INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
+        VALUES (OLD.id_producto, 'entrada', OLD.cantidad, 
+               (SELECT id_empleado FROM ventas WHERE id_venta = OLD.id_venta),
+               CONCAT('Cancelación venta #', OLD.id_venta));
+    END IF;
 END//
 
+-- Triggers para registrar borrados en `eliminaciones`
+CREATE TRIGGER departamentos_eliminacion AFTER DELETE ON departamentos
+FOR EACH ROW
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('departamentos', OLD.id_departamento)//
+
+CREATE TRIGGER proveedores_eliminacion AFTER DELETE ON proveedores
+FOR EACH ROW
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('proveedores', OLD.id_proveedor)//
+
+CREATE TRIGGER productos_eliminacion AFTER DELETE ON productos
+FOR EACH ROW
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('productos', OLD.id_producto)//
+
+CREATE TRIGGER empleados_eliminacion AFTER DELETE ON empleados
+FOR EACH ROW
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('empleados', OLD.id_empleado)//
+
+CREATE TRIGGER clientes_eliminacion AFTER DELETE ON clientes
+FOR EACH ROW
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('clientes', OLD.id_cliente)//
+
 DELIMITER ;
 
 -- 🔟2️⃣ Crear vista para reporte de ventas
@@ -164,6 +357,19 @@ JOIN clientes c ON v.id_cliente = c.id_cliente
 LEFT JOIN detalle_ventas dv ON v.id_venta = dv.id_venta
 GROUP BY v.id_venta;
 
+-- Historia completa: tablas vivas más las archivadas
+CREATE VIEW ventas_con_historico AS
+    SELECT id_venta, folio, fecha, id_empleado, id_cliente, subtotal, iva, total, estado, metodo_pago FROM ventas
+    UNION ALL SELECT id_venta, folio, fecha, id_empleado, id_cliente, subtotal, iva, total, estado, metodo_pago FROM ventas_historico;
+
+CREATE VIEW detalle_ventas_con_historico AS
+    SELECT id_detalle, id_venta, id_producto, cantidad, precio_unitario, importe FROM detalle_ventas
+    UNION ALL SELECT id_detalle, id_venta, id_producto, cantidad, precio_unitario, importe FROM detalle_ventas_historico;
+
+CREATE VIEW inventario_con_historico AS
+    SELECT id_movimiento, id_producto, tipo_movimiento, cantidad, fecha, id_usuario, motivo FROM inventario
+    UNION ALL SELECT id_movimiento, id_producto, tipo_movimiento, cantidad, fecha, id_usuario, motivo FROM inventario_historico;
+
 
 INSERT INTO departamentos (nombre, ubicacion, encargado) VALUES
 ('Electrónica', 'Planta Baja - Zona A', 'Carlos Mendoza'),
@@ -0,0 +1,453 @@
+-- Esquema equivalente a db23270652.sql para SQLite.
+-- Lo usa SQLiteBackend (SEARS_DB_BACKEND=sqlite) en pruebas de carga locales
+-- sin servidor MySQL. Mantener sincronizado con db23270652.sql.
+
+CREATE TABLE departamentos (
+    id_departamento INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(100) NOT NULL,
+    ubicacion VARCHAR(255),
+    encargado VARCHAR(100),
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE proveedores (
+    id_proveedor INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(100) NOT NULL,
+    contacto VARCHAR(100),
+    telefono VARCHAR(20),
+    email VARCHAR(100),
+    direccion TEXT,
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE productos (
+    id_producto INTEGER PRIMARY KEY AUTOINCREMENT,
+    codigo_barras VARCHAR(50) UNIQUE,
+    nombre VARCHAR(100) NOT NULL,
+    descripcion TEXT,
+    precio_costo DECIMAL(10,2) NOT NULL,
+    precio_publico DECIMAL(10,2) NOT NULL,
+    stock INT NOT NULL DEFAULT 0,
+    id_departamento INT REFERENCES departamentos(id_departamento),
+    id_proveedor INT REFERENCES proveedores(id_proveedor),
+    fecha_creacion DATETIME DEFAULT CURRENT_TIMESTAMP,
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE empleados (
+    id_empleado INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(100) NOT NULL,
+    domicilio VARCHAR(255),
+    puesto VARCHAR(100),
+    id_departamento INT REFERENCES departamentos(id_departamento),
+    usuario VARCHAR(50) UNIQUE,
+    contrasena VARCHAR(255),
+    nivel_acceso INT DEFAULT 1,
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE clientes (
+    id_cliente INTEGER PRIMARY KEY AUTOINCREMENT,
+    nombre VARCHAR(100) NOT NULL,
+    correo VARCHAR(100) UNIQUE,
+    telefono VARCHAR(20),
+    direccion TEXT,
+    rfc VARCHAR(20),
+    puntos_acumulados INT DEFAULT 0,
+    version INT NOT NULL DEFAULT 0,
+    fecha_actualizacion DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE ventas (
+    id_venta INTEGER PRIMARY KEY AUTOINCREMENT,
+    folio VARCHAR(20) UNIQUE,
+    fecha DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    id_empleado INT NOT NULL REFERENCES empleados(id_empleado),
+    id_cliente INT DEFAULT 1 REFERENCES clientes(id_cliente),
+    subtotal DECIMAL(10,2) NOT NULL,
+    iva DECIMAL(10,2) NOT NULL,
+    total DECIMAL(10,2) NOT NULL,
+    estado TEXT DEFAULT 'completada' CHECK (estado IN ('pendiente', 'completada', 'cancelada')),
+    metodo_pago TEXT CHECK (metodo_pago IN ('efectivo', 'tarjeta', 'transferencia', 'mixto'))
+);
+
+CREATE TABLE detalle_ventas (
+    id_detalle INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_venta INT NOT NULL REFERENCES ventas(id_venta),
+    id_producto INT NOT NULL REFERENCES productos(id_producto),
+    cantidad INT NOT NULL CHECK (cantidad > 0),
+    precio_unitario DECIMAL(10,2) NOT NULL,
+    importe DECIMAL(10,2) NOT NULL
+);
+
+CREATE TABLE inventario (
+    id_movimiento INTEGER PRIMARY KEY AUTOINCREMENT,
+    id_producto INT NOT NULL REFERENCES productos(id_producto),
+    tipo_movimiento TEXT CHECK (tipo_movimiento IN ('entrada', 'salida', 'ajuste')),
+    cantidad INT NOT NULL,
+    fecha DATETIME DEFAULT CURRENT_TIMESTAMP,
+    id_usuario INT REFERENCES empleados(id_empleado),
+    motivo TEXT
+);
+
+CREATE TABLE eliminaciones (
+    id_eliminacion INTEGER PRIMARY KEY AUTOINCREMENT,
+    tabla VARCHAR(30) NOT NULL,
+    id_registro INT NOT NULL,
+    fecha DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE INDEX idx_eliminaciones_tabla ON eliminaciones (tabla, id_eliminacion);
+
+-- MySQL crea un índice por cada llave foránea; SQLite no
+CREATE INDEX idx_productos_departamento ON productos (id_departamento);
+CREATE INDEX idx_productos_proveedor ON productos (id_proveedor);
+CREATE INDEX idx_empleados_departamento ON empleados (id_departamento);
+CREATE INDEX idx_ventas_cliente ON ventas (id_cliente);
+CREATE INDEX idx_detalle_ventas_producto ON detalle_ventas (id_producto);
+
+-- Reportes por rango de fechas
+CREATE INDEX idx_ventas_fecha ON ventas (fecha);
+
+-- Consultas frecuentes (migración 2 de migraciones.py)
+CREATE INDEX idx_departamentos_nombre ON departamentos (nombre);
+CREATE INDEX idx_departamentos_actualizacion ON departamentos (fecha_actualizacion);
+CREATE INDEX idx_proveedores_nombre ON proveedores (nombre);
+CREATE INDEX idx_proveedores_actualizacion ON proveedores (fecha_actualizacion);
+CREATE INDEX idx_productos_nombre ON productos (nombre);
+CREATE INDEX idx_productos_actualizacion ON productos (fecha_actualizacion);
+CREATE INDEX idx_productos_stock ON productos (stock, nombre);
+CREATE INDEX idx_empleados_nombre ON empleados (nombre);
+CREATE INDEX idx_empleados_actualizacion ON empleados (fecha_actualizacion);
+CREATE INDEX idx_empleados_nivel_acceso ON empleados (nivel_acceso);
+CREATE INDEX idx_clientes_nombre ON clientes (nombre);
+CREATE INDEX idx_clientes_actualizacion ON clientes (fecha_actualizacion);
+CREATE INDEX idx_ventas_empleado_fecha ON ventas (id_empleado, fecha);
+CREATE INDEX idx_detalle_ventas_venta_producto ON detalle_ventas (id_venta, id_producto, cantidad, importe);
+CREATE INDEX idx_inventario_producto_fecha ON inventario (id_producto, fecha);
+CREATE INDEX idx_inventario_fecha ON inventario (fecha);
+
+-- Totales de ventas por día (resumenes.py). Se actualizan en la misma
+-- transacción que registra o cancela cada venta; `python resumenes.py
+-- reconstruir` los recalcula desde ventas y detalle_ventas.
+CREATE TABLE resumen_ventas_dia (
+    fecha DATE NOT NULL PRIMARY KEY,
+    ventas INT NOT NULL DEFAULT 0,
+    subtotal DECIMAL(14,2) NOT NULL DEFAULT 0,
+    iva DECIMAL(14,2) NOT NULL DEFAULT 0,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0
+);
+
+CREATE TABLE resumen_empleados_dia (
+    fecha DATE NOT NULL,
+    id_empleado INT NOT NULL,
+    ventas INT NOT NULL DEFAULT 0,
+    total DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_empleado)
+);
+
+CREATE TABLE resumen_productos_dia (
+    fecha DATE NOT NULL,
+    id_producto INT NOT NULL,
+    unidades INT NOT NULL DEFAULT 0,
+    importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_producto)
+);
+
+-- id_departamento = 0 para productos sin departamento
+CREATE TABLE resumen_departamentos_dia (
+    fecha DATE NOT NULL,
+    id_departamento INT NOT NULL,
+    unidades INT NOT NULL DEFAULT 0,
+    importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_departamento)
+);
+
+-- Ventas, detalle e inventario de periodos cerrados (archivo.py)
+CREATE TABLE ventas_historico (
+    id_venta INT NOT NULL PRIMARY KEY,
+    folio VARCHAR(20),
+    fecha DATETIME NOT NULL,
+    id_empleado INT NOT NULL,
+    id_cliente INT,
+    subtotal DECIMAL(10,2) NOT NULL,
+    iva DECIMAL(10,2) NOT NULL,
+    total DECIMAL(10,2) NOT NULL,
+    estado TEXT,
+    metodo_pago TEXT
+);
+CREATE INDEX idx_ventas_historico_fecha ON ventas_historico (fecha);
+CREATE INDEX idx_ventas_historico_empleado_fecha ON ventas_historico (id_empleado, fecha);
+
+CREATE TABLE detalle_ventas_historico (
+    id_detalle INT NOT NULL PRIMARY KEY,
+    id_venta INT NOT NULL,
+    id_producto INT NOT NULL,
+    cantidad INT NOT NULL,
+    precio_unitario DECIMAL(10,2) NOT NULL,
+    importe DECIMAL(10,2) NOT NULL,
+    fecha DATETIME NOT NULL
+);
+CREATE INDEX idx_detalle_historico_venta ON detalle_ventas_historico (id_venta, id_producto, cantidad, importe);
+CREATE INDEX idx_detalle_historico_producto ON detalle_ventas_historico (id_producto);
+
+CREATE TABLE inventario_historico (
+    id_movimiento INT NOT NULL PRIMARY KEY,
+    id_producto INT NOT NULL,
+    tipo_movimiento TEXT,
+    cantidad INT NOT NULL,
+    fecha DATETIME NOT NULL,
+    id_usuario INT,
+    motivo TEXT
+);
+CREATE INDEX idx_inventario_historico_producto_fecha ON inventario_historico (id_producto, fecha);
+
+-- Marca que solo ve la transacción que archiva (ver after_venta_delete)
+CREATE TABLE archivo_en_curso (
+    id INT NOT NULL PRIMARY KEY
+);
+
+-- Contador de folios por terminal (folios.py)
+CREATE TABLE folios (
+    terminal VARCHAR(4) NOT NULL PRIMARY KEY,
+    ultimo BIGINT NOT NULL DEFAULT 0
+);
+
+-- Stock apartado por el carrito de cada caja (reservas.py)
+CREATE TABLE reservas_stock (
+    caja VARCHAR(40) NOT NULL,
+    id_producto INT NOT NULL,
+    cantidad INT NOT NULL,
+    vence DATETIME NOT NULL,
+    PRIMARY KEY (caja, id_producto)
+);
+
+CREATE INDEX idx_reservas_producto_vence ON reservas_stock (id_producto, vence);
+
+-- Migraciones aplicadas (migraciones.py). Este script ya incluye todas.
+CREATE TABLE schema_version (
+    version INT NOT NULL PRIMARY KEY,
+    descripcion VARCHAR(200) NOT NULL,
+    aplicada DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO schema_version (version, descripcion) VALUES
+(1, 'Totales por día e índice de ventas por fecha'),
+(2, 'Índices para las consultas frecuentes'),
+(3, 'Tablas históricas de ventas e inventario'),
+(4, 'Contador de folios por terminal'),
+(5, 'Versión de fila en los catálogos'),
+(6, 'Apartados de stock por caja'),
+(7, 'Fecha de actualización y registro de borrados en los catálogos'),
+(8, 'Índice de empleados por nivel de acceso');
+
+INSERT INTO clientes (id_cliente, nombre, correo, telefono)
+VALUES (1, 'CLIENTE GENERAL', 'general@example.com', '0000000000');
+
+-- Equivalente a ON UPDATE CURRENT_TIMESTAMP
+CREATE TRIGGER departamentos_fecha_actualizacion
+AFTER UPDATE ON departamentos
+FOR EACH ROW WHEN NEW.fecha_actualizacion = OLD.fecha_actualizacion
+BEGIN
+    UPDATE departamentos SET fecha_actualizacion = CURRENT_TIMESTAMP
+    WHERE id_departamento = NEW.id_departamento;
+END;
+
+CREATE TRIGGER proveedores_fecha_actualizacion
+AFTER UPDATE ON proveedores
+FOR EACH ROW WHEN NEW.fecha_actualizacion = OLD.fecha_actualizacion
+BEGIN
+    UPDATE proveedores SET fecha_actualizacion = CURRENT_TIMESTAMP
+    WHERE id_proveedor = NEW.id_proveedor;
+END;
+
+CREATE TRIGGER productos_fecha_actualizacion
+AFTER UPDATE ON productos
+FOR EACH ROW WHEN NEW.fecha_actualizacion = OLD.fecha_actualizacion
+BEGIN
+    UPDATE productos SET fecha_actualizacion = CURRENT_TIMESTAMP
+    WHERE id_producto = NEW.id_producto;
+END;
+
+CREATE TRIGGER empleados_fecha_actualizacion
+AFTER UPDATE ON empleados
+FOR EACH ROW WHEN NEW.fecha_actualizacion = OLD.fecha_actualizacion
+BEGIN
+    UPDATE empleados SET fecha_actualizacion = CURRENT_TIMESTAMP
+    WHERE id_empleado = NEW.id_empleado;
+END;
+
+CREATE TRIGGER clientes_fecha_actualizacion
+AFTER UPDATE ON clientes
+FOR EACH ROW WHEN NEW.fecha_actualizacion = OLD.fecha_actualizacion
+BEGIN
+    UPDATE clientes SET fecha_actualizacion = CURRENT_TIMESTAMP
+    WHERE id_cliente = NEW.id_cliente;
+END;
+
+-- Registrar borrados en eliminaciones
+CREATE TRIGGER departamentos_eliminacion
+AFTER DELETE ON departamentos
+FOR EACH ROW
+BEGIN
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('departamentos', OLD.id_departamento);
+END;
+
+CREATE TRIGGER proveedores_eliminacion
+AFTER DELETE ON proveedores
+FOR EACH ROW
+BEGIN
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('proveedores', OLD.id_proveedor);
+END;
+
+CREATE TRIGGER productos_eliminacion
+AFTER DELETE ON productos
+FOR EACH ROW
+BEGIN
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('productos', OLD.id_producto);
+END;
+
+CREATE TRIGGER empleados_eliminacion
+AFTER DELETE ON empleados
+FOR EACH ROW
+BEGIN
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('empleados', OLD.id_empleado);
+END;
+
+CREATE TRIGGER clientes_eliminacion
+AFTER DELETE ON clientes
+FOR EACH ROW
+BEGIN
+    INSERT INTO eliminaciones (tabla, id_registro) VALUES ('clientes', OLD.id_cliente);
+END;
+
+CREATE TRIGGER after_venta_insert
+AFTER INSERT ON detalle_ventas
+FOR EACH ROW
+BEGIN
+    UPDATE productos SET stock = stock - NEW.cantidad
+    WHERE id_producto = NEW.id_producto;
+
+    INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
+    VALUES (NEW.id_producto, 'salida', NEW.cantidad,
+           (SELECT id_empleado FROM ventas WHERE id_venta = NEW.id_venta),
+           'Venta #' || NEW.id_venta);
+END;
+
+-- No regresa el stock cuando el detalle se borra para archivarlo
+CREATE TRIGGER after_venta_delete
+AFTER DELETE ON detalle_ventas
+FOR EACH ROW WHEN NOT EXISTS (SELECT 1 FROM archivo_en_curso)
+BEGIN
+    UPDATE productos SET stock = stock + OLD.cantidad
+    WHERE id_producto = OLD.id_producto;
+
+    INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
+    VALUES (OLD.id_producto, 'entrada', OLD.cantidad,
+           (SELECT id_empleado FROM ventas WHERE id_venta = OLD.id_venta),
+           'Cancelación venta #' || OLD.id_venta);
+END;
+
+CREATE VIEW vista_ventas AS
+SELECT
+    v.id_venta,
+    v.folio,
+    v.fecha,
+    e.nombre AS empleado,
+    c.nombre AS cliente,
+    COUNT(dv.id_producto) AS total_productos,
+    v.subtotal,
+    v.iva,
+    v.total,
+    v.metodo_pago,
+    v.estado
+FROM ventas v
+JOIN empleados e ON v.id_empleado = e.id_empleado
+JOIN clientes c ON v.id_cliente = c.id_cliente
+LEFT JOIN detalle_ventas dv ON v.id_venta = dv.id_venta
+GROUP BY v.id_venta;
+
+-- Historia completa: tablas vivas más las archivadas
+CREATE VIEW ventas_con_historico AS
+    SELECT id_venta, folio, fecha, id_empleado, id_cliente, subtotal, iva, total, estado, metodo_pago FROM ventas
+    UNION ALL SELECT id_venta, folio, fecha, id_empleado, id_cliente, subtotal, iva, total, estado, metodo_pago FROM ventas_historico;
+
+CREATE VIEW detalle_ventas_con_historico AS
+    SELECT id_detalle, id_venta, id_producto, cantidad, precio_unitario, importe FROM detalle_ventas
+    UNION ALL SELECT id_detalle, id_venta, id_producto, cantidad, precio_unitario, importe FROM detalle_ventas_historico;
+
+CREATE VIEW inventario_con_historico AS
+    SELECT id_movimiento, id_producto, tipo_movimiento, cantidad, fecha, id_usuario, motivo FROM inventario
+    UNION ALL SELECT id_movimiento, id_producto, tipo_movimiento, cantidad, fecha, id_usuario, motivo FROM inventario_historico;
+
+INSERT INTO departamentos (nombre, ubicacion, encargado) VALUES
+('Electrónica', 'Planta Baja - Zona A', 'Carlos Mendoza'),
+('Ropa', 'Primer Piso - Zona B', 'Laura Ramírez'),
+('Hogar', 'Segundo Piso - Zona C', 'Fernando López'),
+('Juguetería', 'Planta Baja - Zona D', 'Ana Pérez'),
+('Deportes', 'Primer Piso - Zona E', 'Miguel Torres');
+
+INSERT INTO proveedores (nombre, contacto, telefono, email, direccion) VALUES
+('ElectroMex', 'Juan Silva', '5551234567', 'contacto@electromex.com', 'Av. Revolución 120, CDMX'),
+('ModaPlus', 'Sandra Ortega', '5557654321', 'ventas@modaplus.com', 'Blvd. Independencia 45, Monterrey'),
+('CasaFina', 'Ricardo Pérez', '5553334444', 'rperez@casafina.com', 'Calle Cedros 89, Guadalajara'),
+('JuegaBien', 'Marta Reyes', '5554445555', 'marta@juegabien.com', 'Av. Niños 21, Puebla'),
+('SportLife', 'Luis Domínguez', '5559998888', 'ldominguez@sportlife.com', 'Carretera Nacional 99, León');
+
+INSERT INTO productos 
+(codigo_barras, nombre, descripcion, precio_costo, precio_publico, stock, id_departamento, id_proveedor) 
+VALUES
+-- Electrónica (departamento 1, proveedor 1)
+('7501000000001', 'Televisor LED 40"', 'Pantalla LED con resolución Full HD', 3500.00, 4999.99, 10, 1, 1),
+('7501000000002', 'Laptop 14"', 'Intel Core i5, 8GB RAM, 256GB SSD', 7000.00, 8999.99, 8, 1, 1),
+('7501000000003', 'Smartphone X10', 'Pantalla 6.5", 128GB', 4500.00, 6399.99, 12, 1, 1),
+('7501000000004', 'Cámara Digital', '16MP, Zoom óptico 10x', 1800.00, 2499.99, 5, 1, 1),
+('7501000000005', 'Audífonos Bluetooth', 'Cancelación de ruido activa', 300.00, 599.99, 20, 1, 1),
+('7501000000006', 'Tablet 10"', 'Android, 64GB almacenamiento', 1800.00, 2799.99, 10, 1, 1),
+
+-- Ropa (departamento 2, proveedor 2)
+('7501000000007', 'Camisa Casual Hombre', 'Algodón, talla M', 150.00, 299.99, 15, 2, 2),
+('7501000000008', 'Pantalón de Mezclilla', 'Talla 32', 200.00, 399.99, 12, 2, 2),
+('7501000000009', 'Blusa Estampada', 'Talla CH, manga corta', 180.00, 349.99, 10, 2, 2),
+('7501000000010', 'Vestido Formal', 'Color negro, talla M', 400.00, 799.99, 5, 2, 2),
+('7501000000011', 'Sudadera Unisex', 'Talla L, con gorro', 220.00, 449.99, 8, 2, 2),
+('7501000000012', 'Zapatos de vestir', 'Color negro, talla 26', 500.00, 899.99, 7, 2, 2),
+
+-- Hogar (departamento 3, proveedor 3)
+('7501000000013', 'Juego de Sábanas', 'Queen size, 300 hilos', 300.00, 599.99, 6, 3, 3),
+('7501000000014', 'Lámpara de Mesa', 'LED, diseño moderno', 120.00, 249.99, 10, 3, 3),
+('7501000000015', 'Cafetera 12 tazas', 'Automática, negra', 400.00, 699.99, 7, 3, 3),
+('7501000000016', 'Plancha a Vapor', 'Suela cerámica', 180.00, 349.99, 9, 3, 3),
+('7501000000017', 'Toalla Grande', '100% algodón, blanca', 100.00, 199.99, 15, 3, 3),
+('7501000000018', 'Reloj de Pared', 'Clásico, silencioso', 90.00, 189.99, 6, 3, 3),
+
+-- Juguetería (departamento 4, proveedor 4)
+('7501000000019', 'Muñeca Princesa', 'Articulada, accesorios incluidos', 150.00, 299.99, 20, 4, 4),
+('7501000000020', 'Carrito de Juguete', 'Escala 1:18, metálico', 120.00, 249.99, 18, 4, 4),
+('7501000000021', 'Puzzle 1000 piezas', 'Paisaje natural', 90.00, 179.99, 10, 4, 4),
+('7501000000022', 'Set de Plastilina', 'Colores variados', 80.00, 159.99, 12, 4, 4),
+('7501000000023', 'Juego de Mesa', 'Clásico familiar', 180.00, 349.99, 9, 4, 4),
+('7501000000024', 'Pelota de colores', 'Rebotadora para niños', 60.00, 129.99, 25, 4, 4),
+
+-- Deportes (departamento 5, proveedor 5)
+('7501000000025', 'Balón de Fútbol', 'Tamaño oficial', 150.00, 299.99, 15, 5, 5),
+('7501000000026', 'Raqueta de Tenis', 'Fibra de carbono', 300.00, 599.99, 6, 5, 5),
+('7501000000027', 'Guantes de Box', 'Talla M', 250.00, 499.99, 8, 5, 5),
+('7501000000028', 'Bicicleta Montaña', 'Rodada 26, 21 velocidades', 1800.00, 2799.99, 3, 5, 5),
+('7501000000029', 'Pesa Rusa 10kg', 'Hierro fundido', 350.00, 699.99, 5, 5, 5),
+('7501000000030', 'Playera Dry Fit', 'Talla G, transpirable', 100.00, 199.99, 10, 5, 5);
+
+INSERT INTO empleados (nombre, domicilio, puesto, id_departamento, usuario, contrasena, nivel_acceso) VALUES
+('Julio Herrera', 'Calle Sol #123', 'Cajero', 1, 'julioh', 'pass123', 1),
+('Andrea Ruiz', 'Av. Luna #456', 'Cajero', 2, 'andrear', 'pass123', 1),
+('Martín Gómez', 'Calle Marte #789', 'Jefe de piso', 3, 'marting', 'pass123', 2),
+('Elena Sánchez', 'Boulevard Sur #321', 'Almacén', 4, 'elenas', 'pass123', 1),
+('Oscar Díaz', 'Col. Centro #654', 'Administrador', 5, 'oscard', 'admin123', 2);
+
+INSERT INTO clientes (nombre, correo, telefono, direccion, rfc, puntos_acumulados) VALUES
+('María López', 'maria.lopez@gmail.com', '5551112233', 'Calle Jazmín 10, CDMX', 'LOPM850101ABC', 150),
+('Luis Martínez', 'luis.mtz@hotmail.com', '5552223344', 'Av. Reforma 200, CDMX', 'MAML870202DEF', 300),
+('Sofía Torres', 'sofia.torres@yahoo.com', '5553334455', 'Col. Roma 123, CDMX', 'TOSF880303GHI', 50);
@@ -0,0 +1,115 @@
+import contextvars
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+
+class TareaSignals(QObject):
+    terminado = pyqtSignal(object)
+    error = pyqtSignal(object)
+    finalizado = pyqtSignal()
+    progreso = pyqtSignal(object)
+
+
+class TareaDB(QRunnable):
+    # Ejecuta una función de base de datos fuera del hilo de la interfaz.
+    # Los resultados regresan por señales, que Qt entrega en el hilo principal.
+    def __init__(self, funcion, args, kwargs, cancelable=True):
+        super().__init__()
+        # La vida del objeto la controla DBWorker, no Qt
+        self.setAutoDelete(False)
+        self.funcion = funcion
+        self.args = args
+        self.kwargs = kwargs
+        self.signals = TareaSignals()
+        self.cancelable = cancelable
+        # La tarea hereda el contexto de quien la lanza (p. ej. la acción de
+        # la interfaz con la que se etiquetan sus consultas)
+        self.contexto = contextvars.copy_context()
+        self.cancelada = False
+
+    def cancelar(self):
+        # La consulta en curso no se interrumpe, pero su resultado se descarta.
+        # Las escrituras (p. ej. una venta) no se cancelan: su resultado siempre
+        # debe llegar a la interfaz.
+        if self.cancelable:
+            self.cancelada = True
+
+    def run(self):
+        try:
+            if self.cancelada:
+                return
+            try:
+                resultado = self.contexto.run(self.funcion, *self.args, **self.kwargs)
+            except Exception as e:
+                if not self.cancelada:
+                    self.signals.error.emit(e)
+                return
+            if not self.cancelada:
+                self.signals.terminado.emit(resultado)
+        finally:
+            self.signals.finalizado.emit()
+
+
+class DBWorker(QObject):
+    ocupado = pyqtSignal(bool)
+
+    def __init__(self, max_hilos=4, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(max_hilos)
+        self._activas = set()
+        self._por_clave = {}
+
+    def ejecutar(self, funcion, *args, al_terminar=None, al_fallar=None, al_finalizar=None,
+                 al_progreso=None, clave=None, cancelable=True, **kwargs):
+        # Con una clave, una tarea nueva cancela a la anterior con la misma
+        # clave (p. ej. una búsqueda nueva reemplaza a la que sigue en curso)
+        if clave is not None:
+            self.cancelar(clave)
+
+        tarea = TareaDB(funcion, args, kwargs, cancelable)
+        if al_progreso:
+            # La función recibe progreso=callable para reportar su avance
+            tarea.signals.progreso.connect(al_progreso)
+            tarea.kwargs = dict(kwargs, progreso=tarea.signals.progreso.emit)
+        if al_terminar:
+            tarea.signals.terminado.connect(al_terminar)
+        tarea.signals.error.connect(al_fallar or self._error_por_defecto)
+        if al_finalizar:
+            tarea.signals.finalizado.connect(al_finalizar)
+        tarea.signals.finalizado.connect(lambda t=tarea, c=clave: self._tarea_finalizada(t, c))
+
+        if not self._activas:
+            self.ocupado.emit(True)
+        self._activas.add(tarea)
+        if clave is not None:
+            self._por_clave[clave] = tarea
+
+        self.pool.start(tarea)
+        return tarea
+
+    def _tarea_finalizada(self, tarea, clave):
+        self._activas.discard(tarea)
+        if clave is not None and self._por_clave.get(clave) is tarea:
+            del self._por_clave[clave]
+        if not self._activas:
+            self.ocupado.emit(False)
+
+    def _error_por_defecto(self, error):
+        print(f"Error en tarea de base de datos: {error}")
+
+    def cancelar(self, clave):
+        tarea = self._por_clave.pop(clave, None)
+        if tarea is not None:
+            tarea.cancelar()
+
+    def cancelar_todo(self):
+        self._por_clave.clear()
+        for tarea in list(self._activas):
+            tarea.cancelar()
+
+    def esta_ocupado(self):
+        return bool(self._activas)
+
+    def esperar(self, ms=-1):
+        return self.pool.waitForDone(ms)
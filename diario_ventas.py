@@ -0,0 +1,282 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from database_manager import DB_ERRORS, DATA_ERRORS
+from instrumentacion import accion
+from ventas import calcular_totales, registrar_venta_en
+
+RUTA_DIARIO = os.environ.get('SEARS_DIARIO_PATH', 'ventas_pendientes.sqlite')
+INTERVALO_REENVIO = 10.0    # segundos entre intentos de vaciar el diario
+LOTE_REENVIO = 50           # ventas del diario por transacción
+
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS ventas_pendientes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        folio TEXT NOT NULL UNIQUE,
+        id_cliente INTEGER,
+        id_empleado INTEGER NOT NULL,
+        lineas TEXT NOT NULL,
+        metodo_pago TEXT NOT NULL,
+        fecha TEXT NOT NULL,
+        error TEXT
+    )""",
+    """CREATE TABLE IF NOT EXISTS folios_locales (
+        terminal TEXT NOT NULL PRIMARY KEY,
+        ultimo INTEGER NOT NULL
+    )""",
+    # Copia del catálogo de caja y de los combos para arrancar sin conexión
+    """CREATE TABLE IF NOT EXISTS productos (
+        id_producto INTEGER PRIMARY KEY,
+        codigo_barras TEXT,
+        nombre TEXT NOT NULL,
+        precio_publico REAL NOT NULL,
+        stock INTEGER NOT NULL
+    )""",
+    """CREATE TABLE IF NOT EXISTS referencias (
+        tabla TEXT NOT NULL,
+        id_registro INTEGER NOT NULL,
+        texto TEXT NOT NULL,
+        PRIMARY KEY (tabla, id_registro)
+    )""",
+]
+
+
+class DiarioVentas:
+    # Archivo SQLite local de la caja (no es sears_db): las ventas cobradas
+    # sin conexión, en el orden en que se cobraron, y una copia del catálogo
+    # para seguir vendiendo. En modo WAL con synchronous=FULL cada venta
+    # queda en disco antes de imprimir el ticket. Se puede usar desde
+    # cualquier hilo.
+    def __init__(self, ruta=RUTA_DIARIO):
+        self.ruta = ruta
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=FULL")
+        for sentencia in ESQUEMA:
+            self._conn.execute(sentencia)
+
+    def _transaccion(self, sentencias):
+        # sentencias: [(sql, params)] en una sola transacción
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                resultados = [self._conn.execute(sql, params) for sql, params in sentencias]
+                self._conn.execute("COMMIT")
+                return resultados
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+
+    def _consultar(self, sql, params=()):
+        with self._lock:
+            return [dict(fila) for fila in self._conn.execute(sql, params).fetchall()]
+
+    # ------------------------- VENTAS PENDIENTES -------------------------
+    def agregar(self, terminal, id_cliente, id_empleado, lineas, metodo_pago='efectivo', folio=None):
+        # Sin folio, uno propio (F-<terminal>-<número>) sacado de un contador
+        # local: no choca con los V-... de la base mientras cada caja tenga su
+        # terminal. Con folio (el V-... de una venta que quizá sí se confirmó)
+        # el reenvío la salta si ya está en la base
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if folio is None:
+                    self._conn.execute(
+                        """INSERT INTO folios_locales (terminal, ultimo) VALUES (?, 1)
+                        ON CONFLICT (terminal) DO UPDATE SET ultimo = ultimo + 1""",
+                        (terminal,)
+                    )
+                    ultimo = self._conn.execute(
+                        "SELECT ultimo FROM folios_locales WHERE terminal = ?", (terminal,)
+                    ).fetchone()[0]
+                    folio = f"F-{terminal}-{ultimo:010d}"
+                self._conn.execute(
+                    """INSERT INTO ventas_pendientes
+                    (folio, id_cliente, id_empleado, lineas, metodo_pago, fecha)
+                    VALUES (?, ?, ?, ?, ?, ?)""",
+                    (folio, id_cliente, id_empleado, json.dumps(list(lineas)), metodo_pago,
+                     time.strftime('%Y-%m-%d %H:%M:%S'))
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        subtotal, iva, total = calcular_totales(lineas)
+        return {
+            "id_venta": None,
+            "folio": folio,
+            "subtotal": subtotal,
+            "iva": iva,
+            "total": total,
+            "pendiente": True
+        }
+
+    def pendientes(self, limite=LOTE_REENVIO):
+        # Las que faltan por enviar, sin las que fallaron por sus datos
+        filas = self._consultar(
+            "SELECT * FROM ventas_pendientes WHERE error IS NULL ORDER BY id LIMIT ?", (limite,)
+        )
+        for fila in filas:
+            fila['lineas'] = json.loads(fila['lineas'])
+        return filas
+
+    def confirmar(self, ids):
+        if ids:
+            self._transaccion([
+                (f"DELETE FROM ventas_pendientes WHERE id IN ({', '.join('?' * len(ids))})", tuple(ids))
+            ])
+
+    def marcar_error(self, id_pendiente, mensaje):
+        # Se conserva para revisarla a mano; ya no se reintenta
+        self._transaccion([
+            ("UPDATE ventas_pendientes SET error = ? WHERE id = ?", (str(mensaje), id_pendiente))
+        ])
+
+    def conteo(self):
+        fila = self._consultar(
+            """SELECT COUNT(*) AS total, COALESCE(SUM(error IS NOT NULL), 0) AS con_error
+            FROM ventas_pendientes"""
+        )[0]
+        return fila['total'] - fila['con_error'], fila['con_error']
+
+    # ------------------------- COPIA DEL CATÁLOGO -------------------------
+    def respaldar_productos(self, filas, completo, eliminados):
+        # Oyente de ProductoCache: la lista completa reemplaza la copia; los
+        # cambios incrementales solo tocan sus filas
+        sentencias = [("DELETE FROM productos", ())] if completo else []
+        sentencias += [
+            (
+                """INSERT OR REPLACE INTO productos
+                (id_producto, codigo_barras, nombre, precio_publico, stock) VALUES (?, ?, ?, ?, ?)""",
+                (f['id_producto'], f['codigo_barras'], f['nombre'], float(f['precio_publico']), f['stock'])
+            )
+            for f in filas
+        ]
+        sentencias += [("DELETE FROM productos WHERE id_producto = ?", (i,)) for i in eliminados]
+        if sentencias:
+            self._transaccion(sentencias)
+
+    def productos(self):
+        return self._consultar("SELECT id_producto, codigo_barras, nombre, precio_publico, stock FROM productos")
+
+    def respaldar_referencias(self, tabla, datos):
+        # datos: {id: texto}, como CacheReferencias.obtener()
+        self._transaccion(
+            [("DELETE FROM referencias WHERE tabla = ?", (tabla,))]
+            + [
+                ("INSERT INTO referencias (tabla, id_registro, texto) VALUES (?, ?, ?)", (tabla, i, t))
+                for i, t in datos.items()
+            ]
+        )
+
+    def referencias(self, tabla):
+        filas = self._consultar("SELECT id_registro, texto FROM referencias WHERE tabla = ?", (tabla,))
+        return {fila['id_registro']: fila['texto'] for fila in filas}
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class Reenviador:
+    # Vacía el diario en sears_db en segundo plano: lotes de ventas en una
+    # sola transacción cada una, en el orden en que se cobraron. Lleva el
+    # estado de la conexión (en_linea) que consulta SalesService para no
+    # esperar a la base mientras está caída.
+    def __init__(self, db, diario, intervalo=INTERVALO_REENVIO, lote=LOTE_REENVIO):
+        self.db = db
+        self.diario = diario
+        self.intervalo = intervalo
+        self.lote = lote
+        self.en_linea = True
+        self._lock = threading.Lock()   # un solo reenvío a la vez
+        self._detener = threading.Event()
+        self._despertar = threading.Event()
+        self._hilo = None
+
+    def sin_conexion(self):
+        # La caja no pudo registrar una venta: las siguientes van directo al
+        # diario hasta que un reenvío logre conectar
+        self.en_linea = False
+
+    def reenviar(self):
+        # Regresa cuántas ventas se enviaron
+        with self._lock:
+            enviadas = 0
+            while True:
+                pendientes = self.diario.pendientes(self.lote)
+                if not pendientes:
+                    if not self.en_linea:
+                        self.en_linea = self.db.execute_query("SELECT 1 AS uno", fetch=True) is not None
+                    return enviadas
+                try:
+                    self._enviar_lote(pendientes)
+                    enviadas += len(pendientes)
+                except DATA_ERRORS:
+                    # Algún registro no entra (p. ej. un producto borrado):
+                    # una por una para apartar solo esa
+                    for pendiente in pendientes:
+                        try:
+                            self._enviar_lote([pendiente])
+                            enviadas += 1
+                        except DATA_ERRORS as e:
+                            self.diario.marcar_error(pendiente['id'], e)
+                        except DB_ERRORS as e:
+                            self._fallo(e)
+                            return enviadas
+                except DB_ERRORS as e:
+                    self._fallo(e)
+                    return enviadas
+                self.en_linea = True
+
+    def _fallo(self, e):
+        # Se reintenta en el siguiente ciclo. Solo una conexión caída pone a
+        # la caja sin conexión; un bloqueo o el pool agotado no
+        if self.db.backend.is_disconnect(e):
+            self.en_linea = False
+
+    def _enviar_lote(self, pendientes):
+        folios = [p['folio'] for p in pendientes]
+        with self.db.transaction() as cursor:
+            # Las de un lote que se confirmó sin alcanzar a borrarse del diario
+            cursor.execute(
+                f"SELECT folio FROM ventas WHERE folio IN ({', '.join(['%s'] * len(folios))})", folios
+            )
+            enviadas = {fila['folio'] for fila in cursor.fetchall()}
+            for p in pendientes:
+                if p['folio'] not in enviadas:
+                    registrar_venta_en(
+                        cursor, p['folio'], p['id_cliente'], p['id_empleado'], p['lineas'],
+                        p['metodo_pago'], fecha=p['fecha'], validar_stock=False
+                    )
+        self.diario.confirmar([p['id'] for p in pendientes])
+
+    # ------------------------- SEGUNDO PLANO -------------------------
+    def iniciar(self):
+        if self._hilo is not None:
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="reenvio-ventas", daemon=True)
+        self._hilo.start()
+
+    def _ciclo(self):
+        while not self._detener.is_set():
+            try:
+                with accion("diario.reenvio"):
+                    self.reenviar()
+            except Exception as e:
+                print(f"Error al reenviar ventas pendientes: {e}")
+            self._despertar.wait(self.intervalo)
+            self._despertar.clear()
+
+    def detener(self):
+        self._detener.set()
+        self._despertar.set()
+        if self._hilo is not None:
+            self._hilo.join()
+            self._hilo = None
@@ -0,0 +1,56 @@
+import os
+import re
+import threading
+
+TERMINAL = os.environ.get('SEARS_TERMINAL', '01')
+BLOQUE_FOLIOS = 50      # folios que cada terminal aparta por viaje a la base
+
+# Compatible con MySQL y SQLite; también está en los scripts del esquema
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS folios (
+        terminal VARCHAR(4) NOT NULL PRIMARY KEY,
+        ultimo BIGINT NOT NULL DEFAULT 0
+    )""",
+]
+
+# Suma el bloque al contador de la terminal (o lo crea) en una sola sentencia;
+# el bloqueo de la fila dura hasta el commit, así dos cajas nunca se llevan
+# el mismo bloque
+APARTAR = """INSERT INTO folios (terminal, ultimo) VALUES (%s, %s)
+    ON DUPLICATE KEY UPDATE ultimo = ultimo + VALUES(ultimo)"""
+
+
+class GeneradorFolios:
+    # Folios V-<terminal>-<número>: el número crece por terminal y sale de
+    # bloques apartados en la tabla folios, así que la mayoría de las ventas
+    # no consulta la base para obtenerlo y los folios nuevos siempre quedan al
+    # final del índice de su terminal. Los números de un bloque sin usar al
+    # cerrar la aplicación se pierden (quedan huecos, nunca repetidos). Se
+    # puede llamar desde cualquier hilo.
+    def __init__(self, db, terminal=None, bloque=BLOQUE_FOLIOS):
+        terminal = (terminal or TERMINAL).strip().upper()
+        # 'V-' + terminal + '-' + 10 dígitos cabe en ventas.folio VARCHAR(20)
+        if not re.fullmatch(r'[A-Z0-9]{1,4}', terminal):
+            raise ValueError("La terminal debe tener de 1 a 4 letras o números")
+        self.db = db
+        self.terminal = terminal
+        self.bloque = bloque
+        self._lock = threading.Lock()
+        self._siguiente = 1
+        self._limite = 0    # último número del bloque actual
+
+    def siguiente(self):
+        with self._lock:
+            if self._siguiente > self._limite:
+                self._apartar()
+            numero = self._siguiente
+            self._siguiente += 1
+        return f"V-{self.terminal}-{numero:010d}"
+
+    def _apartar(self):
+        with self.db.transaction() as cursor:
+            cursor.execute(APARTAR, (self.terminal, self.bloque))
+            cursor.execute("SELECT ultimo FROM folios WHERE terminal = %s", (self.terminal,))
+            ultimo = int(cursor.fetchall()[0]['ultimo'])
+        self._siguiente = ultimo - self.bloque + 1
+        self._limite = ultimo
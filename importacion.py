@@ -0,0 +1,470 @@
+import argparse
+import csv
+import json
+import os
+import re
+import tempfile
+import time
+
+from database_manager import DatabaseManager, MySQLBackend, SQLiteBackend, DB_ERRORS
+from services import Campo, DatosInvalidosError
+
+# Uso:
+#   python importacion.py productos catalogo_proveedor.csv
+#   python importacion.py clientes clientes.json --lote 2000
+#   python importacion.py productos catalogo.csv --load-data      (solo MySQL)
+# Sin --sqlite usa el backend de SEARS_DB_BACKEND (MySQL por defecto).
+
+LOTE = 1000
+MAX_ERRORES = 1000          # errores por fila que se guardan en el resultado
+TAM_BLOQUE = 1 << 16        # lectura de archivos JSON
+
+# Qué filas del lote ya existen, por su llave natural
+EXISTENTES = "SELECT {llave}, {natural} FROM {tabla} WHERE {natural} IN ({marcadores})"
+
+
+class DefinicionImportacion:
+    def __init__(self, tabla, llave, llave_natural, entidad, campos, referencias=()):
+        self.tabla = tabla
+        self.llave = llave
+        self.llave_natural = llave_natural      # columna con la que se decide alta o cambio
+        self.entidad = entidad
+        self.campos = campos
+        # [(columna, alias, tabla, llave, columna_nombre)]: la llave foránea
+        # puede venir como id (columna) o como nombre (alias)
+        self.referencias = referencias
+
+
+IMPORTACIONES = {
+    'productos': DefinicionImportacion(
+        'productos', 'id_producto', 'codigo_barras', "producto",
+        [
+            Campo('codigo_barras', obligatorio=True, etiqueta="código de barras"),
+            Campo('nombre', obligatorio=True),
+            Campo('descripcion'),
+            Campo('precio_costo', float, True, "precio de costo"),
+            Campo('precio_publico', float, True, "precio público"),
+            Campo('stock', int, True),
+            Campo('id_departamento', int),
+            Campo('id_proveedor', int),
+        ],
+        [
+            ('id_departamento', 'departamento', 'departamentos', 'id_departamento', 'nombre'),
+            ('id_proveedor', 'proveedor', 'proveedores', 'id_proveedor', 'nombre'),
+        ]
+    ),
+    'clientes': DefinicionImportacion(
+        'clientes', 'id_cliente', 'correo', "cliente",
+        [
+            Campo('correo', obligatorio=True),
+            Campo('nombre', obligatorio=True),
+            Campo('telefono'),
+            Campo('direccion'),
+            Campo('rfc'),
+        ]
+    ),
+    # proveedores no tiene llave única: se empata por nombre
+    'proveedores': DefinicionImportacion(
+        'proveedores', 'id_proveedor', 'nombre', "proveedor",
+        [
+            Campo('nombre', obligatorio=True),
+            Campo('contacto'),
+            Campo('telefono'),
+            Campo('email'),
+            Campo('direccion'),
+        ]
+    ),
+}
+
+
+class ResultadoImportacion:
+    def __init__(self, tabla):
+        self.tabla = tabla
+        self.procesadas = 0
+        self.insertadas = 0
+        self.actualizadas = 0
+        self.con_error = 0
+        self.errores = []       # (número de fila, mensaje), hasta MAX_ERRORES
+        self.segundos = 0.0
+
+    def error(self, numero, mensaje):
+        self.con_error += 1
+        if len(self.errores) < MAX_ERRORES:
+            self.errores.append((numero, mensaje))
+
+    def avance(self):
+        # Copia para mandarla a otro hilo
+        return {
+            'tabla': self.tabla,
+            'procesadas': self.procesadas,
+            'insertadas': self.insertadas,
+            'actualizadas': self.actualizadas,
+            'con_error': self.con_error,
+        }
+
+
+# ------------------------- LECTURA -------------------------
+def leer_archivo(ruta):
+    # Filas del archivo como (número, dict), sin cargarlo completo en memoria
+    extension = os.path.splitext(ruta)[1].lower()
+    if extension == '.csv':
+        return _leer_csv(ruta)
+    if extension in ('.jsonl', '.ndjson'):
+        return _leer_json_lineas(ruta)
+    if extension == '.json':
+        return _leer_json_arreglo(ruta)
+    raise DatosInvalidosError(f"Formato no soportado: {extension or ruta}")
+
+
+def _leer_csv(ruta):
+    with open(ruta, encoding='utf-8-sig', newline='') as archivo:
+        muestra = archivo.read(TAM_BLOQUE)
+        archivo.seek(0)
+        try:
+            dialecto = csv.Sniffer().sniff(muestra, delimiters=",;\t|")
+        except csv.Error:
+            dialecto = csv.excel
+        # La fila 1 es el encabezado
+        for numero, fila in enumerate(csv.DictReader(archivo, dialect=dialecto), start=2):
+            yield numero, fila
+
+
+def _leer_json_lineas(ruta):
+    with open(ruta, encoding='utf-8-sig') as archivo:
+        for numero, linea in enumerate(archivo, start=1):
+            if not linea.strip():
+                continue
+            try:
+                yield numero, json.loads(linea)
+            except json.JSONDecodeError as e:
+                yield numero, DatosInvalidosError(f"JSON inválido: {e.msg}")
+
+
+_SEPARADORES = re.compile(r"[\s,]*")
+
+
+def _leer_json_arreglo(ruta):
+    # Un arreglo de objetos, decodificado objeto por objeto
+    decodificador = json.JSONDecoder()
+    with open(ruta, encoding='utf-8-sig') as archivo:
+        buffer = archivo.read(TAM_BLOQUE).lstrip()
+        if not buffer.startswith('['):
+            raise DatosInvalidosError("El archivo JSON debe contener un arreglo de objetos")
+        pos = 1
+        numero = 0
+        while True:
+            pos = _SEPARADORES.match(buffer, pos).end()
+            if buffer.startswith(']', pos):
+                return
+            try:
+                objeto, pos = decodificador.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # El objeto quedó partido entre dos bloques
+                bloque = archivo.read(TAM_BLOQUE)
+                if not bloque:
+                    raise DatosInvalidosError(f"JSON incompleto o inválido después del objeto {numero}")
+                buffer = buffer[pos:] + bloque
+                pos = 0
+                continue
+            numero += 1
+            yield numero, objeto
+
+
+# ------------------------- IMPORTACIÓN -------------------------
+class Importador:
+    # Alta o cambio masivo de filas de un catálogo. Las filas se validan por
+    # lotes con las mismas reglas que los formularios (Campo) y cada lote se
+    # escribe en una transacción: una consulta para saber cuáles ya existen y
+    # un executemany para las altas y otro para los cambios.
+    def __init__(self, db, tabla, lote=LOTE, progreso=None):
+        self.db = db
+        self.definicion = IMPORTACIONES[tabla]
+        self.lote = lote
+        self.progreso = progreso
+        self._referencias = None
+
+    def importar(self, filas):
+        resultado = ResultadoImportacion(self.definicion.tabla)
+        inicio = time.perf_counter()
+        self._cargar_referencias()
+        pendientes = []
+        for numero, fila in filas:
+            resultado.procesadas += 1
+            try:
+                pendientes.append((numero, self.validar(fila)))
+            except DatosInvalidosError as e:
+                resultado.error(numero, str(e))
+            if len(pendientes) >= self.lote:
+                self._escribir(pendientes, resultado)
+                pendientes = []
+        if pendientes:
+            self._escribir(pendientes, resultado)
+        resultado.segundos = time.perf_counter() - inicio
+        self._avisar(resultado)
+        return resultado
+
+    def importar_archivo(self, ruta):
+        return self.importar(leer_archivo(ruta))
+
+    def validar(self, fila):
+        if isinstance(fila, Exception):
+            raise fila
+        if not isinstance(fila, dict):
+            raise DatosInvalidosError("Cada fila debe ser un objeto con columnas")
+        fila = {str(columna).strip().lower(): valor for columna, valor in fila.items() if columna is not None}
+        definicion = self.definicion
+
+        for columna, alias, tabla, _, _ in definicion.referencias:
+            if fila.get(columna) in (None, "") and fila.get(alias) not in (None, ""):
+                nombre = str(fila[alias]).strip()
+                id_registro = self._referencias[tabla]['nombres'].get(nombre.lower())
+                if id_registro is None:
+                    raise DatosInvalidosError(f"No existe el {alias} '{nombre}'")
+                fila[columna] = id_registro
+
+        # Las columnas que no trae el archivo no se tocan al actualizar
+        valores = {
+            campo.nombre: campo.limpiar(fila.get(campo.nombre), definicion.entidad)
+            for campo in definicion.campos
+            if campo.obligatorio or campo.nombre in fila
+        }
+        for columna, alias, tabla, _, _ in definicion.referencias:
+            if valores.get(columna) is not None and valores[columna] not in self._referencias[tabla]['ids']:
+                raise DatosInvalidosError(f"No existe el {alias} con id {valores[columna]}")
+        return valores
+
+    def _cargar_referencias(self):
+        # Ids y nombres de las tablas referenciadas, una vez por importación
+        self._referencias = {}
+        for _, _, tabla, llave, columna_nombre in self.definicion.referencias:
+            filas = self.db.execute_query(f"SELECT {llave}, {columna_nombre} FROM {tabla}", fetch=True)
+            if filas is None:
+                raise DatosInvalidosError(f"No se pudo leer la tabla {tabla}")
+            self._referencias[tabla] = {
+                'ids': {fila[llave] for fila in filas},
+                'nombres': {str(fila[columna_nombre]).strip().lower(): fila[llave] for fila in filas},
+            }
+
+    def _escribir(self, pendientes, resultado):
+        try:
+            insertadas, actualizadas = self._escribir_lote([valores for _, valores in pendientes])
+        except DB_ERRORS:
+            # Una fila rechazó el lote completo: se reintenta fila por fila
+            # para saber cuál fue y guardar las demás
+            insertadas = actualizadas = 0
+            for numero, valores in pendientes:
+                try:
+                    altas, cambios = self._escribir_lote([valores])
+                except DB_ERRORS as e:
+                    resultado.error(numero, f"Error de base de datos: {e}")
+                    continue
+                insertadas += altas
+                actualizadas += cambios
+        resultado.insertadas += insertadas
+        resultado.actualizadas += actualizadas
+        self._avisar(resultado)
+
+    def _escribir_lote(self, lote):
+        definicion = self.definicion
+        natural = definicion.llave_natural
+        # Si la llave se repite en el lote, gana la última fila. Las llaves
+        # se comparan sin mayúsculas, igual que la collation de MySQL.
+        por_llave = {}
+        for valores in lote:
+            por_llave[str(valores[natural]).lower()] = valores
+        marcadores = ", ".join(["%s"] * len(por_llave))
+
+        with self.db.transaction() as cursor:
+            cursor.execute(
+                EXISTENTES.format(
+                    llave=definicion.llave, natural=natural, tabla=definicion.tabla, marcadores=marcadores
+                ),
+                [valores[natural] for valores in por_llave.values()]
+            )
+            existentes = {str(fila[natural]).lower(): fila[definicion.llave] for fila in cursor.fetchall()}
+
+            # Un executemany por cada combinación de columnas (en un CSV todas
+            # las filas traen las mismas)
+            altas = {}
+            cambios = {}
+            for llave, valores in por_llave.items():
+                columnas = tuple(valores)
+                if llave in existentes:
+                    cambios.setdefault(columnas, []).append(
+                        (*(valores[c] for c in columnas if c != natural), existentes[llave])
+                    )
+                else:
+                    altas.setdefault(columnas, []).append(tuple(valores.values()))
+
+            for columnas, filas in altas.items():
+                cursor.executemany(
+                    f"INSERT INTO {definicion.tabla} ({', '.join(columnas)}) "
+                    f"VALUES ({', '.join(['%s'] * len(columnas))})",
+                    filas
+                )
+            for columnas, filas in cambios.items():
+                asignaciones = ", ".join(f"{c} = %s" for c in columnas if c != natural)
+                if not asignaciones:
+                    continue
+                # Sube la versión para que quien edite el registro a la vez lo note
+                cursor.executemany(
+                    f"UPDATE {definicion.tabla} SET {asignaciones}, version = version + 1 "
+                    f"WHERE {definicion.llave} = %s",
+                    filas
+                )
+        return sum(map(len, altas.values())), sum(map(len, cambios.values()))
+
+    def _avisar(self, resultado):
+        if self.progreso is not None:
+            self.progreso(resultado.avance())
+
+
+class ImportadorLoadData(Importador):
+    # Solo MySQL: las filas validadas se escriben a un CSV temporal que se
+    # sube con LOAD DATA LOCAL INFILE a una tabla temporal, y de ahí se
+    # hace el alta/cambio con dos sentencias. Requiere local_infile=ON en el
+    # servidor y una conexión con allow_local_infile=True.
+    def importar(self, filas):
+        if self.db.backend.nombre != 'mysql':
+            raise DatosInvalidosError("LOAD DATA solo está disponible con MySQL")
+        resultado = ResultadoImportacion(self.definicion.tabla)
+        inicio = time.perf_counter()
+        self._cargar_referencias()
+
+        # Un CSV temporal por cada combinación de columnas: en un JSON cada
+        # fila puede traer llaves distintas y una columna que no viene no se
+        # debe escribir como NULL (en un CSV todas traen las mismas)
+        grupos = {}     # columnas -> (archivo, ruta)
+        try:
+            for numero, fila in filas:
+                resultado.procesadas += 1
+                try:
+                    valores = self.validar(fila)
+                except DatosInvalidosError as e:
+                    resultado.error(numero, str(e))
+                    continue
+                columnas = tuple(valores)
+                if columnas not in grupos:
+                    descriptor, ruta = tempfile.mkstemp(suffix='.csv', prefix='importacion_')
+                    grupos[columnas] = (os.fdopen(descriptor, 'w', encoding='utf-8', newline=''), ruta)
+                grupos[columnas][0].write(",".join(_campo_csv(v) for v in valores.values()) + "\n")
+                if resultado.procesadas % self.lote == 0:
+                    self._avisar(resultado)
+            for archivo, _ in grupos.values():
+                archivo.close()
+            if grupos:
+                resultado.insertadas, resultado.actualizadas = self._cargar(
+                    [(ruta, columnas) for columnas, (_, ruta) in grupos.items()]
+                )
+        finally:
+            for archivo, ruta in grupos.values():
+                archivo.close()
+                os.remove(ruta)
+        resultado.segundos = time.perf_counter() - inicio
+        self._avisar(resultado)
+        return resultado
+
+    def _cargar(self, archivos):
+        # archivos: [(ruta, columnas)], todos en una transacción. Si una llave
+        # viene en dos grupos, gana el que se cargue después
+        insertadas = actualizadas = 0
+        with self.db.transaction() as cursor:
+            for ruta, columnas in archivos:
+                altas, cambios = self._cargar_archivo(cursor, ruta, columnas)
+                insertadas += altas
+                actualizadas += cambios
+        return insertadas, actualizadas
+
+    def _cargar_archivo(self, cursor, ruta, columnas):
+        definicion = self.definicion
+        tabla = definicion.tabla
+        natural = definicion.llave_natural
+        temporal = f"importacion_{tabla}"
+        asignaciones = ", ".join(f"t.{c} = i.{c}" for c in columnas if c != natural)
+        lista = ", ".join(columnas)
+
+        cursor.execute(f"DROP TEMPORARY TABLE IF EXISTS {temporal}")
+        cursor.execute(f"CREATE TEMPORARY TABLE {temporal} AS SELECT {lista} FROM {tabla} LIMIT 0")
+        # Llave primaria: con REPLACE, si la llave se repite gana la última fila
+        cursor.execute(f"ALTER TABLE {temporal} ADD PRIMARY KEY ({natural})")
+        cursor.execute(
+            f"""LOAD DATA LOCAL INFILE %s REPLACE INTO TABLE {temporal}
+            CHARACTER SET utf8mb4
+            FIELDS TERMINATED BY ',' OPTIONALLY ENCLOSED BY '"' ESCAPED BY ''
+            LINES TERMINATED BY '\\n' ({lista})""",
+            (ruta,)
+        )
+        if asignaciones:
+            cursor.execute(
+                f"UPDATE {tabla} t JOIN {temporal} i ON t.{natural} = i.{natural} "
+                f"SET {asignaciones}, t.version = t.version + 1"
+            )
+        cursor.execute(
+            f"""INSERT INTO {tabla} ({lista})
+            SELECT {', '.join(f'i.{c}' for c in columnas)} FROM {temporal} i
+            LEFT JOIN {tabla} t ON t.{natural} = i.{natural}
+            WHERE t.{definicion.llave} IS NULL"""
+        )
+        insertadas = cursor.rowcount
+        cursor.execute(f"SELECT COUNT(*) AS filas FROM {temporal}")
+        cargadas = cursor.fetchall()[0]['filas']
+        cursor.execute(f"DROP TEMPORARY TABLE {temporal}")
+        return insertadas, cargadas - insertadas
+
+
+def _campo_csv(valor):
+    # Formato para LOAD DATA con ESCAPED BY '': NULL sin comillas, texto entre
+    # comillas dobles (las internas se duplican)
+    if valor is None:
+        return "NULL"
+    if isinstance(valor, (int, float)):
+        return str(valor)
+    return '"' + str(valor).replace('"', '""') + '"'
+
+
+def importar(db, tabla, ruta, lote=LOTE, load_data=False, progreso=None):
+    clase = ImportadorLoadData if load_data else Importador
+    return clase(db, tabla, lote, progreso).importar_archivo(ruta)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Importación masiva de catálogos desde CSV o JSON")
+    parser.add_argument('tabla', choices=sorted(IMPORTACIONES))
+    parser.add_argument('archivo', help="archivo .csv, .json (arreglo) o .jsonl")
+    parser.add_argument('--sqlite', metavar='RUTA', help="usar una base SQLite en lugar de MySQL")
+    parser.add_argument('--lote', type=int, default=LOTE, help="filas por transacción")
+    parser.add_argument('--load-data', action='store_true', help="usar LOAD DATA LOCAL INFILE (MySQL)")
+    args = parser.parse_args()
+
+    if args.sqlite:
+        backend = SQLiteBackend(args.sqlite)
+    elif args.load_data:
+        backend = MySQLBackend(allow_local_infile=True)
+    else:
+        backend = None
+    db = DatabaseManager(backend)
+
+    def mostrar(avance):
+        print(
+            f"\r{avance['procesadas']} filas: {avance['insertadas']} nuevas, "
+            f"{avance['actualizadas']} actualizadas, {avance['con_error']} con error",
+            end="", flush=True
+        )
+
+    try:
+        resultado = importar(db, args.tabla, args.archivo, args.lote, args.load_data, mostrar)
+    except (DatosInvalidosError, OSError) as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        db.close()
+    print(f"\nTerminado en {resultado.segundos:.1f}s")
+    for numero, mensaje in resultado.errores[:20]:
+        print(f"  fila {numero}: {mensaje}")
+    if resultado.con_error > 20:
+        print(f"  ... y {resultado.con_error - 20} errores más")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,299 @@
+import contextvars
+import functools
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+logger = logging.getLogger("sears.sql")
+
+UMBRAL_LENTO = float(os.environ.get('SEARS_SQL_LENTO_MS', 200)) / 1000
+UMBRAL_N_MAS_1 = 10          # repeticiones de una misma consulta dentro de una acción
+CUBETAS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+MAX_LENTAS = 100
+SIN_ACCION = "sin_accion"
+
+
+# ------------------------- ACCIÓN DE LA INTERFAZ -------------------------
+class Accion:
+    # Una acción del usuario (p. ej. "ventas.confirmar"). Cuenta cuántas veces
+    # corre cada consulta para detectar patrones N+1.
+    __slots__ = ('nombre', 'conteo', 'avisadas')
+
+    def __init__(self, nombre):
+        self.nombre = nombre
+        self.conteo = {}
+        self.avisadas = set()
+
+
+_accion_actual = contextvars.ContextVar('accion_ui', default=None)
+
+
+@contextmanager
+def accion(nombre):
+    # Las consultas hechas dentro del bloque (y en las tareas de DBWorker que
+    # se lancen desde él) se atribuyen a esta acción
+    token = _accion_actual.set(Accion(nombre))
+    try:
+        yield
+    finally:
+        _accion_actual.reset(token)
+
+
+def con_accion(plantilla):
+    # Decorador para métodos: la plantilla se llena con los argumentos,
+    # p. ej. @con_accion("departamentos.{0}") en handle_departamento_action
+    def decorador(funcion):
+        @functools.wraps(funcion)
+        def envoltura(self, *args, **kwargs):
+            with accion(plantilla.format(*args)):
+                return funcion(self, *args, **kwargs)
+        return envoltura
+    return decorador
+
+
+# ------------------------- HUELLAS DE SQL -------------------------
+_COMENTARIOS = re.compile(r"--[^\n]*|/\*.*?\*/", re.S)
+_CADENAS = re.compile(r"'(?:[^'\\]|\\.|'')*'")
+_NUMEROS = re.compile(r"\b\d+(?:\.\d+)?\b")
+_MARCADORES = re.compile(r"%s|\?")
+_LISTAS = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+_VALORES = re.compile(r"(VALUES\s*\(\.\.\.\))(?:\s*,\s*\(\.\.\.\))+", re.I)
+_ESPACIOS = re.compile(r"\s+")
+
+
+def huella(sql):
+    # Normaliza una sentencia para agrupar las que solo cambian en valores:
+    # literales y marcadores -> ?, listas IN (?, ?, ...) -> (...)
+    texto = _COMENTARIOS.sub(" ", sql)
+    texto = _CADENAS.sub("?", texto)
+    texto = _NUMEROS.sub("?", texto)
+    texto = _MARCADORES.sub("?", texto)
+    texto = _LISTAS.sub("(...)", texto)
+    texto = _VALORES.sub(r"\1", texto)
+    return _ESPACIOS.sub(" ", texto).strip()
+
+
+# ------------------------- MÉTRICAS -------------------------
+class EstadisticaConsulta:
+    __slots__ = ('huella', 'id', 'llamadas', 'total', 'maximo', 'filas', 'errores', 'cubetas', 'acciones')
+
+    def __init__(self, texto):
+        self.huella = texto
+        self.id = hashlib.sha1(texto.encode('utf-8')).hexdigest()[:12]
+        self.llamadas = 0
+        self.total = 0.0
+        self.maximo = 0.0
+        self.filas = 0
+        self.errores = 0
+        self.cubetas = [0] * (len(CUBETAS) + 1)     # la última: más que CUBETAS[-1]
+        self.acciones = {}      # acción -> llamadas
+
+    def como_dict(self):
+        return {
+            'id': self.id,
+            'huella': self.huella,
+            'llamadas': self.llamadas,
+            'total_ms': round(self.total * 1000, 3),
+            'promedio_ms': round(self.total * 1000 / self.llamadas, 3) if self.llamadas else 0.0,
+            'maximo_ms': round(self.maximo * 1000, 3),
+            'filas': self.filas,
+            'errores': self.errores,
+            'acciones': dict(self.acciones),
+        }
+
+
+class Instrumentacion:
+    # Tiempo, filas y acción de la interfaz de cada sentencia, agregados por
+    # huella. Registra las consultas lentas y avisa cuando una misma consulta
+    # se repite muchas veces dentro de una sola acción (N+1).
+    def __init__(self, umbral_lento=UMBRAL_LENTO, umbral_n_mas_1=UMBRAL_N_MAS_1):
+        self.umbral_lento = umbral_lento
+        self.umbral_n_mas_1 = umbral_n_mas_1
+        self.habilitada = True
+        self._lock = threading.Lock()
+        self._huellas = {}          # sql -> huella (las sentencias se repiten mucho)
+        self._stats = {}            # huella -> EstadisticaConsulta
+        self.lentas = deque(maxlen=MAX_LENTAS)
+        self.n_mas_1 = []
+
+    def registrar(self, sql, segundos, filas=0, error=False, repeticiones=1):
+        if not self.habilitada:
+            return
+        actual = _accion_actual.get()
+        nombre_accion = actual.nombre if actual is not None else SIN_ACCION
+
+        with self._lock:
+            texto = self._huellas.get(sql)
+            if texto is None:
+                texto = huella(sql)
+                if len(self._huellas) < 10000:
+                    self._huellas[sql] = texto
+            stats = self._stats.get(texto)
+            if stats is None:
+                stats = self._stats[texto] = EstadisticaConsulta(texto)
+            stats.llamadas += repeticiones
+            stats.total += segundos
+            stats.maximo = max(stats.maximo, segundos)
+            stats.filas += filas or 0
+            stats.errores += 1 if error else 0
+            stats.acciones[nombre_accion] = stats.acciones.get(nombre_accion, 0) + repeticiones
+            # executemany: repeticiones ejecuciones del tiempo promedio, así
+            # el histograma cuenta lo mismo que llamadas
+            por_ejecucion = segundos / repeticiones if repeticiones else segundos
+            for i, limite in enumerate(CUBETAS):
+                if por_ejecucion <= limite:
+                    stats.cubetas[i] += repeticiones
+                    break
+            else:
+                stats.cubetas[-1] += repeticiones
+
+            n_mas_1 = None
+            if actual is not None:
+                veces = actual.conteo.get(texto, 0) + 1
+                actual.conteo[texto] = veces
+                if veces >= self.umbral_n_mas_1 and texto not in actual.avisadas:
+                    actual.avisadas.add(texto)
+                    n_mas_1 = {'accion': nombre_accion, 'huella': texto, 'repeticiones': veces}
+                    self.n_mas_1.append(n_mas_1)
+
+            lenta = None
+            if segundos >= self.umbral_lento:
+                lenta = {
+                    'accion': nombre_accion,
+                    'huella': texto,
+                    'ms': round(segundos * 1000, 1),
+                    'filas': filas,
+                    'hora': time.strftime('%Y-%m-%d %H:%M:%S')
+                }
+                self.lentas.append(lenta)
+
+        if lenta is not None:
+            logger.warning("Consulta lenta (%.1f ms) en %s: %s", lenta['ms'], nombre_accion, texto)
+        if n_mas_1 is not None:
+            logger.warning(
+                "Posible N+1 en %s: la misma consulta corrió %d veces: %s",
+                nombre_accion, n_mas_1['repeticiones'], texto
+            )
+
+    @contextmanager
+    def medir(self, sql, repeticiones=1):
+        # Para sentencias que no devuelven filas (p. ej. dentro de una transacción)
+        inicio = time.perf_counter()
+        error = False
+        try:
+            yield
+        except BaseException:
+            error = True
+            raise
+        finally:
+            self.registrar(sql, time.perf_counter() - inicio, error=error, repeticiones=repeticiones)
+
+    def reiniciar(self):
+        with self._lock:
+            self._stats.clear()
+            self.lentas.clear()
+            self.n_mas_1.clear()
+
+    def resumen(self, limite=None, orden='total'):
+        with self._lock:
+            filas = [stats.como_dict() for stats in self._stats.values()]
+        filas.sort(key=lambda fila: fila[f'{orden}_ms' if orden != 'llamadas' else orden], reverse=True)
+        return filas[:limite] if limite else filas
+
+    # ------------------------- EXPORTACIÓN -------------------------
+    def exportar_json(self):
+        with self._lock:
+            lentas = list(self.lentas)
+            n_mas_1 = list(self.n_mas_1)
+        return json.dumps({
+            'consultas': self.resumen(),
+            'lentas': lentas,
+            'n_mas_1': n_mas_1,
+        }, indent=2, ensure_ascii=False, default=str)
+
+    def exportar_prometheus(self):
+        with self._lock:
+            stats = list(self._stats.values())
+            detecciones = len(self.n_mas_1)
+            lentas = len(self.lentas)
+            copias = [
+                (s.id, s.huella, s.llamadas, s.total, s.filas, s.errores, list(s.cubetas), dict(s.acciones))
+                for s in stats
+            ]
+
+        lineas = [
+            "# HELP sears_sql_consultas_total Sentencias ejecutadas por huella y acción de la interfaz",
+            "# TYPE sears_sql_consultas_total counter",
+        ]
+        for id_huella, _, _, _, _, _, _, acciones in copias:
+            for nombre, llamadas in sorted(acciones.items()):
+                lineas.append(
+                    f'sears_sql_consultas_total{{huella="{id_huella}",accion="{_escapar(nombre)}"}} {llamadas}'
+                )
+
+        lineas += [
+            "# HELP sears_sql_duracion_segundos Duración de las sentencias por huella",
+            "# TYPE sears_sql_duracion_segundos histogram",
+        ]
+        for id_huella, _, llamadas, total, _, _, cubetas, _ in copias:
+            acumulado = 0
+            for limite, cuenta in zip(CUBETAS, cubetas):
+                acumulado += cuenta
+                lineas.append(f'sears_sql_duracion_segundos_bucket{{huella="{id_huella}",le="{limite}"}} {acumulado}')
+            lineas.append(f'sears_sql_duracion_segundos_bucket{{huella="{id_huella}",le="+Inf"}} {sum(cubetas)}')
+            lineas.append(f'sears_sql_duracion_segundos_sum{{huella="{id_huella}"}} {total:.6f}')
+            lineas.append(f'sears_sql_duracion_segundos_count{{huella="{id_huella}"}} {sum(cubetas)}')
+
+        lineas += [
+            "# HELP sears_sql_filas_total Filas devueltas por huella",
+            "# TYPE sears_sql_filas_total counter",
+        ]
+        lineas += [f'sears_sql_filas_total{{huella="{c[0]}"}} {c[4]}' for c in copias]
+        lineas += [
+            "# HELP sears_sql_errores_total Sentencias con error por huella",
+            "# TYPE sears_sql_errores_total counter",
+        ]
+        lineas += [f'sears_sql_errores_total{{huella="{c[0]}"}} {c[5]}' for c in copias]
+        lineas += [
+            "# HELP sears_sql_huella_info Texto normalizado de cada huella",
+            "# TYPE sears_sql_huella_info gauge",
+        ]
+        lineas += [f'sears_sql_huella_info{{huella="{c[0]}",sql="{_escapar(c[1])}"}} 1' for c in copias]
+        lineas += [
+            "# HELP sears_sql_lentas Consultas lentas retenidas en memoria",
+            "# TYPE sears_sql_lentas gauge",
+            f"sears_sql_lentas {lentas}",
+            "# HELP sears_sql_n_mas_1_total Patrones N+1 detectados",
+            "# TYPE sears_sql_n_mas_1_total counter",
+            f"sears_sql_n_mas_1_total {detecciones}",
+        ]
+        return "\n".join(lineas) + "\n"
+
+
+def _escapar(texto):
+    return texto.replace("\\", "\\\\").replace('"', '\\"').replace("\n", " ")
+
+
+class CursorInstrumentado:
+    # Envuelve el cursor de una transacción para medir cada execute/executemany
+    def __init__(self, cursor, instrumentacion):
+        self._cursor = cursor
+        self._instrumentacion = instrumentacion
+
+    def execute(self, query, params=()):
+        with self._instrumentacion.medir(query):
+            return self._cursor.execute(query, params)
+
+    def executemany(self, query, seq_params):
+        seq_params = list(seq_params)
+        with self._instrumentacion.medir(query, repeticiones=len(seq_params) or 1):
+            return self._cursor.executemany(query, seq_params)
+
+    def __getattr__(self, nombre):
+        return getattr(self._cursor, nombre)
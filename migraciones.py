@@ -0,0 +1,486 @@
+import argparse
+import datetime
+
+from database_manager import DatabaseManager, SQLiteBackend
+from folios import ESQUEMA as ESQUEMA_FOLIOS
+from reservas import ESQUEMA as ESQUEMA_RESERVAS
+from resumenes import ESQUEMA as ESQUEMA_RESUMENES
+from reportes import REPORTES, armar_consulta
+from tablero import CONSULTA_HOY, CONSULTA_PRODUCTOS, CONSULTA_CAJEROS, CONSULTA_STOCK
+from paginacion import DEFINICIONES, TAM_PAGINA, consulta_pagina
+from referencias import CacheReferencias
+from sincronizacion import ELIMINACIONES, ULTIMA_ELIMINACION, crear_sincronizadores
+import archivo
+import busqueda
+import cache_productos
+import importacion
+import reservas
+import ventas
+
+# Uso:
+#   python migraciones.py estado
+#   python migraciones.py aplicar
+#   python migraciones.py explicar      (falla si una consulta frecuente recorre una tabla completa)
+# Sin --sqlite usa el backend de SEARS_DB_BACKEND (MySQL por defecto).
+#
+# Una base creada con los scripts del esquema ya trae todas las migraciones
+# (y sus filas en schema_version); estas son para las bases existentes.
+
+TABLA_VERSIONES = """CREATE TABLE IF NOT EXISTS schema_version (
+    version INT NOT NULL PRIMARY KEY,
+    descripcion VARCHAR(200) NOT NULL,
+    aplicada DATETIME DEFAULT CURRENT_TIMESTAMP
+)"""
+
+
+class Indice:
+    # motor: solo para ese backend (p. ej. SQLite no indexa las llaves
+    # foráneas por sí solo). reemplaza: índice que queda de más al crear
+    # este, porque sus columnas son el prefijo de las de este.
+    def __init__(self, tabla, nombre, columnas, reemplaza=None, motor=None):
+        self.tabla = tabla
+        self.nombre = nombre
+        self.columnas = columnas
+        self.reemplaza = reemplaza
+        self.motor = motor
+
+    def crear(self):
+        return f"CREATE INDEX {self.nombre} ON {self.tabla} ({', '.join(self.columnas)})"
+
+
+class ColumnaNueva:
+    # ALTER TABLE ... ADD COLUMN que se salta si la columna ya existe.
+    # motor: solo para ese backend (la definición puede cambiar entre motores)
+    def __init__(self, tabla, nombre, definicion, motor=None):
+        self.tabla = tabla
+        self.nombre = nombre
+        self.definicion = definicion
+        self.motor = motor
+
+    def crear(self):
+        return f"ALTER TABLE {self.tabla} ADD COLUMN {self.nombre} {self.definicion}"
+
+
+class Disparador:
+    # CREATE TRIGGER que se salta si ya existe (MySQL no tiene IF NOT EXISTS
+    # en todas las versiones); sql es la sentencia completa del motor
+    def __init__(self, nombre, sql, motor=None):
+        self.nombre = nombre
+        self.sql = sql
+        self.motor = motor
+
+
+class Migracion:
+    # Cada paso se puede repetir sin error (CREATE TABLE IF NOT EXISTS,
+    # índices que ya existen se saltan): en MySQL cada DDL confirma por sí
+    # solo, así que una migración interrumpida se vuelve a correr completa.
+    # por_motor: sentencias que solo aplican a un backend, {'mysql': [...]}.
+    # Orden: columnas, sentencias, disparadores e índices.
+    def __init__(self, version, descripcion, sentencias=(), indices=(), por_motor=None, columnas=(),
+                 disparadores=()):
+        self.version = version
+        self.descripcion = descripcion
+        self.sentencias = list(sentencias)
+        self.columnas = list(columnas)
+        self.disparadores = list(disparadores)
+        self.indices = list(indices)
+        self.por_motor = por_motor or {}
+
+
+# ------------------------- REFRESCO INCREMENTAL -------------------------
+# Lo que trajo el refresco incremental de los catálogos (sincronizacion.py)
+# a las bases creadas antes: fecha_actualizacion en los catálogos que no la
+# tenían, la tabla eliminaciones y los triggers que la llenan.
+CATALOGOS = [
+    ('departamentos', 'id_departamento'),
+    ('proveedores', 'id_proveedor'),
+    ('productos', 'id_producto'),
+    ('empleados', 'id_empleado'),
+    ('clientes', 'id_cliente'),
+]
+SIN_FECHA = ('departamentos', 'proveedores', 'empleados', 'clientes')
+
+ESQUEMA_ELIMINACIONES = [
+    """CREATE TABLE IF NOT EXISTS eliminaciones (
+        id_eliminacion INTEGER PRIMARY KEY AUTO_INCREMENT,
+        tabla VARCHAR(30) NOT NULL,
+        id_registro INT NOT NULL,
+        fecha DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""",
+]
+ESQUEMA_ELIMINACIONES_SQLITE = [
+    """CREATE TABLE IF NOT EXISTS eliminaciones (
+        id_eliminacion INTEGER PRIMARY KEY AUTOINCREMENT,
+        tabla VARCHAR(30) NOT NULL,
+        id_registro INT NOT NULL,
+        fecha DATETIME DEFAULT CURRENT_TIMESTAMP
+    )""",
+]
+
+
+def _columnas_fecha():
+    # SQLite no admite ADD COLUMN con DEFAULT CURRENT_TIMESTAMP: la columna
+    # entra sin default, las filas existentes se marcan con la hora actual y
+    # las nuevas las marca un trigger al insertarse
+    columnas = []
+    for tabla in SIN_FECHA:
+        columnas.append(ColumnaNueva(
+            tabla, 'fecha_actualizacion',
+            "DATETIME DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP", motor='mysql'
+        ))
+        columnas.append(ColumnaNueva(tabla, 'fecha_actualizacion', "DATETIME", motor='sqlite'))
+    return columnas
+
+
+def _disparadores_catalogos():
+    disparadores = []
+    for tabla, llave in CATALOGOS:
+        disparadores.append(Disparador(
+            f"{tabla}_eliminacion",
+            f"""CREATE TRIGGER {tabla}_eliminacion AFTER DELETE ON {tabla}
+            FOR EACH ROW
+                INSERT INTO eliminaciones (tabla, id_registro) VALUES ('{tabla}', OLD.{llave})""",
+            motor='mysql'
+        ))
+        disparadores.append(Disparador(
+            f"{tabla}_eliminacion",
+            f"""CREATE TRIGGER {tabla}_eliminacion
+            AFTER DELETE ON {tabla}
+            FOR EACH ROW
+            BEGIN
+                INSERT INTO eliminaciones (tabla, id_registro) VALUES ('{tabla}', OLD.{llave});
+            END""",
+            motor='sqlite'
+        ))
+        # Equivalente a ON UPDATE CURRENT_TIMESTAMP (y al default, en SQLite)
+        disparadores.append(Disparador(
+            f"{tabla}_fecha_actualizacion",
+            f"""CREATE TRIGGER {tabla}_fecha_actualizacion
+            AFTER UPDATE ON {tabla}
+            FOR EACH ROW WHEN NEW.fecha_actualizacion = OLD.fecha_actualizacion
+            BEGIN
+                UPDATE {tabla} SET fecha_actualizacion = CURRENT_TIMESTAMP
+                WHERE {llave} = NEW.{llave};
+            END""",
+            motor='sqlite'
+        ))
+        if tabla in SIN_FECHA:
+            disparadores.append(Disparador(
+                f"{tabla}_fecha_alta",
+                f"""CREATE TRIGGER {tabla}_fecha_alta
+                AFTER INSERT ON {tabla}
+                FOR EACH ROW WHEN NEW.fecha_actualizacion IS NULL
+                BEGIN
+                    UPDATE {tabla} SET fecha_actualizacion = CURRENT_TIMESTAMP
+                    WHERE {llave} = NEW.{llave};
+                END""",
+                motor='sqlite'
+            ))
+    return disparadores
+
+
+# Se aplican en el orden de esta lista, no por número de versión
+MIGRACIONES = [
+    Migracion(
+        1, "Totales por día e índice de ventas por fecha",
+        sentencias=ESQUEMA_RESUMENES,
+        indices=[
+            Indice('ventas', 'idx_ventas_fecha', ['fecha']),
+            Indice('productos', 'idx_productos_departamento', ['id_departamento'], motor='sqlite'),
+            Indice('productos', 'idx_productos_proveedor', ['id_proveedor'], motor='sqlite'),
+            Indice('empleados', 'idx_empleados_departamento', ['id_departamento'], motor='sqlite'),
+            Indice('ventas', 'idx_ventas_empleado', ['id_empleado'], motor='sqlite'),
+            Indice('ventas', 'idx_ventas_cliente', ['id_cliente'], motor='sqlite'),
+            Indice('detalle_ventas', 'idx_detalle_ventas_venta', ['id_venta'], motor='sqlite'),
+            Indice('detalle_ventas', 'idx_detalle_ventas_producto', ['id_producto'], motor='sqlite'),
+            Indice('inventario', 'idx_inventario_producto', ['id_producto'], motor='sqlite'),
+        ]
+    ),
+    # La 7 se agregó después, pero la 2 indexa sus columnas: va antes
+    Migracion(
+        7, "Fecha de actualización y registro de borrados en los catálogos",
+        columnas=_columnas_fecha(),
+        por_motor={
+            'mysql': ESQUEMA_ELIMINACIONES,
+            'sqlite': ESQUEMA_ELIMINACIONES_SQLITE + [
+                f"UPDATE {tabla} SET fecha_actualizacion = CURRENT_TIMESTAMP WHERE fecha_actualizacion IS NULL"
+                for tabla in SIN_FECHA
+            ],
+        },
+        disparadores=_disparadores_catalogos(),
+        indices=[
+            Indice('eliminaciones', 'idx_eliminaciones_tabla', ['tabla', 'id_eliminacion']),
+        ]
+    ),
+    # InnoDB agrega la llave primaria a cada índice secundario: (nombre)
+    # sirve para ORDER BY nombre, id de la paginación por keyset. En MySQL,
+    # el índice que creó la llave foránea se descarta solo cuando otro
+    # índice empieza con la misma columna.
+    Migracion(
+        2, "Índices para las consultas frecuentes",
+        indices=[
+            # Paginación de catálogos y búsquedas por nombre
+            Indice('productos', 'idx_productos_nombre', ['nombre']),
+            Indice('clientes', 'idx_clientes_nombre', ['nombre']),
+            Indice('empleados', 'idx_empleados_nombre', ['nombre']),
+            Indice('proveedores', 'idx_proveedores_nombre', ['nombre']),
+            Indice('departamentos', 'idx_departamentos_nombre', ['nombre']),
+            # Refresco incremental (WHERE fecha_actualizacion >= ...)
+            Indice('productos', 'idx_productos_actualizacion', ['fecha_actualizacion']),
+            Indice('clientes', 'idx_clientes_actualizacion', ['fecha_actualizacion']),
+            Indice('empleados', 'idx_empleados_actualizacion', ['fecha_actualizacion']),
+            Indice('proveedores', 'idx_proveedores_actualizacion', ['fecha_actualizacion']),
+            Indice('departamentos', 'idx_departamentos_actualizacion', ['fecha_actualizacion']),
+            # Tablero: poco stock, ya en el orden en que se muestra
+            Indice('productos', 'idx_productos_stock', ['stock', 'nombre']),
+            # Ventas de un cajero por fecha; también sirve a la llave foránea
+            Indice('ventas', 'idx_ventas_empleado_fecha', ['id_empleado', 'fecha'],
+                   reemplaza='idx_ventas_empleado'),
+            # Cubre la cancelación y los totales por venta sin leer la tabla
+            Indice('detalle_ventas', 'idx_detalle_ventas_venta_producto',
+                   ['id_venta', 'id_producto', 'cantidad', 'importe'],
+                   reemplaza='idx_detalle_ventas_venta'),
+            # Movimientos de un producto por fecha
+            Indice('inventario', 'idx_inventario_producto_fecha', ['id_producto', 'fecha'],
+                   reemplaza='idx_inventario_producto'),
+        ]
+    ),
+    Migracion(
+        3, "Tablas históricas de ventas e inventario",
+        por_motor={'mysql': archivo.ESQUEMA_MYSQL, 'sqlite': archivo.ESQUEMA_SQLITE},
+        indices=[
+            # El archivo recorre los movimientos viejos por fecha
+            Indice('inventario', 'idx_inventario_fecha', ['fecha']),
+        ]
+    ),
+    Migracion(4, "Contador de folios por terminal", sentencias=ESQUEMA_FOLIOS),
+    Migracion(
+        5, "Versión de fila en los catálogos",
+        # Control de concurrencia optimista (CatalogService.guardar_cambios)
+        columnas=[
+            ColumnaNueva(tabla, 'version', "INT NOT NULL DEFAULT 0")
+            for tabla in ('departamentos', 'proveedores', 'productos', 'empleados', 'clientes')
+        ]
+    ),
+    Migracion(
+        6, "Apartados de stock por caja",
+        sentencias=ESQUEMA_RESERVAS,
+        indices=[
+            # Lo apartado por producto al agregar al carrito y al cobrar
+            Indice('reservas_stock', 'idx_reservas_producto_vence', ['id_producto', 'vence']),
+        ]
+    ),
+    Migracion(
+        8, "Índice de empleados por nivel de acceso",
+        indices=[
+            # Combo de cajeros (CacheReferencias): WHERE nivel_acceso > 0
+            Indice('empleados', 'idx_empleados_nivel_acceso', ['nivel_acceso']),
+        ]
+    ),
+]
+
+
+# ------------------------- APLICACIÓN -------------------------
+def versiones_aplicadas(db):
+    with db.transaction() as cursor:
+        cursor.execute(TABLA_VERSIONES)
+    with db.transaction() as cursor:
+        cursor.execute("SELECT version FROM schema_version")
+        return {fila['version'] for fila in cursor.fetchall()}
+
+
+def pendientes(db):
+    aplicadas = versiones_aplicadas(db)
+    return [m for m in MIGRACIONES if m.version not in aplicadas]
+
+
+def aplicar_migracion(db, migracion):
+    backend = db.backend
+    # Las columnas primero: las sentencias y los triggers pueden usarlas
+    for columna in migracion.columnas:
+        if columna.motor is not None and columna.motor != backend.nombre:
+            continue
+        with db.transaction() as cursor:
+            if not backend.existe_columna(cursor, columna.tabla, columna.nombre):
+                cursor.execute(columna.crear())
+    for sentencia in migracion.sentencias + migracion.por_motor.get(backend.nombre, []):
+        with db.transaction() as cursor:
+            cursor.execute(sentencia)
+    for disparador in migracion.disparadores:
+        if disparador.motor is not None and disparador.motor != backend.nombre:
+            continue
+        with db.transaction() as cursor:
+            if not backend.existe_disparador(cursor, disparador.nombre):
+                cursor.execute(disparador.sql)
+    for indice in migracion.indices:
+        if indice.motor is not None and indice.motor != backend.nombre:
+            continue
+        with db.transaction() as cursor:
+            if not backend.existe_indice(cursor, indice.tabla, indice.nombre):
+                cursor.execute(indice.crear())
+        if indice.reemplaza and backend.nombre == 'sqlite':
+            with db.transaction() as cursor:
+                cursor.execute(backend.borrar_indice(indice.tabla, indice.reemplaza))
+    with db.transaction() as cursor:
+        cursor.execute(
+            "INSERT INTO schema_version (version, descripcion) VALUES (%s, %s)",
+            (migracion.version, migracion.descripcion)
+        )
+
+
+def aplicar(db, progreso=None):
+    # Regresa las versiones aplicadas, en orden
+    aplicadas = []
+    for migracion in pendientes(db):
+        aplicar_migracion(db, migracion)
+        aplicadas.append(migracion.version)
+        if progreso is not None:
+            progreso(migracion)
+    return aplicadas
+
+
+# ------------------------- PLANES DE EJECUCIÓN -------------------------
+class ConsultaFrecuente:
+    # Una consulta que la aplicación emite a menudo, con parámetros de
+    # ejemplo. escaneo_permitido: tablas que se pueden leer completas
+    # (p. ej. la que se agrupa entera en un reporte).
+    def __init__(self, nombre, consulta, params=(), escaneo_permitido=()):
+        self.nombre = nombre
+        self.consulta = consulta
+        self.params = tuple(params)
+        self.escaneo_permitido = set(escaneo_permitido)
+
+
+def _paginas(tabla):
+    # Las que pide ModeloPaginado: primera página por nombre, la siguiente
+    # (keyset) y la primera con el filtro de texto
+    definicion = DEFINICIONES[tabla]
+    ultima = {c.campo: 'M' if c.es_texto else 0 for c in definicion.columnas}
+    for sufijo, filtro, desde in (('', '', None), ('.siguiente', '', ultima), ('.filtro', 'juan', None)):
+        consulta, params = consulta_pagina(definicion, 1, False, filtro, desde, TAM_PAGINA + 1)
+        yield ConsultaFrecuente(f'catalogo.{tabla}{sufijo}', consulta, params)
+
+
+def _sincronizaciones(origen, sincronizadores, desde):
+    # Los cambios desde la última marca; la carga completa solo cuando
+    # filtra (sin filtro lee la tabla entera a propósito)
+    for tabla, sincronizador in sincronizadores.items():
+        consulta = sincronizador.consulta_cambios()
+        yield ConsultaFrecuente(f'{origen}.{tabla}', consulta, (desde,) * consulta.count('%s'))
+        if sincronizador.filtro_completo:
+            yield ConsultaFrecuente(f'{origen}.{tabla}.completa', sincronizador.consulta_completa())
+
+
+def consultas_frecuentes():
+    # Armadas con las mismas cadenas (o funciones) que usa la aplicación,
+    # para revisar la consulta que de verdad se emite
+    hoy = datetime.date.today()
+    mes = hoy - datetime.timedelta(days=30)
+    desde = f"{hoy} 00:00:00"
+    dos = ", ".join(["%s"] * 2)
+    consultas = []
+    for tabla in DEFINICIONES:
+        consultas.extend(_paginas(tabla))
+    consultas.extend(_sincronizaciones('sincronizacion', crear_sincronizadores(None), desde))
+    consultas.extend(_sincronizaciones('referencias', CacheReferencias(None).sincronizadores(), desde))
+    consultas.extend(_sincronizaciones(
+        'busqueda', {'productos': busqueda.BuscadorProductos(None).sincronizador}, desde
+    ))
+    consultas += [
+        ConsultaFrecuente('sincronizacion.eliminaciones', ELIMINACIONES, ('productos', 0)),
+        ConsultaFrecuente('sincronizacion.ultima_eliminacion', ULTIMA_ELIMINACION, ('productos',)),
+        ConsultaFrecuente('busqueda.codigo', busqueda.POR_CODIGO, ('7501000000001',)),
+        ConsultaFrecuente('busqueda.id', busqueda.POR_ID, (1,)),
+        ConsultaFrecuente('busqueda.por_ids', busqueda.POR_IDS.format(marcadores=dos), (1, 2)),
+        ConsultaFrecuente('cache_productos.recientes', cache_productos.RECIENTES, (500,)),
+        ConsultaFrecuente('cache_productos.cambios', cache_productos.CAMBIOS, (desde,)),
+        ConsultaFrecuente(
+            'importacion.existentes',
+            importacion.EXISTENTES.format(
+                llave='id_producto', natural='codigo_barras', tabla='productos', marcadores=dos
+            ),
+            ('7501000000001', '7501000000002')
+        ),
+        ConsultaFrecuente('ventas.bloquear_stock', ventas.BLOQUEAR_STOCK.format(marcadores=dos), (1, 2)),
+        ConsultaFrecuente(
+            'ventas.apartado_otras_cajas', ventas.APARTADO_OTRAS_CAJAS.format(marcadores=dos), (1, 2, '01')
+        ),
+        ConsultaFrecuente('ventas.cancelar', ventas.CANTIDADES_VENDIDAS, (1,)),
+        ConsultaFrecuente('reservas.contar', reservas.CONTAR, ('01', '01', 1)),
+        ConsultaFrecuente('archivo.ventas', archivo.VENTAS_POR_ARCHIVAR, (f"{mes} 00:00:00", archivo.LOTE_ARCHIVO)),
+        ConsultaFrecuente(
+            'archivo.inventario', archivo.INVENTARIO_POR_ARCHIVAR, (f"{mes} 00:00:00", archivo.LOTE_ARCHIVO)
+        ),
+        ConsultaFrecuente('tablero.hoy', CONSULTA_HOY),
+        ConsultaFrecuente('tablero.productos', CONSULTA_PRODUCTOS, (10,)),
+        ConsultaFrecuente('tablero.cajeros', CONSULTA_CAJEROS),
+        ConsultaFrecuente('tablero.stock', CONSULTA_STOCK, (5, 20)),
+    ]
+    for nombre, reporte in REPORTES.items():
+        consulta, params = armar_consulta(reporte, mes, hoy)
+        consultas.append(ConsultaFrecuente(f'reporte.{nombre}', consulta, params))
+        consulta, params = armar_consulta(reporte, mes, hoy, empleado=1)
+        consultas.append(ConsultaFrecuente(f'reporte.{nombre}.empleado', consulta, params))
+        consulta, params = armar_consulta(reporte, mes, hoy, archivadas=True)
+        consultas.append(ConsultaFrecuente(f'reporte.{nombre}.archivadas', consulta, params))
+    return consultas
+
+
+def revisar_planes(db, consultas=None):
+    # [(consulta, plan, escaneos)]: escaneos son las tablas que el plan
+    # lee completas sin estar permitidas. El plan depende de las
+    # estadísticas: conviene correrlo sobre una base con datos (p. ej. la
+    # que siembra benchmark.py), no sobre una recién creada.
+    resultado = []
+    for consulta in consultas or consultas_frecuentes():
+        with db.transaction() as cursor:
+            plan = db.backend.plan(cursor, consulta.consulta, consulta.params)
+        escaneos = [
+            tabla for tabla, _, completo in plan
+            if completo and tabla not in consulta.escaneo_permitido
+        ]
+        resultado.append((consulta, plan, escaneos))
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de sears_db")
+    parser.add_argument('comando', choices=['estado', 'aplicar', 'explicar'])
+    parser.add_argument('--sqlite', metavar='RUTA', help="usar una base SQLite en lugar de MySQL")
+    parser.add_argument('-v', '--detalle', action='store_true', help="mostrar el plan de cada consulta")
+    args = parser.parse_args()
+
+    db = DatabaseManager(SQLiteBackend(args.sqlite) if args.sqlite else None)
+    try:
+        if args.comando == 'estado':
+            aplicadas = versiones_aplicadas(db)
+            for migracion in MIGRACIONES:
+                marca = "aplicada " if migracion.version in aplicadas else "pendiente"
+                print(f"{migracion.version:>3}  {marca}  {migracion.descripcion}")
+            return 0
+
+        if args.comando == 'aplicar':
+            aplicadas = aplicar(
+                db, progreso=lambda m: print(f"Aplicada {m.version}: {m.descripcion}")
+            )
+            print(f"{len(aplicadas)} migraciones aplicadas" if aplicadas else "El esquema está al día")
+            return 0
+
+        fallas = 0
+        for consulta, plan, escaneos in revisar_planes(db):
+            if escaneos:
+                fallas += 1
+                print(f"ESCANEO  {consulta.nombre}: {', '.join(escaneos)}")
+            elif args.detalle:
+                print(f"ok       {consulta.nombre}")
+            if escaneos or args.detalle:
+                for tabla, detalle, _ in plan:
+                    print(f"           {tabla}: {detalle}" if tabla else f"           {detalle}")
+        print(f"{fallas} consultas recorren tablas completas")
+        return 1 if fallas else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
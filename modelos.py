@@ -0,0 +1,432 @@
+from bisect import bisect_left
+
+from PyQt6.QtCore import Qt, QAbstractListModel, QAbstractTableModel, QModelIndex
+from PyQt6.QtGui import QColor
+
+from busqueda import normalizar
+from carrito import Carrito
+from instrumentacion import accion
+from paginacion import TAM_PAGINA, consulta_pagina, texto, moneda
+
+
+class ModeloPaginado(QAbstractTableModel):
+    # Modelo perezoso para los catálogos: trae páginas con paginación keyset
+    # conforme el usuario se desplaza (canFetchMore/fetchMore), y el orden y
+    # el filtro se resuelven en SQL. Los cambios posteriores llegan por el
+    # SincronizadorTabla y se aplican solo a las filas afectadas.
+    def __init__(self, db, worker, definicion, sincronizador, tam_pagina=TAM_PAGINA, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.worker = worker
+        self.definicion = definicion
+        self.sincronizador = sincronizador
+        self.tam_pagina = tam_pagina
+        self._filas = []
+        self._claves = []        # clave de orden de cada fila (_clave_orden)
+        self._pos = {}           # llave -> índice de fila
+        self._hay_mas = False
+        self._cargando = False
+        self._generacion = 0
+        self._columna_orden = 0
+        self._descendente = False
+        self._filtro = ""
+        self.iniciado = False
+
+    # ------------------------- INTERFAZ QT -------------------------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._filas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.definicion.columnas)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            columna = self.definicion.columnas[index.column()]
+            return columna.formato(self._filas[index.row()][columna.campo])
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.definicion.columnas[section].encabezado
+        return super().headerData(section, orientation, role)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        return not parent.isValid() and self._hay_mas and not self._cargando
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or not self._hay_mas or self._cargando:
+            return
+        self._cargando = True
+        ultima = self._filas[-1] if self._filas else None
+        with accion(f"tabla.{self.sincronizador.tabla}"):
+            self.worker.ejecutar(
+                self._consultar_pagina, ultima, self._generacion,
+                al_terminar=self._agregar_pagina,
+                al_finalizar=lambda g=self._generacion: self._fin_carga(g)
+            )
+
+    def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+        descendente = order == Qt.SortOrder.DescendingOrder
+        if (column, descendente) == (self._columna_orden, self._descendente):
+            return
+        self._columna_orden = column
+        self._descendente = descendente
+        # Antes de la primera carga solo se recuerda el orden
+        if self.iniciado:
+            self.recargar()
+
+    # ------------------------- API -------------------------
+    def llave_en(self, row):
+        if 0 <= row < len(self._filas):
+            return self._filas[row][self.definicion.llave]
+        return None
+
+    def filtrar(self, texto_filtro):
+        texto_filtro = texto_filtro.strip()
+        if texto_filtro == self._filtro and self.iniciado:
+            return
+        self._filtro = texto_filtro
+        self.recargar()
+
+    def recargar(self):
+        # Vuelve a la primera página; los resultados de cargas anteriores se ignoran
+        self.iniciado = True
+        self._generacion += 1
+        self.beginResetModel()
+        self._filas = []
+        self._claves = []
+        self._pos = {}
+        self._hay_mas = False
+        self.endResetModel()
+        self._cargando = True
+        with accion(f"tabla.{self.sincronizador.tabla}"):
+            self.worker.ejecutar(
+                self._consultar_primera_pagina, self._generacion,
+                al_terminar=self._agregar_pagina,
+                al_finalizar=lambda g=self._generacion: self._fin_carga(g),
+                clave=id(self)
+            )
+
+    def recargar_fila(self, id_registro):
+        # Tras guardar o detectar un conflicto: trae solo esa fila y la
+        # acomoda (o la quita si ya no existe o no cumple el filtro)
+        if not self.iniciado:
+            return
+        with accion(f"tabla.{self.sincronizador.tabla}"):
+            self.worker.ejecutar(
+                self._consultar_fila, id_registro, self._generacion,
+                al_terminar=self._aplicar_fila_consultada,
+                clave=(id(self), "fila", id_registro)
+            )
+
+    def refrescar(self):
+        if not self.iniciado:
+            self.recargar()
+            return
+        with accion(f"tabla.{self.sincronizador.tabla}"):
+            self.worker.ejecutar(
+                self.sincronizador.consultar,
+                al_terminar=self.aplicar_cambios,
+                clave=(id(self), "cambios")
+            )
+
+    # ------------------------- CONSULTAS (hilo de trabajo) -------------------------
+    def _consultar_primera_pagina(self, generacion):
+        # Primero las marcas de sincronización, para no perder cambios que
+        # ocurran mientras se lee la página
+        self.sincronizador.reiniciar()
+        cambios = self.sincronizador.consultar(solo_marcas=True)
+        pagina = self._consultar_pagina(None, generacion)
+        return pagina[0], pagina[1], cambios
+
+    def _consultar_pagina(self, ultima, generacion):
+        query, params = consulta_pagina(
+            self.definicion, self._columna_orden, self._descendente, self._filtro, ultima, self.tam_pagina + 1
+        )
+        filas = self.db.execute_query(query, params, fetch=True)
+        return generacion, filas
+
+    def _consultar_fila(self, id_registro, generacion):
+        definicion = self.definicion
+        campos = ", ".join(f"{c.expresion} AS {c.campo}" for c in definicion.columnas)
+        filas = self.db.execute_query(
+            f"SELECT {campos} FROM {definicion.origen} WHERE {definicion.expresion_llave} = %s",
+            (id_registro,),
+            fetch=True
+        )
+        return generacion, id_registro, filas
+
+    # ------------------------- RESULTADOS (hilo principal) -------------------------
+    def _fin_carga(self, generacion):
+        if generacion == self._generacion:
+            self._cargando = False
+
+    def _agregar_pagina(self, resultado):
+        generacion, filas = resultado[0], resultado[1]
+        if generacion != self._generacion or filas is None:
+            return
+        if len(resultado) > 2:
+            self.sincronizador.confirmar(resultado[2])
+
+        self._hay_mas = len(filas) > self.tam_pagina
+        filas = filas[:self.tam_pagina]
+        # Una fila pudo llegar antes por la sincronización
+        filas = [fila for fila in filas if fila[self.definicion.llave] not in self._pos]
+        if not filas:
+            return
+        inicio = len(self._filas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(filas) - 1)
+        for fila in filas:
+            self._pos[fila[self.definicion.llave]] = len(self._filas)
+            self._filas.append(fila)
+            self._claves.append(self._clave_orden(fila))
+        self.endInsertRows()
+
+    def _aplicar_fila_consultada(self, resultado):
+        generacion, id_registro, filas = resultado
+        if generacion != self._generacion or filas is None:
+            return
+        if filas:
+            self._aplicar_fila(filas[0])
+        else:
+            self._aplicar_eliminado(id_registro)
+
+    def aplicar_cambios(self, cambios):
+        if not self.sincronizador.confirmar(cambios):
+            return
+        for fila in cambios.filas:
+            self._aplicar_fila(fila)
+        for id_registro in cambios.eliminados:
+            self._aplicar_eliminado(id_registro)
+
+    def _aplicar_fila(self, fila):
+        row = self._pos.get(fila[self.definicion.llave])
+        if row is not None:
+            if not self._cumple_filtro(fila):
+                self._quitar(row)
+                return
+            if self._clave_orden(fila) != self._claves[row]:
+                # Cambió el valor de la columna del orden: se mueve a su lugar
+                self._quitar(row)
+                self._insertar(fila)
+                return
+            self._filas[row] = fila
+            self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.definicion.columnas) - 1))
+        elif self._cumple_filtro(fila):
+            self._insertar(fila)
+
+    def _aplicar_eliminado(self, id_registro):
+        row = self._pos.get(id_registro)
+        if row is not None:
+            self._quitar(row)
+
+    def _cumple_filtro(self, fila):
+        if not self._filtro:
+            return True
+        filtro = self._filtro.lower()
+        return any(
+            filtro in texto(fila[c.campo]).lower()
+            for c in self.definicion.columnas if c.es_texto
+        )
+
+    def _clave_orden(self, fila):
+        # Compara como el ORDER BY de la base: el texto según la intercalación
+        # (sin distinguir mayúsculas ni acentos) y NULL antes que cualquier
+        # valor; en orden descendente, al revés
+        columna = self.definicion.columnas[self._columna_orden]
+        valor = columna.valor_orden(fila)
+        if columna.es_texto:
+            valor = normalizar(valor)
+        clave = (valor is not None, valor)
+        if self._descendente:
+            return (_Invertido(clave), -fila[self.definicion.llave])
+        return (clave, fila[self.definicion.llave])
+
+    def _insertar(self, fila):
+        # Solo se inserta si cae dentro del rango ya cargado; si no, llegará
+        # con la página que le corresponda
+        clave = self._clave_orden(fila)
+        row = bisect_left(self._claves, clave)
+        if row == len(self._filas) and self._hay_mas:
+            return
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._filas.insert(row, fila)
+        self._claves.insert(row, clave)
+        self.endInsertRows()
+        self._reindexar(row)
+
+    def _quitar(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        fila = self._filas.pop(row)
+        del self._claves[row]
+        self.endRemoveRows()
+        del self._pos[fila[self.definicion.llave]]
+        self._reindexar(row)
+
+    def _reindexar(self, desde):
+        llave = self.definicion.llave
+        for row in range(desde, len(self._filas)):
+            self._pos[self._filas[row][llave]] = row
+
+
+class ModeloReferencias(QAbstractListModel):
+    # Lista ordenada por nombre para combos y completadores. Se sincroniza
+    # contra los datos de CacheReferencias moviendo solo las filas que
+    # cambiaron, sin clear() ni volver a llenar el combo.
+    def __init__(self, fijos=(), parent=None):
+        super().__init__(parent)
+        self._fijos = list(fijos)   # [(texto, id)] al inicio, p. ej. "Cliente General"
+        self._claves = []           # (texto en minúsculas, id) en orden
+        self._textos = {}           # id -> texto
+        self.cargado = False
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._fijos) + len(self._claves)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if row < len(self._fijos):
+            texto_fila, id_registro = self._fijos[row]
+        else:
+            id_registro = self._claves[row - len(self._fijos)][1]
+            texto_fila = self._textos[id_registro]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return texto_fila
+        if role == Qt.ItemDataRole.UserRole:
+            return id_registro
+        return None
+
+    def sincronizar(self, datos):
+        if not self.cargado:
+            self.beginResetModel()
+            self._textos = dict(datos)
+            self._claves = sorted((t.lower(), i) for i, t in datos.items())
+            self.endResetModel()
+            self.cargado = True
+            return
+        for id_registro in [i for i in self._textos if i not in datos]:
+            self._quitar(id_registro)
+        for id_registro, texto_fila in datos.items():
+            anterior = self._textos.get(id_registro)
+            if anterior is None:
+                self._insertar(id_registro, texto_fila)
+            elif anterior != texto_fila:
+                self._renombrar(id_registro, anterior, texto_fila)
+
+    def _insertar(self, id_registro, texto_fila):
+        clave = (texto_fila.lower(), id_registro)
+        row = bisect_left(self._claves, clave)
+        inicio = len(self._fijos) + row
+        self.beginInsertRows(QModelIndex(), inicio, inicio)
+        self._claves.insert(row, clave)
+        self._textos[id_registro] = texto_fila
+        self.endInsertRows()
+
+    def _quitar(self, id_registro):
+        row = bisect_left(self._claves, (self._textos[id_registro].lower(), id_registro))
+        inicio = len(self._fijos) + row
+        self.beginRemoveRows(QModelIndex(), inicio, inicio)
+        del self._claves[row]
+        del self._textos[id_registro]
+        self.endRemoveRows()
+
+    def _renombrar(self, id_registro, anterior, texto_fila):
+        # Se mueve la fila en lugar de quitarla y volver a insertarla, para que
+        # el combo conserve la selección
+        origen = bisect_left(self._claves, (anterior.lower(), id_registro))
+        clave = (texto_fila.lower(), id_registro)
+        destino = bisect_left(self._claves, clave)
+        fijos = len(self._fijos)
+        if destino in (origen, origen + 1):
+            self._claves[origen] = clave
+            self._textos[id_registro] = texto_fila
+            indice = self.index(fijos + origen)
+            self.dataChanged.emit(indice, indice)
+            return
+        self.beginMoveRows(QModelIndex(), fijos + origen, fijos + origen, QModelIndex(), fijos + destino)
+        del self._claves[origen]
+        self._claves.insert(destino - 1 if destino > origen else destino, clave)
+        self._textos[id_registro] = texto_fila
+        self.endMoveRows()
+
+
+class ModeloCarrito(QAbstractTableModel):
+    # El carrito de la caja en la tabla de ventas. Agregar, quitar y vaciar
+    # pasan por aquí para que la vista solo repinte la fila que cambió; la
+    # última columna es el botón para quitar la línea.
+    ENCABEZADOS = ["ID", "Nombre", "Cantidad", "Subtotal", "Quitar"]
+    COLUMNA_QUITAR = 4
+
+    def __init__(self, carrito=None, parent=None):
+        super().__init__(parent)
+        self.carrito = carrito if carrito is not None else Carrito()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.carrito)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.ENCABEZADOS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        columna = index.column()
+        if role == Qt.ItemDataRole.DisplayRole:
+            linea = self.carrito.fila(index.row())
+            return (texto(linea.id), linea.nombre, texto(linea.cantidad), moneda(linea.subtotal), "X")[columna]
+        if columna == self.COLUMNA_QUITAR:
+            if role == Qt.ItemDataRole.BackgroundRole:
+                return QColor("#ffcccc")
+            if role == Qt.ItemDataRole.TextAlignmentRole:
+                return Qt.AlignmentFlag.AlignCenter
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.ENCABEZADOS[section]
+        return super().headerData(section, orientation, role)
+
+    def cantidad(self, id_producto):
+        return self.carrito.cantidad(id_producto)
+
+    def agregar(self, producto, cantidad, disponible):
+        row = self.carrito.posicion(producto["id_producto"])
+        if row is None:
+            row = len(self.carrito)
+            self.beginInsertRows(QModelIndex(), row, row)
+            linea = self.carrito.agregar(producto, cantidad, disponible)
+            self.endInsertRows()
+            return linea
+        linea = self.carrito.agregar(producto, cantidad, disponible)
+        # Solo cantidad y subtotal
+        self.dataChanged.emit(self.index(row, 2), self.index(row, 3))
+        return linea
+
+    def quitar(self, row):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        linea = self.carrito.quitar(row)
+        self.endRemoveRows()
+        return linea
+
+    def vaciar(self):
+        self.beginResetModel()
+        self.carrito.vaciar()
+        self.endResetModel()
+
+
+class _Invertido:
+    # Invierte la comparación de un valor para buscar en orden descendente
+    __slots__ = ('valor',)
+
+    def __init__(self, valor):
+        self.valor = valor
+
+    def __lt__(self, otro):
+        return self.valor > otro.valor
+
+    def __eq__(self, otro):
+        return self.valor == otro.valor
@@ -0,0 +1,132 @@
+TAM_PAGINA = 200
+
+
+def texto(valor):
+    return "" if valor is None else str(valor)
+
+
+def moneda(valor):
+    return "" if valor is None else f"${valor:.2f}"
+
+
+class Columna:
+    __slots__ = ('campo', 'encabezado', 'expresion', 'formato', 'es_texto', 'nulo')
+
+    def __init__(self, campo, encabezado, expresion=None, formato=texto, es_texto=True, nulo=True):
+        self.campo = campo
+        self.encabezado = encabezado
+        self.expresion = expresion or campo
+        self.formato = formato
+        self.es_texto = es_texto
+        self.nulo = nulo
+
+    @property
+    def orden(self):
+        # Las columnas de texto pueden ser NULL; para el keyset se tratan como ''.
+        # Las NOT NULL se ordenan por la columna tal cual, así el ORDER BY
+        # puede leer su índice (p. ej. idx_productos_nombre) en lugar de ordenar
+        if self.es_texto and self.nulo:
+            return f"COALESCE({self.expresion}, '')"
+        return self.expresion
+
+    def valor_orden(self, fila):
+        valor = fila[self.campo]
+        if self.es_texto:
+            return "" if valor is None else str(valor)
+        return valor
+
+
+class DefinicionTabla:
+    def __init__(self, origen, llave, expresion_llave, columnas):
+        self.origen = origen                    # FROM ... (con JOINs)
+        self.llave = llave                      # campo llave en cada fila
+        self.expresion_llave = expresion_llave  # llave en SQL (p. ej. p.id_producto)
+        self.columnas = columnas
+
+
+DEFINICIONES = {
+    'departamentos': DefinicionTabla(
+        "departamentos", 'id_departamento', 'id_departamento', [
+            Columna('id_departamento', "ID", es_texto=False),
+            Columna('nombre', "Nombre", nulo=False),
+            Columna('ubicacion', "Ubicación"),
+            Columna('encargado', "Encargado"),
+        ]
+    ),
+    'proveedores': DefinicionTabla(
+        "proveedores", 'id_proveedor', 'id_proveedor', [
+            Columna('id_proveedor', "ID", es_texto=False),
+            Columna('nombre', "Nombre", nulo=False),
+            Columna('contacto', "Contacto"),
+            Columna('telefono', "Teléfono"),
+        ]
+    ),
+    'productos': DefinicionTabla(
+        "productos p LEFT JOIN departamentos d ON p.id_departamento = d.id_departamento",
+        'id_producto', 'p.id_producto', [
+            Columna('id_producto', "ID", 'p.id_producto', es_texto=False),
+            Columna('nombre', "Nombre", 'p.nombre', nulo=False),
+            Columna('descripcion', "Descripción", 'p.descripcion'),
+            Columna('precio_costo', "Precio Costo", 'p.precio_costo', moneda, es_texto=False),
+            Columna('precio_publico', "Precio Público", 'p.precio_publico', moneda, es_texto=False),
+            Columna('stock', "Stock", 'p.stock', es_texto=False),
+            Columna('departamento', "Departamento", 'd.nombre'),
+        ]
+    ),
+    'empleados': DefinicionTabla(
+        "empleados e LEFT JOIN departamentos d ON e.id_departamento = d.id_departamento",
+        'id_empleado', 'e.id_empleado', [
+            Columna('id_empleado', "ID", 'e.id_empleado', es_texto=False),
+            Columna('nombre', "Nombre", 'e.nombre', nulo=False),
+            Columna('domicilio', "Domicilio", 'e.domicilio'),
+            Columna('puesto', "Puesto", 'e.puesto'),
+            Columna('departamento', "Departamento", 'd.nombre'),
+        ]
+    ),
+    'clientes': DefinicionTabla(
+        "clientes", 'id_cliente', 'id_cliente', [
+            Columna('id_cliente', "ID", es_texto=False),
+            Columna('nombre', "Nombre", nulo=False),
+            Columna('correo', "Correo"),
+            Columna('telefono', "Teléfono"),
+        ]
+    ),
+}
+
+
+def consulta_pagina(definicion, columna_orden, descendente, filtro, ultima, limite):
+    # (consulta, params) de una página de la tabla con paginación keyset:
+    # las filas después de ultima (None: la primera página) en el orden de
+    # la columna, que cumplen el filtro de texto. Sin Qt, para que
+    # migraciones.py revise el plan de la consulta que se emite de verdad.
+    columna = definicion.columnas[columna_orden]
+    condiciones = []
+    params = []
+
+    if filtro:
+        patron = f"%{filtro}%"
+        textos = [c for c in definicion.columnas if c.es_texto]
+        condiciones.append("(" + " OR ".join(f"{c.expresion} LIKE %s" for c in textos) + ")")
+        params.extend([patron] * len(textos))
+
+    if ultima is not None:
+        comparador = "<" if descendente else ">"
+        valor = columna.valor_orden(ultima)
+        if columna.expresion == definicion.expresion_llave:
+            condiciones.append(f"{definicion.expresion_llave} {comparador} %s")
+            params.append(valor)
+        else:
+            condiciones.append(
+                f"({columna.orden} {comparador} %s OR "
+                f"({columna.orden} = %s AND {definicion.expresion_llave} {comparador} %s))"
+            )
+            params.extend([valor, valor, ultima[definicion.llave]])
+
+    direccion = "DESC" if descendente else "ASC"
+    where = f"WHERE {' AND '.join(condiciones)}" if condiciones else ""
+    campos = ", ".join(f"{c.expresion} AS {c.campo}" for c in definicion.columnas)
+    query = f"""SELECT {campos} FROM {definicion.origen} {where}
+        ORDER BY {columna.orden} {direccion}, {definicion.expresion_llave} {direccion}
+        LIMIT %s"""
+    params.append(limite)
+    return query, params
@@ -0,0 +1,99 @@
+import threading
+
+from sincronizacion import SincronizadorTabla
+
+
+class TablaReferencia:
+    # Una tabla de referencia en memoria: id -> texto que se muestra en los combos
+    def __init__(self, sincronizador, etiqueta, incluir=None):
+        self.sincronizador = sincronizador
+        self.etiqueta = etiqueta    # fila -> texto
+        self.incluir = incluir      # fila -> bool; las que no cumplen se quitan
+        self.datos = {}
+        self.vigente = False
+
+
+class CacheReferencias:
+    # Datos de referencia para los combos (departamentos, proveedores, clientes
+    # y empleados), compartidos por todas las pantallas. Se invalidan por
+    # tabla cuando se escribe en ella, y al actualizarse solo se traen las
+    # filas que cambiaron desde la última vez (SincronizadorTabla).
+    def __init__(self, db):
+        self._lock = threading.Lock()
+        self._tablas = {
+            'departamentos': TablaReferencia(
+                SincronizadorTabla(
+                    db, 'departamentos', 'id_departamento',
+                    "SELECT id_departamento, nombre FROM departamentos {filtro}",
+                    "WHERE fecha_actualizacion >= %s"
+                ),
+                lambda fila: fila['nombre']
+            ),
+            'proveedores': TablaReferencia(
+                SincronizadorTabla(
+                    db, 'proveedores', 'id_proveedor',
+                    "SELECT id_proveedor, nombre FROM proveedores {filtro}",
+                    "WHERE fecha_actualizacion >= %s"
+                ),
+                lambda fila: fila['nombre']
+            ),
+            'clientes': TablaReferencia(
+                SincronizadorTabla(
+                    db, 'clientes', 'id_cliente',
+                    "SELECT id_cliente, nombre FROM clientes {filtro}",
+                    "WHERE fecha_actualizacion >= %s"
+                ),
+                lambda fila: fila['nombre'],
+                # El cliente general (id 1) va fijo al inicio del combo
+                lambda fila: fila['id_cliente'] != 1
+            ),
+            # Solo los empleados que pueden registrar ventas
+            'empleados': TablaReferencia(
+                SincronizadorTabla(
+                    db, 'empleados', 'id_empleado',
+                    "SELECT id_empleado, nombre, puesto, nivel_acceso FROM empleados {filtro}",
+                    "WHERE fecha_actualizacion >= %s",
+                    filtro_completo="WHERE nivel_acceso > 0"
+                ),
+                lambda fila: f"{fila['nombre']} ({fila['puesto']})",
+                lambda fila: fila['nivel_acceso'] > 0
+            ),
+        }
+
+    def sincronizadores(self):
+        return {tabla: referencia.sincronizador for tabla, referencia in self._tablas.items()}
+
+    def vigente(self, tabla):
+        with self._lock:
+            return self._tablas[tabla].vigente
+
+    def obtener(self, tabla):
+        # Copia de los datos en memoria; no toca la base
+        with self._lock:
+            return dict(self._tablas[tabla].datos)
+
+    def invalidar(self, tabla):
+        with self._lock:
+            self._tablas[tabla].vigente = False
+
+    def actualizar(self, tabla):
+        # Corre en un hilo de trabajo. La primera vez carga la tabla completa;
+        # después solo aplica altas, cambios y bajas.
+        referencia = self._tablas[tabla]
+        cambios = referencia.sincronizador.consultar()
+        with self._lock:
+            if not referencia.sincronizador.confirmar(cambios):
+                return False
+            datos = referencia.datos
+            if cambios.completo:
+                datos.clear()
+            llave = referencia.sincronizador.llave
+            for fila in cambios.filas:
+                if referencia.incluir is None or referencia.incluir(fila):
+                    datos[fila[llave]] = referencia.etiqueta(fila)
+                else:
+                    datos.pop(fila[llave], None)
+            for id_registro in cambios.eliminados:
+                datos.pop(id_registro, None)
+            referencia.vigente = True
+        return True
@@ -0,0 +1,361 @@
+import argparse
+import csv
+import datetime
+import gzip
+import time
+from decimal import Decimal
+
+from archivo import segmentos, tablas
+from database_manager import DatabaseManager, SQLiteBackend
+from services import DatosInvalidosError
+
+# Uso:
+#   python reportes.py detalle --desde 2026-10-01 --hasta 2026-10-31 --salida detalle.csv
+#   python reportes.py productos --desde 2026-10-01 --hasta 2026-10-31 --departamento 2 --salida prod.parquet
+# Sin --sqlite usa el backend de SEARS_DB_BACKEND (MySQL por defecto).
+# Parquet requiere pyarrow (opcional).
+
+FILAS_POR_GRUPO = 65536     # filas por row group de Parquet
+CENTAVOS = Decimal('0.01')
+
+
+class Reporte:
+    def __init__(self, titulo, consulta, columnas, filtros, metricas=None, orden=None):
+        self.titulo = titulo
+        # La consulta lleva {filtro} donde va el WHERE, y {ventas} y
+        # {detalle_ventas} (también en los filtros) en lugar de las tablas
+        self.consulta = consulta
+        self.columnas = columnas        # [(nombre, tipo)]: texto, entero, decimal o fecha
+        self.filtros = filtros          # filtro -> condición con un %s
+        # Reportes agrupados: columnas que se suman al juntar lo archivado
+        # con lo vivo (el resto es la llave del grupo) y columna del ORDER BY DESC
+        self.metricas = metricas
+        self.orden = orden
+
+
+# Todas filtran por rango de fechas de la venta. Los reportes agregados no
+# cuentan las ventas canceladas.
+REPORTES = {
+    'ventas': Reporte(
+        "Ventas",
+        """SELECT v.folio, v.fecha, e.nombre AS empleado, c.nombre AS cliente,
+            (SELECT COUNT(*) FROM {detalle_ventas} dv WHERE dv.id_venta = v.id_venta) AS productos,
+            v.subtotal, v.iva, v.total, v.metodo_pago, v.estado
+        FROM {ventas} v
+        JOIN empleados e ON e.id_empleado = v.id_empleado
+        JOIN clientes c ON c.id_cliente = v.id_cliente
+        {filtro}
+        ORDER BY v.fecha, v.id_venta""",
+        [
+            ('folio', 'texto'), ('fecha', 'fecha'), ('empleado', 'texto'), ('cliente', 'texto'),
+            ('productos', 'entero'), ('subtotal', 'decimal'), ('iva', 'decimal'),
+            ('total', 'decimal'), ('metodo_pago', 'texto'), ('estado', 'texto'),
+        ],
+        {
+            'empleado': "v.id_empleado = %s",
+            'departamento': """EXISTS (SELECT 1 FROM {detalle_ventas} dv
+                JOIN productos p ON p.id_producto = dv.id_producto
+                WHERE dv.id_venta = v.id_venta AND p.id_departamento = %s)""",
+            'producto': "EXISTS (SELECT 1 FROM {detalle_ventas} dv WHERE dv.id_venta = v.id_venta AND dv.id_producto = %s)",
+        }
+    ),
+    'detalle': Reporte(
+        "Detalle de ventas",
+        """SELECT v.folio, v.fecha, v.estado, e.nombre AS empleado, d.nombre AS departamento,
+            p.codigo_barras, p.nombre AS producto, dv.cantidad, dv.precio_unitario, dv.importe
+        FROM {detalle_ventas} dv
+        JOIN {ventas} v ON v.id_venta = dv.id_venta
+        JOIN empleados e ON e.id_empleado = v.id_empleado
+        JOIN productos p ON p.id_producto = dv.id_producto
+        LEFT JOIN departamentos d ON d.id_departamento = p.id_departamento
+        {filtro}
+        ORDER BY v.fecha, dv.id_detalle""",
+        [
+            ('folio', 'texto'), ('fecha', 'fecha'), ('estado', 'texto'), ('empleado', 'texto'),
+            ('departamento', 'texto'), ('codigo_barras', 'texto'), ('producto', 'texto'),
+            ('cantidad', 'entero'), ('precio_unitario', 'decimal'), ('importe', 'decimal'),
+        ],
+        {
+            'empleado': "v.id_empleado = %s",
+            'departamento': "p.id_departamento = %s",
+            'producto': "dv.id_producto = %s",
+        }
+    ),
+    'empleados': Reporte(
+        "Ventas por empleado",
+        """SELECT e.id_empleado, e.nombre AS empleado, e.puesto, COUNT(*) AS ventas,
+            SUM(v.subtotal) AS subtotal, SUM(v.total) AS total
+        FROM {ventas} v
+        JOIN empleados e ON e.id_empleado = v.id_empleado
+        {filtro} AND v.estado <> 'cancelada'
+        GROUP BY e.id_empleado, e.nombre, e.puesto
+        ORDER BY total DESC""",
+        [
+            ('id_empleado', 'entero'), ('empleado', 'texto'), ('puesto', 'texto'),
+            ('ventas', 'entero'), ('subtotal', 'decimal'), ('total', 'decimal'),
+        ],
+        {
+            'empleado': "v.id_empleado = %s",
+            'departamento': "e.id_departamento = %s",
+        },
+        metricas=['ventas', 'subtotal', 'total'], orden='total'
+    ),
+    'departamentos': Reporte(
+        "Ventas por departamento",
+        """SELECT d.id_departamento, d.nombre AS departamento, COUNT(DISTINCT dv.id_venta) AS ventas,
+            SUM(dv.cantidad) AS unidades, SUM(dv.importe) AS importe
+        FROM {detalle_ventas} dv
+        JOIN {ventas} v ON v.id_venta = dv.id_venta
+        JOIN productos p ON p.id_producto = dv.id_producto
+        LEFT JOIN departamentos d ON d.id_departamento = p.id_departamento
+        {filtro} AND v.estado <> 'cancelada'
+        GROUP BY d.id_departamento, d.nombre
+        ORDER BY importe DESC""",
+        [
+            ('id_departamento', 'entero'), ('departamento', 'texto'), ('ventas', 'entero'),
+            ('unidades', 'entero'), ('importe', 'decimal'),
+        ],
+        {
+            'empleado': "v.id_empleado = %s",
+            'departamento': "p.id_departamento = %s",
+        },
+        # Cada venta está completa en uno de los dos juegos de tablas: sumar
+        # COUNT(DISTINCT id_venta) de ambos da el total correcto
+        metricas=['ventas', 'unidades', 'importe'], orden='importe'
+    ),
+    'productos': Reporte(
+        "Ventas por producto",
+        """SELECT p.id_producto, p.codigo_barras, p.nombre AS producto, d.nombre AS departamento,
+            SUM(dv.cantidad) AS unidades, SUM(dv.importe) AS importe
+        FROM {detalle_ventas} dv
+        JOIN {ventas} v ON v.id_venta = dv.id_venta
+        JOIN productos p ON p.id_producto = dv.id_producto
+        LEFT JOIN departamentos d ON d.id_departamento = p.id_departamento
+        {filtro} AND v.estado <> 'cancelada'
+        GROUP BY p.id_producto, p.codigo_barras, p.nombre, d.nombre
+        ORDER BY importe DESC""",
+        [
+            ('id_producto', 'entero'), ('codigo_barras', 'texto'), ('producto', 'texto'),
+            ('departamento', 'texto'), ('unidades', 'entero'), ('importe', 'decimal'),
+        ],
+        {
+            'empleado': "v.id_empleado = %s",
+            'departamento': "p.id_departamento = %s",
+            'producto': "dv.id_producto = %s",
+        },
+        metricas=['unidades', 'importe'], orden='importe'
+    ),
+}
+
+
+def armar_consulta(reporte, desde, hasta, archivadas=False, **filtros):
+    # hasta es inclusivo: se compara contra el inicio del día siguiente.
+    # archivadas=True consulta las tablas históricas (archivo.py).
+    nombres = tablas(archivadas)
+    condiciones = ["v.fecha >= %s", "v.fecha < %s"]
+    params = [
+        f"{desde.isoformat()} 00:00:00",
+        f"{(hasta + datetime.timedelta(days=1)).isoformat()} 00:00:00",
+    ]
+    for nombre, valor in filtros.items():
+        if valor is None:
+            continue
+        if nombre not in reporte.filtros:
+            raise DatosInvalidosError(f"El reporte {reporte.titulo} no se puede filtrar por {nombre}")
+        condiciones.append(reporte.filtros[nombre].format(**nombres))
+        params.append(valor)
+    return reporte.consulta.format(filtro="WHERE " + " AND ".join(condiciones), **nombres), params
+
+
+# ------------------------- ESCRITORES -------------------------
+class EscritorCSV:
+    # .csv.gz se escribe comprimido
+    def __init__(self, ruta, columnas):
+        abrir = gzip.open if ruta.endswith('.gz') else open
+        self.archivo = abrir(ruta, 'wt', encoding='utf-8', newline='')
+        self.csv = csv.writer(self.archivo)
+        self.csv.writerow([nombre for nombre, _ in columnas])
+        self.decimales = [i for i, (_, tipo) in enumerate(columnas) if tipo == 'decimal']
+
+    def escribir(self, filas):
+        if self.decimales:
+            # Las sumas en SQLite llegan como float (p. ej. 1234.5600000001)
+            filas = [list(fila) for fila in filas]
+            for fila in filas:
+                for i in self.decimales:
+                    if isinstance(fila[i], float):
+                        fila[i] = _a_decimal(fila[i])
+        self.csv.writerows(filas)
+
+    def cerrar(self):
+        self.archivo.close()
+
+
+class EscritorParquet:
+    # Columnar: las filas se juntan hasta FILAS_POR_GRUPO y se escriben como
+    # un row group, así que en memoria nunca hay más de un grupo
+    def __init__(self, ruta, columnas):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise DatosInvalidosError("Para exportar a Parquet instale pyarrow (pip install pyarrow)")
+        self.pa = pyarrow
+        tipos = {
+            'texto': pyarrow.string(),
+            'entero': pyarrow.int64(),
+            'decimal': pyarrow.decimal128(18, 2),
+            'fecha': pyarrow.timestamp('s'),
+        }
+        self.esquema = pyarrow.schema([(nombre, tipos[tipo]) for nombre, tipo in columnas])
+        self.conversiones = [_CONVERSIONES[tipo] for _, tipo in columnas]
+        self.escritor = pyarrow.parquet.ParquetWriter(ruta, self.esquema, compression='snappy')
+        self.pendientes = []
+
+    def escribir(self, filas):
+        self.pendientes.extend(filas)
+        if len(self.pendientes) >= FILAS_POR_GRUPO:
+            self._vaciar()
+
+    def _vaciar(self):
+        if not self.pendientes:
+            return
+        arreglos = [
+            self.pa.array([convertir(fila[i]) for fila in self.pendientes], type=campo.type)
+            for i, (convertir, campo) in enumerate(zip(self.conversiones, self.esquema))
+        ]
+        self.escritor.write_table(self.pa.Table.from_arrays(arreglos, schema=self.esquema))
+        self.pendientes = []
+
+    def cerrar(self):
+        self._vaciar()
+        self.escritor.close()
+
+
+def _a_decimal(valor):
+    # MySQL devuelve Decimal; SQLite, float
+    if valor is None:
+        return None
+    return Decimal(str(valor)).quantize(CENTAVOS)
+
+
+def _a_fecha(valor):
+    # SQLite guarda las fechas como texto
+    if valor is None or isinstance(valor, datetime.datetime):
+        return valor
+    return datetime.datetime.fromisoformat(str(valor))
+
+
+def _a_entero(valor):
+    # SUM de enteros llega como Decimal en MySQL
+    return None if valor is None else int(valor)
+
+
+_CONVERSIONES = {
+    'texto': lambda valor: None if valor is None else str(valor),
+    'entero': _a_entero,
+    'decimal': _a_decimal,
+    'fecha': _a_fecha,
+}
+
+
+def crear_escritor(ruta, columnas):
+    if ruta.endswith('.parquet'):
+        return EscritorParquet(ruta, columnas)
+    return EscritorCSV(ruta, columnas)
+
+
+# ------------------------- EXPORTACIÓN -------------------------
+def exportar(db, nombre, ruta, desde, hasta, progreso=None, **filtros):
+    # Recorre el resultado por lotes con un cursor sin buffer y lo escribe
+    # conforme llega: la memoria usada no depende del número de filas.
+    # Regresa (filas escritas, segundos).
+    reporte = REPORTES[nombre]
+    if hasta < desde:
+        raise DatosInvalidosError("La fecha final es anterior a la inicial")
+    # Si el rango llega a lo archivado, primero se consultan las tablas
+    # históricas y luego las vivas; todo lo archivado es anterior
+    consultas = [
+        armar_consulta(reporte, inicio, fin, archivadas, **filtros)
+        for inicio, fin, archivadas in segmentos(db, desde, hasta)
+    ]
+    inicio = time.perf_counter()
+    filas = 0
+    escritor = crear_escritor(ruta, reporte.columnas)
+    try:
+        if reporte.metricas and len(consultas) > 1:
+            lote = _combinar_grupos(db, reporte, consultas)
+            escritor.escribir(lote)
+            filas = len(lote)
+            if progreso is not None:
+                progreso(filas)
+        else:
+            for consulta, params in consultas:
+                with db.streaming(consulta, params) as (_, lotes):
+                    for lote in lotes:
+                        escritor.escribir(lote)
+                        filas += len(lote)
+                        if progreso is not None:
+                            progreso(filas)
+    finally:
+        escritor.cerrar()
+    return filas, time.perf_counter() - inicio
+
+
+def _combinar_grupos(db, reporte, consultas):
+    # Suma por grupo los resultados de cada segmento. Son reportes agrupados:
+    # una fila por empleado, departamento o producto, caben en memoria.
+    nombres = [nombre for nombre, _ in reporte.columnas]
+    metricas = [nombres.index(nombre) for nombre in reporte.metricas]
+    llaves = [i for i in range(len(nombres)) if i not in metricas]
+    grupos = {}
+    for consulta, params in consultas:
+        with db.streaming(consulta, params) as (_, lotes):
+            for lote in lotes:
+                for fila in lote:
+                    llave = tuple(fila[i] for i in llaves)
+                    actual = grupos.get(llave)
+                    if actual is None:
+                        grupos[llave] = list(fila)
+                        continue
+                    for i in metricas:
+                        if fila[i] is not None:
+                            actual[i] = fila[i] if actual[i] is None else actual[i] + fila[i]
+    orden = nombres.index(reporte.orden)
+    return sorted(grupos.values(), key=lambda fila: fila[orden] or 0, reverse=True)
+
+
+def _fecha(texto):
+    return datetime.date.fromisoformat(texto)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Exportación de reportes de ventas a CSV o Parquet")
+    parser.add_argument('reporte', choices=sorted(REPORTES))
+    parser.add_argument('--desde', type=_fecha, required=True, help="AAAA-MM-DD")
+    parser.add_argument('--hasta', type=_fecha, required=True, help="AAAA-MM-DD (inclusive)")
+    parser.add_argument('--empleado', type=int, help="id_empleado")
+    parser.add_argument('--departamento', type=int, help="id_departamento")
+    parser.add_argument('--producto', type=int, help="id_producto")
+    parser.add_argument('--salida', required=True, help="archivo .csv, .csv.gz o .parquet")
+    parser.add_argument('--sqlite', metavar='RUTA', help="usar una base SQLite en lugar de MySQL")
+    args = parser.parse_args()
+
+    db = DatabaseManager(SQLiteBackend(args.sqlite) if args.sqlite else None)
+    try:
+        filas, segundos = exportar(
+            db, args.reporte, args.salida, args.desde, args.hasta,
+            progreso=lambda n: print(f"\r{n} filas", end="", flush=True),
+            empleado=args.empleado, departamento=args.departamento, producto=args.producto
+        )
+    except DatosInvalidosError as e:
+        print(f"Error: {e}")
+        return 1
+    finally:
+        db.close()
+    print(f"\r{filas} filas escritas en {args.salida} ({segundos:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,111 @@
+import uuid
+
+from ventas import StockInsuficienteError
+
+DURACION_RESERVA = 900  # segundos que un apartado sigue vigente sin tocarse
+HOLGURA_RESERVA = 20    # unidades libres a partir de las cuales no se bloquea el producto
+
+# Compatible con MySQL y SQLite; también está en los scripts del esquema.
+# Sin llave foránea a productos: revisarla tomaría un bloqueo compartido
+# sobre la fila del producto, justo la que se disputan las cajas al cobrar
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS reservas_stock (
+        caja VARCHAR(40) NOT NULL,
+        id_producto INT NOT NULL,
+        cantidad INT NOT NULL,
+        vence DATETIME NOT NULL,
+        PRIMARY KEY (caja, id_producto)
+    )""",
+]
+
+# Suma la cantidad al apartado de la caja (uno vencido cuenta como cero)
+# y lo renueva. cantidad va antes que vence: MySQL evalúa las asignaciones en
+# orden y la condición debe ver el vencimiento anterior
+APARTAR = """INSERT INTO reservas_stock (caja, id_producto, cantidad, vence)
+    VALUES (%s, %s, %s, NOW() + INTERVAL %s SECOND)
+    ON DUPLICATE KEY UPDATE
+        cantidad = CASE WHEN vence > NOW() THEN cantidad ELSE 0 END + VALUES(cantidad),
+        vence = VALUES(vence)"""
+
+CONTAR = """SELECT
+        COALESCE(SUM(CASE WHEN caja <> %s THEN cantidad ELSE 0 END), 0) AS otras,
+        COALESCE(SUM(CASE WHEN caja = %s THEN cantidad ELSE 0 END), 0) AS propias
+    FROM reservas_stock
+    WHERE id_producto = %s AND vence > NOW()"""
+
+
+class ReservasStock:
+    # Apartados de stock de una caja mientras los productos están en su
+    # carrito: lo que aparta una caja no lo puede vender ni apartar otra hasta
+    # que se cobra, se quita del carrito o vence (DURACION_RESERVA). El cobro
+    # (registrar_venta con caja) es el que valida en firme; apartar solo
+    # evita que el cajero llene un carrito que no se va a poder cobrar.
+    #
+    # Los apartados van a nombre de self.caja (la terminal más un id al azar
+    # por proceso), no solo de la terminal: si dos cajas quedan con la misma
+    # SEARS_TERMINAL, cobrar o vaciar el carrito en una no suelta lo que
+    # apartó la otra.
+    #
+    # Para no formar fila en los productos más vendidos, mientras sobren al
+    # menos HOLGURA_RESERVA unidades el apartado se escribe sin bloquear la
+    # fila del producto (solo la del apartado, que es de esta caja). Cerca
+    # de agotarse se bloquea la fila y se vuelve a contar, así las últimas
+    # unidades no se apartan dos veces. Se puede llamar desde cualquier hilo.
+    def __init__(self, db, terminal, duracion=DURACION_RESERVA, holgura=HOLGURA_RESERVA):
+        self.db = db
+        self.terminal = terminal
+        self.caja = f"{terminal}-{uuid.uuid4().hex}"
+        self.duracion = duracion
+        self.holgura = holgura
+
+    def reservar(self, id_producto, cantidad):
+        # Aparta cantidad unidades más del producto. Regresa el stock
+        # disponible para esta caja (el que no apartaron otras); lanza
+        # StockInsuficienteError si no alcanza
+        with self.db.transaction() as cursor:
+            stock, otras, propias = self._contar(cursor, id_producto)
+            # Límite del camino sin bloqueo: varias cajas pueden contar a la
+            # vez y apartar todas, así que lo apartado puede pasar del stock
+            # si entre este conteo y la escritura las demás apartan más de
+            # HOLGURA_RESERVA unidades del mismo producto. No se vende de más
+            # por eso: el cobro vuelve a validar con la fila bloqueada y, en
+            # el peor caso, rechaza ese carrito. Una holgura mayor lo hace
+            # menos probable a cambio de bloquear antes
+            holgado = stock - otras - propias - cantidad >= self.holgura
+            if holgado:
+                cursor.execute(APARTAR, (self.caja, id_producto, cantidad, self.duracion))
+        if holgado:
+            return stock - otras
+
+        with self.db.transaction() as cursor:
+            stock, otras, propias = self._contar(cursor, id_producto, bloquear=True)
+            if stock - otras < propias + cantidad:
+                raise StockInsuficienteError(id_producto, max(stock - otras, 0), propias + cantidad)
+            cursor.execute(APARTAR, (self.caja, id_producto, cantidad, self.duracion))
+        return stock - otras
+
+    def _contar(self, cursor, id_producto, bloquear=False):
+        # El bloqueo va primero y el conteo después: así el conteo ya ve lo
+        # que apartó la caja que tenía la fila antes que esta
+        cursor.execute(
+            "SELECT stock FROM productos WHERE id_producto = %s" + (" FOR UPDATE" if bloquear else ""),
+            (id_producto,)
+        )
+        filas = cursor.fetchall()
+        stock = filas[0]['stock'] if filas else 0
+        cursor.execute(CONTAR, (self.caja, self.caja, id_producto))
+        fila = cursor.fetchall()[0]
+        return stock, int(fila['otras']), int(fila['propias'])
+
+    def liberar(self, id_producto=None):
+        # Sin id_producto: todo lo de esta caja (carrito vacío), y de paso
+        # los apartados vencidos de cajas que se cerraron sin liberar
+        with self.db.transaction() as cursor:
+            if id_producto is None:
+                cursor.execute("DELETE FROM reservas_stock WHERE caja = %s", (self.caja,))
+                cursor.execute("DELETE FROM reservas_stock WHERE vence <= NOW()")
+            else:
+                cursor.execute(
+                    "DELETE FROM reservas_stock WHERE caja = %s AND id_producto = %s",
+                    (self.caja, id_producto)
+                )
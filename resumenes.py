@@ -0,0 +1,283 @@
+import argparse
+import datetime
+
+from archivo import corte_archivo, tablas
+from database_manager import DatabaseManager, SQLiteBackend
+
+# Uso:
+#   python resumenes.py reconstruir                      (todo el historial)
+#   python resumenes.py reconstruir --desde 2026-10-01
+#   python resumenes.py verificar --desde 2026-10-01 --hasta 2026-10-31
+# Sin --sqlite usa el backend de SEARS_DB_BACKEND (MySQL por defecto).
+
+SIN_DEPARTAMENTO = 0        # id_departamento de los productos sin departamento
+DIAS_POR_TRAMO = 31         # la reconstrucción y la verificación van por tramos
+
+
+class Resumen:
+    # Una tabla de totales por día. La misma consulta agrupada sirve para
+    # sumar una venta (filtro por id_venta), para restarla al cancelarla y
+    # para reconstruir un rango de fechas.
+    def __init__(self, tabla, llaves, metricas, origen, expresiones):
+        self.tabla = tabla
+        self.llaves = llaves            # columnas de la llave primaria (fecha primero)
+        self.metricas = metricas        # columnas que se suman
+        self.origen = origen            # FROM ... con los JOIN ({ventas}, {detalle_ventas})
+        self.expresiones = expresiones  # columna -> expresión SQL
+
+    @property
+    def columnas(self):
+        return self.llaves + self.metricas
+
+    def seleccion(self, filtro, signo=1, archivadas=False):
+        # signo=-1 resta (cancelación); archivadas=True lee las tablas históricas
+        campos = ", ".join(
+            f"{'-' if signo < 0 and c in self.metricas else ''}{self.expresiones[c]} AS {c}"
+            for c in self.columnas
+        )
+        grupos = ", ".join(self.expresiones[c] for c in self.llaves)
+        origen = self.origen.format(**tablas(archivadas))
+        return f"SELECT {campos} FROM {origen} WHERE {filtro} GROUP BY {grupos}"
+
+    def sumar(self, filtro, signo=1):
+        # INSERT ... SELECT que suma (o resta) sobre los totales existentes
+        actualizar = ", ".join(f"{c} = {c} + VALUES({c})" for c in self.metricas)
+        return (
+            f"INSERT INTO {self.tabla} ({', '.join(self.columnas)}) "
+            f"{self.seleccion(filtro, signo)} "
+            f"ON DUPLICATE KEY UPDATE {actualizar}"
+        )
+
+
+_VENTAS = "{ventas} v"
+_DETALLE = "{detalle_ventas} dv JOIN {ventas} v ON v.id_venta = dv.id_venta"
+
+RESUMENES = [
+    Resumen(
+        'resumen_ventas_dia', ['fecha'], ['ventas', 'subtotal', 'iva', 'total'], _VENTAS,
+        {
+            'fecha': "DATE(v.fecha)", 'ventas': "COUNT(*)", 'subtotal': "SUM(v.subtotal)",
+            'iva': "SUM(v.iva)", 'total': "SUM(v.total)",
+        }
+    ),
+    Resumen(
+        'resumen_empleados_dia', ['fecha', 'id_empleado'], ['ventas', 'total'], _VENTAS,
+        {
+            'fecha': "DATE(v.fecha)", 'id_empleado': "v.id_empleado",
+            'ventas': "COUNT(*)", 'total': "SUM(v.total)",
+        }
+    ),
+    Resumen(
+        'resumen_productos_dia', ['fecha', 'id_producto'], ['unidades', 'importe'], _DETALLE,
+        {
+            'fecha': "DATE(v.fecha)", 'id_producto': "dv.id_producto",
+            'unidades': "SUM(dv.cantidad)", 'importe': "SUM(dv.importe)",
+        }
+    ),
+    # El departamento es el del producto al momento de sumar la venta; si el
+    # producto cambia de departamento, la reconstrucción usa el actual
+    Resumen(
+        'resumen_departamentos_dia', ['fecha', 'id_departamento'], ['unidades', 'importe'],
+        _DETALLE + " JOIN productos p ON p.id_producto = dv.id_producto",
+        {
+            'fecha': "DATE(v.fecha)",
+            'id_departamento': f"COALESCE(p.id_departamento, {SIN_DEPARTAMENTO})",
+            'unidades': "SUM(dv.cantidad)", 'importe': "SUM(dv.importe)",
+        }
+    ),
+]
+
+# Compatible con MySQL y SQLite; también está en los scripts del esquema
+ESQUEMA = [
+    """CREATE TABLE IF NOT EXISTS resumen_ventas_dia (
+        fecha DATE NOT NULL PRIMARY KEY,
+        ventas INT NOT NULL DEFAULT 0,
+        subtotal DECIMAL(14,2) NOT NULL DEFAULT 0,
+        iva DECIMAL(14,2) NOT NULL DEFAULT 0,
+        total DECIMAL(14,2) NOT NULL DEFAULT 0
+    )""",
+    """CREATE TABLE IF NOT EXISTS resumen_empleados_dia (
+        fecha DATE NOT NULL,
+        id_empleado INT NOT NULL,
+        ventas INT NOT NULL DEFAULT 0,
+        total DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, id_empleado)
+    )""",
+    """CREATE TABLE IF NOT EXISTS resumen_productos_dia (
+        fecha DATE NOT NULL,
+        id_producto INT NOT NULL,
+        unidades INT NOT NULL DEFAULT 0,
+        importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, id_producto)
+    )""",
+    """CREATE TABLE IF NOT EXISTS resumen_departamentos_dia (
+        fecha DATE NOT NULL,
+        id_departamento INT NOT NULL,
+        unidades INT NOT NULL DEFAULT 0,
+        importe DECIMAL(14,2) NOT NULL DEFAULT 0,
+        PRIMARY KEY (fecha, id_departamento)
+    )""",
+]
+
+
+def actualizar_resumenes(cursor, id_venta, signo=1):
+    # Dentro de la transacción de la venta (o de su cancelación): los totales
+    # se confirman junto con la venta o no se confirman. Conviene llamarla al
+    # final de la transacción, porque bloquea la fila del día hasta el commit.
+    for resumen in RESUMENES:
+        cursor.execute(resumen.sumar("v.id_venta = %s", signo), (id_venta,))
+
+
+# ------------------------- RECONSTRUCCIÓN Y VERIFICACIÓN -------------------------
+def crear_tablas(db):
+    with db.transaction() as cursor:
+        for sentencia in ESQUEMA:
+            cursor.execute(sentencia)
+
+
+def rango_ventas(db):
+    # Incluye el periodo ya archivado (archivo.py), si lo hay
+    desde = hasta = None
+    for archivadas in (True, False):
+        filas = db.execute_query(
+            f"SELECT DATE(MIN(fecha)) AS desde, DATE(MAX(fecha)) AS hasta FROM {tablas(archivadas)['ventas']}",
+            fetch=True
+        )
+        if not filas or filas[0]['desde'] is None:
+            continue
+        minimo, maximo = _a_fecha(filas[0]['desde']), _a_fecha(filas[0]['hasta'])
+        desde = minimo if desde is None else min(desde, minimo)
+        hasta = maximo if hasta is None else max(hasta, maximo)
+    return desde, hasta
+
+
+def tramos(desde, hasta, corte=None):
+    # corte: primer día en las tablas vivas (archivo.py); ningún tramo lo cruza
+    inicio = desde
+    while inicio <= hasta:
+        fin = min(inicio + datetime.timedelta(days=DIAS_POR_TRAMO - 1), hasta)
+        if corte is not None and inicio < corte <= fin:
+            fin = corte - datetime.timedelta(days=1)
+        yield inicio, fin
+        inicio = fin + datetime.timedelta(days=1)
+
+
+def _filtro_rango(inicio, fin):
+    # Rango sobre v.fecha (usa idx_ventas_fecha) y sin ventas canceladas
+    params = (f"{inicio.isoformat()} 00:00:00", f"{(fin + datetime.timedelta(days=1)).isoformat()} 00:00:00")
+    return "v.fecha >= %s AND v.fecha < %s AND v.estado <> 'cancelada'", params
+
+
+def reconstruir(db, desde=None, hasta=None, progreso=None):
+    # Borra y recalcula los totales del rango, un tramo por transacción.
+    # Mientras corre, las ventas del tramo en curso esperan su bloqueo.
+    crear_tablas(db)
+    if desde is None or hasta is None:
+        minimo, maximo = rango_ventas(db)
+        if minimo is None:
+            return 0
+        desde, hasta = desde or minimo, hasta or maximo
+    dias = 0
+    corte = corte_archivo(db)
+    for inicio, fin in tramos(desde, hasta, corte):
+        filtro, params = _filtro_rango(inicio, fin)
+        archivadas = corte is not None and inicio < corte
+        with db.transaction() as cursor:
+            for resumen in RESUMENES:
+                cursor.execute(
+                    f"DELETE FROM {resumen.tabla} WHERE fecha >= %s AND fecha <= %s",
+                    (inicio.isoformat(), fin.isoformat())
+                )
+                cursor.execute(
+                    f"INSERT INTO {resumen.tabla} ({', '.join(resumen.columnas)}) "
+                    f"{resumen.seleccion(filtro, archivadas=archivadas)}",
+                    params
+                )
+        dias += (fin - inicio).days + 1
+        if progreso is not None:
+            progreso(fin)
+    return dias
+
+
+def verificar(db, desde, hasta):
+    # Compara los totales guardados contra los calculados desde las ventas.
+    # Regresa [(tabla, llave, guardado, calculado)] con las diferencias.
+    diferencias = []
+    corte = corte_archivo(db)
+    for inicio, fin in tramos(desde, hasta, corte):
+        filtro, params = _filtro_rango(inicio, fin)
+        archivadas = corte is not None and inicio < corte
+        for resumen in RESUMENES:
+            # Las dos lecturas en la misma transacción
+            with db.transaction() as cursor:
+                cursor.execute(resumen.seleccion(filtro, archivadas=archivadas), params)
+                calculado = _por_llave(resumen, cursor.fetchall())
+                cursor.execute(
+                    f"SELECT {', '.join(resumen.columnas)} FROM {resumen.tabla} WHERE fecha >= %s AND fecha <= %s",
+                    (inicio.isoformat(), fin.isoformat())
+                )
+                guardado = _por_llave(resumen, cursor.fetchall())
+            cero = tuple(0 for _ in resumen.metricas)
+            for llave in sorted(set(calculado) | set(guardado)):
+                # Una fila guardada en ceros (p. ej. tras cancelar) equivale a no tenerla
+                esperado = calculado.get(llave, cero)
+                actual = guardado.get(llave, cero)
+                if esperado != actual:
+                    diferencias.append((resumen.tabla, llave, actual, esperado))
+    return diferencias
+
+
+def _por_llave(resumen, filas):
+    resultado = {}
+    for fila in filas:
+        llave = (_a_fecha(fila['fecha']).isoformat(),) + tuple(fila[c] for c in resumen.llaves[1:])
+        resultado[llave] = tuple(round(float(fila[c] or 0), 2) for c in resumen.metricas)
+    return resultado
+
+
+def _a_fecha(valor):
+    # MySQL devuelve date; SQLite, texto
+    if isinstance(valor, datetime.datetime):
+        return valor.date()
+    if isinstance(valor, datetime.date):
+        return valor
+    return datetime.date.fromisoformat(str(valor)[:10])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Totales de ventas por día")
+    parser.add_argument('comando', choices=['reconstruir', 'verificar'])
+    parser.add_argument('--desde', type=datetime.date.fromisoformat, help="AAAA-MM-DD")
+    parser.add_argument('--hasta', type=datetime.date.fromisoformat, help="AAAA-MM-DD (inclusive)")
+    parser.add_argument('--sqlite', metavar='RUTA', help="usar una base SQLite en lugar de MySQL")
+    args = parser.parse_args()
+
+    db = DatabaseManager(SQLiteBackend(args.sqlite) if args.sqlite else None)
+    try:
+        if args.comando == 'reconstruir':
+            dias = reconstruir(
+                db, args.desde, args.hasta,
+                progreso=lambda fecha: print(f"\rReconstruido hasta {fecha}", end="", flush=True)
+            )
+            print(f"\n{dias} días reconstruidos")
+            return 0
+
+        crear_tablas(db)
+        minimo, maximo = rango_ventas(db)
+        desde, hasta = args.desde or minimo, args.hasta or maximo
+        if desde is None:
+            print("No hay ventas")
+            return 0
+        diferencias = verificar(db, desde, hasta)
+        for tabla, llave, guardado, calculado in diferencias[:50]:
+            print(f"{tabla} {llave}: guardado {guardado}, calculado {calculado}")
+        if len(diferencias) > 50:
+            print(f"... y {len(diferencias) - 50} diferencias más")
+        print(f"{len(diferencias)} diferencias entre {desde} y {hasta}")
+        return 1 if diferencias else 0
+    finally:
+        db.close()
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,57 +1,80 @@
 import sys
-import mysql.connector
-import time
-import random
-from mysql.connector import Error
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QLineEdit, QPushButton, QTableWidget, QTableWidgetItem,
-    QMessageBox, QStackedWidget, QComboBox, QHeaderView, QSpinBox, QTextEdit
+    QMessageBox, QStackedWidget, QComboBox, QHeaderView, QSpinBox, QTextEdit,
+    QTableView, QAbstractItemView, QCompleter, QFileDialog, QProgressDialog,
+    QDialog, QDateEdit, QDialogButtonBox
 )
-from PyQt6.QtCore import Qt, QRegularExpression
+from PyQt6.QtCore import Qt, QRegularExpression, QTimer, QDate
 from PyQt6.QtGui import QDoubleValidator, QIntValidator, QRegularExpressionValidator
-
-class DatabaseManager:
-    def __init__(self):
-        try:
-            self.connection = mysql.connector.connect(
-                host='localhost',
-                port=3307,
-                user='root',
-                password='root',
-                database='sears_db'
-            )
-            print("¡Conexión exitosa a MySQL!")
-        except Error as e:
-            print(f"Error al conectar a MySQL: {e}")
-            QMessageBox.critical(None, "Error de conexión", f"No se pudo conectar a la base de datos:\n{str(e)}")
-            raise
-
-    def execute_query(self, query, params=None, fetch=False):
-        try:
-            cursor = self.connection.cursor(dictionary=True)
-            cursor.execute(query, params or ())
-            
-            if fetch:
-                result = cursor.fetchall()
-            else:
-                self.connection.commit()
-                result = cursor.rowcount
-            
-            cursor.close()
-            return result
-        except Error as e:
-            print(f"Error en la consulta: {e}")
-            self.connection.rollback()
-            return None
+from database_manager import DatabaseManager
+from diario_ventas import DiarioVentas, Reenviador
+from folios import GeneradorFolios
+from reservas import ReservasStock
+from db_worker import DBWorker
+from busqueda import BuscadorProductos
+from cache_productos import ProductoCache
+from sincronizacion import crear_sincronizadores
+from modelos import ModeloPaginado, ModeloReferencias, ModeloCarrito
+from paginacion import DEFINICIONES
+from referencias import CacheReferencias
+from instrumentacion import con_accion
+from importacion import importar
+from reportes import REPORTES, exportar
+from tablero import Tablero, TTL_TABLERO
+from ventas import formatear_ticket, StockInsuficienteError
+from services import (
+    SalesService, DatosInvalidosError, RegistroEnUsoError, ConflictoVersionError,
+    crear_servicios_catalogo
+)
 
 class SearsManagementSystem(QMainWindow):
         def __init__(self):
             super().__init__()
             try:
-                self.db = DatabaseManager()
+                # Sin servidor la aplicación abre igual y la caja vende sin conexión
+                self.db = DatabaseManager(validar=False)
+                self.worker = DBWorker(parent=self)
+                self.worker.ocupado.connect(self.mostrar_ocupado)
+                self.cache_productos = ProductoCache(self.db)
+                self.buscador = BuscadorProductos(self.db, cache=self.cache_productos)
+                self.sincronizadores = crear_sincronizadores(self.db)
+                # Lógica de negocio sin Qt; esta ventana solo la presenta
+                self.catalogos = crear_servicios_catalogo(self.db)
+                # Ventas sin conexión: diario local con copia del catálogo y su reenvío a la base
+                self.diario = DiarioVentas()
+                self.reenviador = Reenviador(self.db, self.diario)
+                self.cache_productos.suscribir(self.diario.respaldar_productos)
+                # Lo que está en el carrito queda apartado a nombre de esta caja
+                folios = GeneradorFolios(self.db)
+                self.servicio_ventas = SalesService(
+                    self.db, self.cache_productos, self.buscador, folios=folios,
+                    reenviador=self.reenviador, reservas=ReservasStock(self.db, folios.terminal)
+                )
+                self.modelos = {}
+                self.originales = {}    # registro leído en cada formulario de catálogo
+                self.referencias = CacheReferencias(self.db)
+                self.tablero = Tablero(self.db)
+                self.modelos_referencia = {
+                    'departamentos': ModeloReferencias(parent=self),
+                    'proveedores': ModeloReferencias(parent=self),
+                    'clientes': ModeloReferencias([("Cliente General", 1)], parent=self),
+                    'empleados': ModeloReferencias([("Seleccione empleado...", None)], parent=self),
+                }
+                self.pantallas_cargadas = set()
+                self.cargas_hechas = set()
                 self.setup_ui()
-                self.load_initial_data()
+                self.estado_diario = QLabel()
+                self.statusBar().addPermanentWidget(self.estado_diario)
+                self.timer_diario = QTimer(self)
+                self.timer_diario.timeout.connect(self.mostrar_estado_diario)
+                self.timer_diario.start(5000)
+                if not self.db.conectado_al_iniciar:
+                    self.arrancar_sin_conexion()
+                self.reenviador.iniciar()
+                # Los datos se cargan cuando la ventana ya está visible
+                QTimer.singleShot(0, self.load_initial_data)
             except Exception as e:
                 QMessageBox.critical(self, "Error crítico", f"No se pudo iniciar la aplicación:\n{str(e)}")
                 sys.exit(1)
@@ -79,6 +102,21 @@ class SearsManagementSystem(QMainWindow):
             # Menú Operaciones
             operations_menu = self.menu_bar.addMenu("Operaciones")
             operations_menu.addAction("Ventas", lambda: self.stacked_widget.setCurrentIndex(5))
+            operations_menu.addAction("Tablero del día", lambda: self.stacked_widget.setCurrentIndex(6))
+            
+            # Menú Importar (CSV o JSON)
+            importar_menu = self.menu_bar.addMenu("Importar")
+            importar_menu.addAction("Productos...", lambda: self.importar_catalogo('productos'))
+            importar_menu.addAction("Proveedores...", lambda: self.importar_catalogo('proveedores'))
+            importar_menu.addAction("Clientes...", lambda: self.importar_catalogo('clientes'))
+            
+            # Menú Reportes
+            reportes_menu = self.menu_bar.addMenu("Reportes")
+            reportes_menu.addAction("Exportar reporte de ventas...", self.exportar_reporte)
+            
+            # Menú Diagnóstico
+            diagnostico_menu = self.menu_bar.addMenu("Diagnóstico")
+            diagnostico_menu.addAction("Exportar métricas SQL...", self.exportar_metricas)
             
             # Stacked Widget para las diferentes secciones
             self.stacked_widget = QStackedWidget()
@@ -90,43 +128,192 @@ class SearsManagementSystem(QMainWindow):
             self.init_empleado_crud()
             self.init_cliente_crud()
             self.init_ventas_view()
+            self.init_tablero_view()
+            
+            # Cada pantalla carga sus datos la primera vez que se muestra
+            self.cargas_pantalla = [
+                (self.modelos['departamentos'].recargar,),
+                (self.modelos['proveedores'].recargar,),
+                (self.modelos['productos'].recargar, self.refresh_comboboxes),
+                (self.modelos['empleados'].recargar, self.refresh_comboboxes),
+                (self.modelos['clientes'].recargar,),
+                (self.load_clientes_empleados, self.cache_productos.iniciar_refresco),
+                (self.refresh_tablero,),
+            ]
+            self.stacked_widget.currentChanged.connect(self.cargar_pantalla)
             
             # Agregar componentes
             self.main_layout.addWidget(self.stacked_widget)
             
-            # Estado inicial
-            self.carrito = []
+            # Barra de estado: indica cuando hay consultas en curso y permite cancelarlas
+            self.cancelar_btn = QPushButton("Cancelar")
+            self.cancelar_btn.clicked.connect(self.worker.cancelar_todo)
+            self.cancelar_btn.setVisible(False)
+            self.statusBar().addPermanentWidget(self.cancelar_btn)
+
+        def arrancar_sin_conexion(self):
+            # El servidor no respondió al abrir: la caja vende con la copia
+            # local del catálogo y de los combos hasta que vuelva la conexión
+            self.reenviador.sin_conexion()
+            self.cache_productos.cargar_copia(self.diario.productos())
+            for tabla in ('clientes', 'empleados'):
+                self.modelos_referencia[tabla].sincronizar(self.diario.referencias(tabla))
+            self.stacked_widget.setCurrentIndex(5)
+
+        def mostrar_estado_diario(self):
+            pendientes, con_error = self.diario.conteo()
+            partes = []
+            if not self.reenviador.en_linea:
+                partes.append("Sin conexión")
+            if pendientes:
+                partes.append(f"{pendientes} ventas por enviar")
+            if con_error:
+                partes.append(f"{con_error} ventas rechazadas (ver {self.diario.ruta})")
+            self.estado_diario.setText(" · ".join(partes))
 
         def load_initial_data(self):
-            self.refresh_comboboxes()
-            self.refresh_departamento_table()
-            self.refresh_proveedor_table()
-            self.refresh_producto_table()
-            self.refresh_empleado_table()
-            self.refresh_cliente_table()
-            self.load_clientes_empleados()
+            # Solo la pantalla visible; las demás esperan a que se abran
+            self.cargar_pantalla(self.stacked_widget.currentIndex())
+
+        @con_accion("pantalla.{0}")
+        def cargar_pantalla(self, indice):
+            if indice in self.pantallas_cargadas or not 0 <= indice < len(self.cargas_pantalla):
+                return
+            self.pantallas_cargadas.add(indice)
+            for cargar in self.cargas_pantalla[indice]:
+                # Lo que comparten dos pantallas (p. ej. los combos) se carga una vez
+                if cargar not in self.cargas_hechas:
+                    self.cargas_hechas.add(cargar)
+                    cargar()
+
+        def refresh_cache_productos(self):
+            # Mientras no se abra la pantalla de ventas la caché sigue vacía
+            if self.pantalla_cargada(5):
+                self.worker.ejecutar(self.cache_productos.refrescar, clave="cache_productos")
+
+        def pantalla_cargada(self, *indices):
+            return any(indice in self.pantallas_cargadas for indice in indices)
+
+        def refresh_tabla(self, nombre):
+            # Solo trae y aplica las filas que cambiaron desde la última vez.
+            # Una tabla que no se ha mostrado se cargará completa al abrirla.
+            modelo = self.modelos[nombre]
+            if modelo.iniciado:
+                modelo.refrescar()
+
+        def crear_tabla_catalogo(self, nombre, al_seleccionar):
+            # Tabla virtual: las filas se traen por páginas al desplazarse y el
+            # orden y el filtro se resuelven en SQL
+            modelo = ModeloPaginado(
+                self.db, self.worker, DEFINICIONES[nombre], self.sincronizadores[nombre], parent=self
+            )
+            self.modelos[nombre] = modelo
+            
+            tabla = QTableView()
+            tabla.setModel(modelo)
+            tabla.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            tabla.horizontalHeader().setSortIndicator(0, Qt.SortOrder.AscendingOrder)
+            tabla.setSortingEnabled(True)
+            tabla.clicked.connect(lambda index: al_seleccionar(index.row()))
+            
+            filtro = QLineEdit()
+            filtro.setPlaceholderText("Filtrar...")
+            filtro.textChanged.connect(modelo.filtrar)
+            return tabla, filtro
+
+        def mostrar_ocupado(self, ocupado):
+            if ocupado:
+                self.statusBar().showMessage("Consultando base de datos...")
+                QApplication.setOverrideCursor(Qt.CursorShape.BusyCursor)
+            else:
+                self.statusBar().clearMessage()
+                QApplication.restoreOverrideCursor()
+            self.cancelar_btn.setVisible(ocupado)
+
+        @con_accion("combos.{0}")
+        def refresh_referencia(self, tabla):
+            # Los combos se llenan desde CacheReferencias; solo se consulta la
+            # base si la tabla se invalidó (o nunca se cargó)
+            if self.referencias.vigente(tabla):
+                modelo = self.modelos_referencia[tabla]
+                if not modelo.cargado:
+                    modelo.sincronizar(self.referencias.obtener(tabla))
+                return
+            self.worker.ejecutar(
+                self.actualizar_referencia, tabla,
+                al_terminar=lambda actualizada, t=tabla: actualizada and self.aplicar_referencia(t),
+                al_fallar=self.error_referencias
+            )
+
+        def actualizar_referencia(self, tabla):
+            # Corre en el DBWorker, junto con la copia en el diario para abrir
+            # la caja sin conexión (también es una escritura a disco)
+            actualizada = self.referencias.actualizar(tabla)
+            if actualizada and tabla in ('clientes', 'empleados'):
+                self.diario.respaldar_referencias(tabla, self.referencias.obtener(tabla))
+            return actualizada
+
+        def aplicar_referencia(self, tabla):
+            self.modelos_referencia[tabla].sincronizar(self.referencias.obtener(tabla))
+
+        def invalidar_referencia(self, tabla):
+            # Tras escribir en una tabla; si ningún combo la muestra aún, se
+            # cargará cuando se abra su pantalla
+            self.referencias.invalidar(tabla)
+            if self.modelos_referencia[tabla].cargado:
+                self.refresh_referencia(tabla)
+
+        def error_referencias(self, e):
+            print(f"Error al cargar datos de referencia: {e}")
+            QMessageBox.warning(self, "Error", "No se pudieron cargar los catálogos de los combos")
 
         def refresh_comboboxes(self):
-            # Departamentos
-            query = "SELECT id_departamento, nombre FROM departamentos"
-            departamentos = self.db.execute_query(query, fetch=True)
-            
-            self.producto_departamento.clear()
-            self.empleado_departamento.clear()
-            
-            if departamentos:
-                for depto in departamentos:
-                    self.producto_departamento.addItem(depto['nombre'], depto['id_departamento'])
-                    self.empleado_departamento.addItem(depto['nombre'], depto['id_departamento'])
-            
-            # Proveedores
-            query = "SELECT id_proveedor, nombre FROM proveedores"
-            proveedores = self.db.execute_query(query, fetch=True)
-            self.producto_proveedor.clear()
-            
-            if proveedores:
-                for prov in proveedores:
-                    self.producto_proveedor.addItem(prov['nombre'], prov['id_proveedor'])
+            # Combos de departamento y proveedor (pantallas de productos y empleados)
+            self.refresh_referencia('departamentos')
+            self.refresh_referencia('proveedores')
+
+        def ejecutar_catalogo(self, nombre, operacion, *args, al_terminar, al_conflicto=None, clave=None):
+            # Lecturas y escrituras de los catálogos en el DBWorker. Las
+            # lecturas llevan clave (seleccionar otra fila descarta la lectura
+            # anterior); las escrituras no se cancelan y dejan la pantalla
+            # deshabilitada hasta que terminan, para que el formulario no
+            # cambie debajo de la respuesta
+            if clave is not None:
+                self.worker.ejecutar(
+                    getattr(self.catalogos[nombre], operacion), *args,
+                    al_terminar=al_terminar, al_fallar=self.error_catalogo, clave=clave
+                )
+                return
+            pantalla = self.stacked_widget.currentWidget()
+            pantalla.setEnabled(False)
+            self.worker.ejecutar(
+                getattr(self.catalogos[nombre], operacion), *args,
+                al_terminar=al_terminar,
+                al_fallar=lambda e: self.error_catalogo(e, al_conflicto),
+                al_finalizar=lambda: pantalla.setEnabled(True),
+                cancelable=False
+            )
+
+        def error_catalogo(self, e, al_conflicto=None):
+            if isinstance(e, ConflictoVersionError) and al_conflicto is not None:
+                al_conflicto(e)
+            elif isinstance(e, DatosInvalidosError):
+                QMessageBox.warning(self, "Error", str(e))
+            elif isinstance(e, RegistroEnUsoError):
+                QMessageBox.warning(self, "Error", f"No se puede eliminar: {e}")
+            else:
+                QMessageBox.critical(self, "Error", f"Error en la base de datos: {str(e)}")
+
+        def resolver_conflicto(self, nombre, id_registro, error, mostrar, limpiar):
+            # Otro usuario cambió el registro: se muestra como quedó (o se
+            # limpia el formulario si lo borraron) y se actualiza solo su fila
+            QMessageBox.warning(self, "Conflicto", str(error))
+            if error.actual is None:
+                limpiar()
+            else:
+                mostrar(error.actual)
+            self.modelos[nombre].recargar_fila(id_registro)
 
         # ------------------------- SECCIÓN DEPARTAMENTOS -------------------------
         def init_departamento_crud(self):
@@ -161,89 +348,75 @@ class SearsManagementSystem(QMainWindow):
                 btn_layout.addWidget(btn)
             
             # Tabla
-            self.departamento_table = QTableWidget()
-            self.departamento_table.setColumnCount(4)
-            self.departamento_table.setHorizontalHeaderLabels(["ID", "Nombre", "Ubicación", "Encargado"])
-            self.departamento_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-            self.departamento_table.cellClicked.connect(lambda r, _: self.load_departamento_data(r))
+            self.departamento_table, self.departamento_filtro = self.crear_tabla_catalogo('departamentos', self.load_departamento_data)
             
             layout.addLayout(form_layout)
             layout.addLayout(btn_layout)
+            layout.addWidget(self.departamento_filtro)
             layout.addWidget(self.departamento_table)
             widget.setLayout(layout)
             self.stacked_widget.addWidget(widget)
 
         def refresh_departamento_table(self):
-            query = "SELECT id_departamento, nombre, ubicacion, encargado FROM departamentos"
-            departamentos = self.db.execute_query(query, fetch=True)
-            
-            if departamentos is not None:
-                self.departamento_table.setRowCount(len(departamentos))
-                for row_idx, row_data in enumerate(departamentos):
-                    self.departamento_table.setItem(row_idx, 0, QTableWidgetItem(str(row_data['id_departamento'])))
-                    self.departamento_table.setItem(row_idx, 1, QTableWidgetItem(row_data['nombre']))
-                    self.departamento_table.setItem(row_idx, 2, QTableWidgetItem(row_data['ubicacion']))
-                    self.departamento_table.setItem(row_idx, 3, QTableWidgetItem(row_data['encargado']))
+            self.refresh_tabla('departamentos')
 
+        @con_accion("departamentos.seleccionar")
         def load_departamento_data(self, row):
-            id_item = self.departamento_table.item(row, 0)
-            if id_item:
-                id_departamento = id_item.text()
-                query = "SELECT * FROM departamentos WHERE id_departamento = %s"
-                departamento = self.db.execute_query(query, (id_departamento,), fetch=True)
-                
-                if departamento and len(departamento) > 0:
-                    departamento = departamento[0]
-                    self.departamento_id.setText(str(departamento['id_departamento']))
-                    self.departamento_nombre.setText(departamento['nombre'])
-                    self.departamento_ubicacion.setText(departamento['ubicacion'])
-                    self.departamento_encargado.setText(departamento['encargado'])
+            id_departamento = self.modelos['departamentos'].llave_en(row)
+            if id_departamento is not None:
+                self.ejecutar_catalogo(
+                    'departamentos', 'obtener', id_departamento, clave="departamentos.seleccionar",
+                    al_terminar=lambda departamento: departamento and self.mostrar_departamento(departamento)
+                )
+
+        def mostrar_departamento(self, departamento):
+            # Llena el formulario y recuerda el registro leído (con su versión)
+            self.originales['departamentos'] = departamento
+            self.departamento_id.setText(str(departamento['id_departamento']))
+            self.departamento_nombre.setText(departamento['nombre'])
+            self.departamento_ubicacion.setText(departamento['ubicacion'])
+            self.departamento_encargado.setText(departamento['encargado'])
+
+        def datos_departamento(self):
+            return {
+                'nombre': self.departamento_nombre.text(),
+                'ubicacion': self.departamento_ubicacion.text(),
+                'encargado': self.departamento_encargado.text(),
+            }
 
+        @con_accion("departamentos.{0}")
         def handle_departamento_action(self, action):
             if action == "Crear":
-                nombre = self.departamento_nombre.text().strip()
-                ubicacion = self.departamento_ubicacion.text().strip()
-                encargado = self.departamento_encargado.text().strip()
-                
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del departamento es obligatorio")
-                    return
-                    
-                query = "INSERT INTO departamentos (nombre, ubicacion, encargado) VALUES (%s, %s, %s)"
-                result = self.db.execute_query(query, (nombre, ubicacion, encargado))
-                
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Departamento creado correctamente")
-                    self.refresh_departamento_table()
-                    self.refresh_comboboxes()
-                    self.handle_departamento_action("Limpiar")
+                def creado(result):
+                    if result is not None:
+                        QMessageBox.information(self, "Éxito", "Departamento creado correctamente")
+                        self.refresh_departamento_table()
+                        self.invalidar_referencia('departamentos')
+                        self.handle_departamento_action("Limpiar")
+                self.ejecutar_catalogo('departamentos', 'crear', self.datos_departamento(), al_terminar=creado)
             
             elif action == "Actualizar":
-                id_departamento = self.departamento_id.text().strip()
-                if not id_departamento:
+                original = self.originales.get('departamentos')
+                if not self.departamento_id.text().strip() or original is None:
                     QMessageBox.warning(self, "Error", "Seleccione un departamento para actualizar")
                     return
                     
-                nombre = self.departamento_nombre.text().strip()
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del departamento es obligatorio")
-                    return
-                    
-                query = """UPDATE departamentos 
-                        SET nombre = %s, ubicacion = %s, encargado = %s 
-                        WHERE id_departamento = %s"""
-                params = (
-                    nombre,
-                    self.departamento_ubicacion.text().strip(),
-                    self.departamento_encargado.text().strip(),
-                    id_departamento
+                def actualizado(result):
+                    if result is not None:
+                        self.originales['departamentos'] = result
+                        QMessageBox.information(self, "Éxito", "Departamento actualizado correctamente")
+                        self.modelos['departamentos'].recargar_fila(result['id_departamento'])
+                        self.invalidar_referencia('departamentos')
+                        # Productos y empleados muestran el nombre del departamento
+                        self.refresh_producto_table()
+                        self.refresh_empleado_table()
+                self.ejecutar_catalogo(
+                    'departamentos', 'guardar_cambios', original, self.datos_departamento(), al_terminar=actualizado,
+                    al_conflicto=lambda e: self.resolver_conflicto(
+                        'departamentos', original['id_departamento'], e, self.mostrar_departamento,
+                        lambda: self.handle_departamento_action("Limpiar")
+                    )
                 )
-                
-                result = self.db.execute_query(query, params)
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Departamento actualizado correctamente")
-                    self.refresh_departamento_table()
-                    self.refresh_comboboxes()
             
             elif action == "Eliminar":
                 id_departamento = self.departamento_id.text().strip()
@@ -258,36 +431,19 @@ class SearsManagementSystem(QMainWindow):
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    try:
-                        # Verificar si hay productos o empleados asociados
-                        query_check_products = "SELECT COUNT(*) AS count FROM productos WHERE id_departamento = %s"
-                        query_check_employees = "SELECT COUNT(*) AS count FROM empleados WHERE id_departamento = %s"
-                        
-                        count_products = self.db.execute_query(query_check_products, (id_departamento,), fetch=True)
-                        count_employees = self.db.execute_query(query_check_employees, (id_departamento,), fetch=True)
-                        
-                        if (count_products and count_products[0]['count'] > 0) or (count_employees and count_employees[0]['count'] > 0):
-                            QMessageBox.warning(
-                                self, "Error", 
-                                "No se puede eliminar: Hay productos o empleados asociados a este departamento"
-                            )
-                            return
-                        
-                        query = "DELETE FROM departamentos WHERE id_departamento = %s"
-                        result = self.db.execute_query(query, (id_departamento,))
-                        
-                        if result is not None and result > 0:
+                    def eliminado(result):
+                        if result:
                             QMessageBox.information(self, "Éxito", "Departamento eliminado correctamente")
                             self.refresh_departamento_table()
-                            self.refresh_comboboxes()
+                            self.invalidar_referencia('departamentos')
                             self.handle_departamento_action("Limpiar")
                         else:
                             QMessageBox.warning(self, "Error", "No se encontró el departamento para eliminar")
-                    except Error as e:
-                        QMessageBox.critical(self, "Error", f"Error al eliminar: {str(e)}")
+                    self.ejecutar_catalogo('departamentos', 'eliminar', id_departamento, al_terminar=eliminado)
             
             elif action == "Limpiar":
                 self.departamento_id.clear()
+                self.originales.pop('departamentos', None)
                 self.departamento_nombre.clear()
                 self.departamento_ubicacion.clear()
                 self.departamento_encargado.clear()
@@ -325,89 +481,71 @@ class SearsManagementSystem(QMainWindow):
                 btn_layout.addWidget(btn)
             
             # Tabla
-            self.proveedor_table = QTableWidget()
-            self.proveedor_table.setColumnCount(4)
-            self.proveedor_table.setHorizontalHeaderLabels(["ID", "Nombre", "Contacto", "Teléfono"])
-            self.proveedor_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-            self.proveedor_table.cellClicked.connect(lambda r, _: self.load_proveedor_data(r))
+            self.proveedor_table, self.proveedor_filtro = self.crear_tabla_catalogo('proveedores', self.load_proveedor_data)
             
             layout.addLayout(form_layout)
             layout.addLayout(btn_layout)
+            layout.addWidget(self.proveedor_filtro)
             layout.addWidget(self.proveedor_table)
             widget.setLayout(layout)
             self.stacked_widget.addWidget(widget)
 
         def refresh_proveedor_table(self):
-            query = "SELECT id_proveedor, nombre, contacto, telefono FROM proveedores"
-            proveedores = self.db.execute_query(query, fetch=True)
-            
-            if proveedores is not None:
-                self.proveedor_table.setRowCount(len(proveedores))
-                for row_idx, row_data in enumerate(proveedores):
-                    self.proveedor_table.setItem(row_idx, 0, QTableWidgetItem(str(row_data['id_proveedor'])))
-                    self.proveedor_table.setItem(row_idx, 1, QTableWidgetItem(row_data['nombre']))
-                    self.proveedor_table.setItem(row_idx, 2, QTableWidgetItem(row_data['contacto']))
-                    self.proveedor_table.setItem(row_idx, 3, QTableWidgetItem(row_data['telefono']))
+            self.refresh_tabla('proveedores')
 
+        @con_accion("proveedores.seleccionar")
         def load_proveedor_data(self, row):
-            id_item = self.proveedor_table.item(row, 0)
-            if id_item:
-                id_proveedor = id_item.text()
-                query = "SELECT * FROM proveedores WHERE id_proveedor = %s"
-                proveedor = self.db.execute_query(query, (id_proveedor,), fetch=True)
-                
-                if proveedor and len(proveedor) > 0:
-                    proveedor = proveedor[0]
-                    self.proveedor_id.setText(str(proveedor['id_proveedor']))
-                    self.proveedor_nombre.setText(proveedor['nombre'])
-                    self.proveedor_contacto.setText(proveedor['contacto'])
-                    self.proveedor_telefono.setText(proveedor['telefono'])
+            id_proveedor = self.modelos['proveedores'].llave_en(row)
+            if id_proveedor is not None:
+                self.ejecutar_catalogo(
+                    'proveedores', 'obtener', id_proveedor, clave="proveedores.seleccionar",
+                    al_terminar=lambda proveedor: proveedor and self.mostrar_proveedor(proveedor)
+                )
+
+        def mostrar_proveedor(self, proveedor):
+            self.originales['proveedores'] = proveedor
+            self.proveedor_id.setText(str(proveedor['id_proveedor']))
+            self.proveedor_nombre.setText(proveedor['nombre'])
+            self.proveedor_contacto.setText(proveedor['contacto'])
+            self.proveedor_telefono.setText(proveedor['telefono'])
+
+        def datos_proveedor(self):
+            return {
+                'nombre': self.proveedor_nombre.text(),
+                'contacto': self.proveedor_contacto.text(),
+                'telefono': self.proveedor_telefono.text(),
+            }
 
+        @con_accion("proveedores.{0}")
         def handle_proveedor_action(self, action):
             if action == "Crear":
-                nombre = self.proveedor_nombre.text().strip()
-                contacto = self.proveedor_contacto.text().strip()
-                telefono = self.proveedor_telefono.text().strip()
-                
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del proveedor es obligatorio")
-                    return
-                    
-                query = "INSERT INTO proveedores (nombre, contacto, telefono) VALUES (%s, %s, %s)"
-                result = self.db.execute_query(query, (nombre, contacto, telefono))
-                
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Proveedor creado correctamente")
-                    self.refresh_proveedor_table()
-                    self.refresh_comboboxes()
-                    self.handle_proveedor_action("Limpiar")
+                def creado(result):
+                    if result is not None:
+                        QMessageBox.information(self, "Éxito", "Proveedor creado correctamente")
+                        self.refresh_proveedor_table()
+                        self.invalidar_referencia('proveedores')
+                        self.handle_proveedor_action("Limpiar")
+                self.ejecutar_catalogo('proveedores', 'crear', self.datos_proveedor(), al_terminar=creado)
             
             elif action == "Actualizar":
-                id_proveedor = self.proveedor_id.text().strip()
-                if not id_proveedor:
+                original = self.originales.get('proveedores')
+                if not self.proveedor_id.text().strip() or original is None:
                     QMessageBox.warning(self, "Error", "Seleccione un proveedor para actualizar")
                     return
                     
-                nombre = self.proveedor_nombre.text().strip()
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del proveedor es obligatorio")
-                    return
-                    
-                query = """UPDATE proveedores 
-                        SET nombre = %s, contacto = %s, telefono = %s 
-                        WHERE id_proveedor = %s"""
-                params = (
-                    nombre,
-                    self.proveedor_contacto.text().strip(),
-                    self.proveedor_telefono.text().strip(),
-                    id_proveedor
+                def actualizado(result):
+                    if result is not None:
+                        self.originales['proveedores'] = result
+                        QMessageBox.information(self, "Éxito", "Proveedor actualizado correctamente")
+                        self.modelos['proveedores'].recargar_fila(result['id_proveedor'])
+                        self.invalidar_referencia('proveedores')
+                self.ejecutar_catalogo(
+                    'proveedores', 'guardar_cambios', original, self.datos_proveedor(), al_terminar=actualizado,
+                    al_conflicto=lambda e: self.resolver_conflicto(
+                        'proveedores', original['id_proveedor'], e, self.mostrar_proveedor,
+                        lambda: self.handle_proveedor_action("Limpiar")
+                    )
                 )
-                
-                result = self.db.execute_query(query, params)
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Proveedor actualizado correctamente")
-                    self.refresh_proveedor_table()
-                    self.refresh_comboboxes()
             
             elif action == "Eliminar":
                 id_proveedor = self.proveedor_id.text().strip()
@@ -422,33 +560,19 @@ class SearsManagementSystem(QMainWindow):
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    try:
-                        # Verificar si hay productos asociados
-                        query_check = "SELECT COUNT(*) AS count FROM productos WHERE id_proveedor = %s"
-                        count = self.db.execute_query(query_check, (id_proveedor,), fetch=True)
-                        
-                        if count and count[0]['count'] > 0:
-                            QMessageBox.warning(
-                                self, "Error", 
-                                "No se puede eliminar: Hay productos asociados a este proveedor"
-                            )
-                            return
-                        
-                        query = "DELETE FROM proveedores WHERE id_proveedor = %s"
-                        result = self.db.execute_query(query, (id_proveedor,))
-                        
-                        if result is not None and result > 0:
+                    def eliminado(result):
+                        if result:
                             QMessageBox.information(self, "Éxito", "Proveedor eliminado correctamente")
                             self.refresh_proveedor_table()
-                            self.refresh_comboboxes()
+                            self.invalidar_referencia('proveedores')
                             self.handle_proveedor_action("Limpiar")
                         else:
                             QMessageBox.warning(self, "Error", "No se encontró el proveedor para eliminar")
-                    except Error as e:
-                        QMessageBox.critical(self, "Error", f"Error al eliminar: {str(e)}")
+                    self.ejecutar_catalogo('proveedores', 'eliminar', id_proveedor, al_terminar=eliminado)
             
             elif action == "Limpiar":
                 self.proveedor_id.clear()
+                self.originales.pop('proveedores', None)
                 self.proveedor_nombre.clear()
                 self.proveedor_contacto.clear()
                 self.proveedor_telefono.clear()
@@ -479,7 +603,9 @@ class SearsManagementSystem(QMainWindow):
             
             # Combobox para relaciones
             self.producto_departamento = QComboBox()
+            self.producto_departamento.setModel(self.modelos_referencia['departamentos'])
             self.producto_proveedor = QComboBox()
+            self.producto_proveedor.setModel(self.modelos_referencia['proveedores'])
             
             # Agregar campos
             for label_text, attr_name, widget_type in campos:
@@ -523,148 +649,89 @@ class SearsManagementSystem(QMainWindow):
                 btn_layout.addWidget(btn)
             
             # Tabla
-            self.producto_table = QTableWidget()
-            self.producto_table.setColumnCount(7)
-            self.producto_table.setHorizontalHeaderLabels(["ID", "Nombre", "Descripción", "Precio Costo", "Precio Público", "Stock", "Departamento"])
-            self.producto_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-            self.producto_table.cellClicked.connect(lambda r, _: self.load_producto_data(r))
+            self.producto_table, self.producto_filtro = self.crear_tabla_catalogo('productos', self.load_producto_data)
             
             # Layout final
             layout.addLayout(form_layout)
             layout.addLayout(btn_layout)
+            layout.addWidget(self.producto_filtro)
             layout.addWidget(self.producto_table)
             widget.setLayout(layout)
             self.stacked_widget.addWidget(widget)
 
         def refresh_producto_table(self):
-            query = """SELECT p.id_producto, p.nombre, p.descripcion, p.precio_costo, 
-                        p.precio_publico, p.stock, d.nombre as departamento
-                FROM productos p
-                LEFT JOIN departamentos d ON p.id_departamento = d.id_departamento"""
-            productos = self.db.execute_query(query, fetch=True)
-            
-            if productos is not None:
-                self.producto_table.setRowCount(len(productos))
-                for row_idx, row_data in enumerate(productos):
-                    self.producto_table.setItem(row_idx, 0, QTableWidgetItem(str(row_data['id_producto'])))
-                    self.producto_table.setItem(row_idx, 1, QTableWidgetItem(row_data['nombre']))
-                    self.producto_table.setItem(row_idx, 2, QTableWidgetItem(row_data['descripcion']))
-                    self.producto_table.setItem(row_idx, 3, QTableWidgetItem(f"${row_data['precio_costo']:.2f}"))
-                    self.producto_table.setItem(row_idx, 4, QTableWidgetItem(f"${row_data['precio_publico']:.2f}"))
-                    self.producto_table.setItem(row_idx, 5, QTableWidgetItem(str(row_data['stock'])))
-                    self.producto_table.setItem(row_idx, 6, QTableWidgetItem(row_data['departamento']))
+            self.refresh_tabla('productos')
 
+        @con_accion("productos.seleccionar")
         def load_producto_data(self, row):
-            id_item = self.producto_table.item(row, 0)
-            if id_item:
-                id_producto = id_item.text()
-                query = "SELECT * FROM productos WHERE id_producto = %s"
-                producto = self.db.execute_query(query, (id_producto,), fetch=True)
-                
-                if producto and len(producto) > 0:
-                    producto = producto[0]
-                    self.producto_id.setText(str(producto['id_producto']))
-                    self.producto_nombre.setText(producto['nombre'])
-                    self.producto_descripcion.setText(producto['descripcion'])
-                    self.producto_precio_costo.setText(str(producto['precio_costo']))
-                    self.producto_precio_publico.setText(str(producto['precio_publico']))
-                    self.producto_stock.setText(str(producto['stock']))
-                    
-                    # Establecer los comboboxes
-                    if producto['id_departamento']:
-                        index = self.producto_departamento.findData(producto['id_departamento'])
-                        if index >= 0:
-                            self.producto_departamento.setCurrentIndex(index)
-                    
-                    if producto['id_proveedor']:
-                        index = self.producto_proveedor.findData(producto['id_proveedor'])
-                        if index >= 0:
-                            self.producto_proveedor.setCurrentIndex(index)
+            id_producto = self.modelos['productos'].llave_en(row)
+            if id_producto is not None:
+                self.ejecutar_catalogo(
+                    'productos', 'obtener', id_producto, clave="productos.seleccionar",
+                    al_terminar=lambda producto: producto and self.mostrar_producto(producto)
+                )
+
+        def mostrar_producto(self, producto):
+            self.originales['productos'] = producto
+            self.producto_id.setText(str(producto['id_producto']))
+            self.producto_nombre.setText(producto['nombre'])
+            self.producto_descripcion.setText(producto['descripcion'])
+            self.producto_precio_costo.setText(str(producto['precio_costo']))
+            self.producto_precio_publico.setText(str(producto['precio_publico']))
+            self.producto_stock.setText(str(producto['stock']))
 
+            # Establecer los comboboxes
+            if producto['id_departamento']:
+                index = self.producto_departamento.findData(producto['id_departamento'])
+                if index >= 0:
+                    self.producto_departamento.setCurrentIndex(index)
+
+            if producto['id_proveedor']:
+                index = self.producto_proveedor.findData(producto['id_proveedor'])
+                if index >= 0:
+                    self.producto_proveedor.setCurrentIndex(index)
+
+        def datos_producto(self):
+            return {
+                'nombre': self.producto_nombre.text(),
+                'descripcion': self.producto_descripcion.text(),
+                'precio_costo': self.producto_precio_costo.text(),
+                'precio_publico': self.producto_precio_publico.text(),
+                'stock': self.producto_stock.text(),
+                'id_departamento': self.producto_departamento.currentData(),
+                'id_proveedor': self.producto_proveedor.currentData(),
+            }
+
+        @con_accion("productos.{0}")
         def handle_producto_action(self, action):
             if action == "Crear":
-                nombre = self.producto_nombre.text().strip()
-                descripcion = self.producto_descripcion.text().strip()
-                precio_costo = self.producto_precio_costo.text().strip()
-                precio_publico = self.producto_precio_publico.text().strip()
-                stock = self.producto_stock.text().strip()
-                
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del producto es obligatorio")
-                    return
-                if not precio_costo or not precio_publico or not stock:
-                    QMessageBox.warning(self, "Error", "Los precios y el stock son obligatorios")
-                    return
-                    
-                try:
-                    precio_costo = float(precio_costo)
-                    precio_publico = float(precio_publico)
-                    stock = int(stock)
-                except ValueError:
-                    QMessageBox.warning(self, "Error", "Los valores deben ser números válidos")
-                    return
-                    
-                id_departamento = self.producto_departamento.currentData()
-                id_proveedor = self.producto_proveedor.currentData()
-                
-                query = """INSERT INTO productos 
-                        (nombre, descripcion, precio_costo, precio_publico, stock, id_departamento, id_proveedor) 
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)"""
-                params = (
-                    nombre,
-                    descripcion,
-                    precio_costo,
-                    precio_publico,
-                    stock,
-                    id_departamento if id_departamento else None,
-                    id_proveedor if id_proveedor else None
-                )
-                
-                result = self.db.execute_query(query, params)
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Producto creado correctamente")
-                    self.refresh_producto_table()
-                    self.handle_producto_action("Limpiar")
+                def creado(result):
+                    if result is not None:
+                        QMessageBox.information(self, "Éxito", "Producto creado correctamente")
+                        self.refresh_producto_table()
+                        self.refresh_cache_productos()
+                        self.handle_producto_action("Limpiar")
+                self.ejecutar_catalogo('productos', 'crear', self.datos_producto(), al_terminar=creado)
             
             elif action == "Actualizar":
-                id_producto = self.producto_id.text().strip()
-                if not id_producto:
+                original = self.originales.get('productos')
+                if not self.producto_id.text().strip() or original is None:
                     QMessageBox.warning(self, "Error", "Seleccione un producto para actualizar")
                     return
                     
-                nombre = self.producto_nombre.text().strip()
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del producto es obligatorio")
-                    return
-                    
-                try:
-                    precio_costo = float(self.producto_precio_costo.text().strip())
-                    precio_publico = float(self.producto_precio_publico.text().strip())
-                    stock = int(self.producto_stock.text().strip())
-                except ValueError:
-                    QMessageBox.warning(self, "Error", "Los valores deben ser números válidos")
-                    return
-                    
-                query = """UPDATE productos 
-                        SET nombre = %s, descripcion = %s, 
-                            precio_costo = %s, precio_publico = %s, stock = %s,
-                            id_departamento = %s, id_proveedor = %s
-                        WHERE id_producto = %s"""
-                params = (
-                    nombre,
-                    self.producto_descripcion.text().strip(),
-                    precio_costo,
-                    precio_publico,
-                    stock,
-                    self.producto_departamento.currentData(),
-                    self.producto_proveedor.currentData(),
-                    id_producto
+                def actualizado(result):
+                    if result is not None:
+                        self.originales['productos'] = result
+                        QMessageBox.information(self, "Éxito", "Producto actualizado correctamente")
+                        self.modelos['productos'].recargar_fila(result['id_producto'])
+                        self.refresh_cache_productos()
+                self.ejecutar_catalogo(
+                    'productos', 'guardar_cambios', original, self.datos_producto(), al_terminar=actualizado,
+                    al_conflicto=lambda e: self.resolver_conflicto(
+                        'productos', original['id_producto'], e, self.mostrar_producto,
+                        lambda: self.handle_producto_action("Limpiar")
+                    )
                 )
-                
-                result = self.db.execute_query(query, params)
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Producto actualizado correctamente")
-                    self.refresh_producto_table()
             
             elif action == "Eliminar":
                 id_producto = self.producto_id.text().strip()
@@ -679,32 +746,20 @@ class SearsManagementSystem(QMainWindow):
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    try:
-                        # Verificar si hay ventas asociadas
-                        query_check = "SELECT COUNT(*) AS count FROM detalle_ventas WHERE id_producto = %s"
-                        count = self.db.execute_query(query_check, (id_producto,), fetch=True)
-                        
-                        if count and count[0]['count'] > 0:
-                            QMessageBox.warning(
-                                self, "Error", 
-                                "No se puede eliminar: Este producto tiene ventas asociadas"
-                            )
-                            return
-                        
-                        query = "DELETE FROM productos WHERE id_producto = %s"
-                        result = self.db.execute_query(query, (id_producto,))
-                        
-                        if result is not None and result > 0:
+                    def eliminado(result):
+                        if result:
                             QMessageBox.information(self, "Éxito", "Producto eliminado correctamente")
                             self.refresh_producto_table()
+                            self.cache_productos.invalidar(int(id_producto))
+                            self.buscador.eliminar(id_producto)
                             self.handle_producto_action("Limpiar")
                         else:
                             QMessageBox.warning(self, "Error", "No se encontró el producto para eliminar")
-                    except Error as e:
-                        QMessageBox.critical(self, "Error", f"Error al eliminar: {str(e)}")
+                    self.ejecutar_catalogo('productos', 'eliminar', id_producto, al_terminar=eliminado)
             
             elif action == "Limpiar":
                 self.producto_id.clear()
+                self.originales.pop('productos', None)
                 self.producto_nombre.clear()
                 self.producto_descripcion.clear()
                 self.producto_precio_costo.clear()
@@ -739,6 +794,7 @@ class SearsManagementSystem(QMainWindow):
             
             # Combobox para departamento
             self.empleado_departamento = QComboBox()
+            self.empleado_departamento.setModel(self.modelos_referencia['departamentos'])
             hbox = QHBoxLayout()
             hbox.addWidget(QLabel("Departamento:"))
             hbox.addWidget(self.empleado_departamento)
@@ -753,107 +809,78 @@ class SearsManagementSystem(QMainWindow):
                 btn_layout.addWidget(btn)
             
             # Tabla
-            self.empleado_table = QTableWidget()
-            self.empleado_table.setColumnCount(5)
-            self.empleado_table.setHorizontalHeaderLabels(["ID", "Nombre", "Domicilio", "Puesto", "Departamento"])
-            self.empleado_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-            self.empleado_table.cellClicked.connect(lambda r, _: self.load_empleado_data(r))
+            self.empleado_table, self.empleado_filtro = self.crear_tabla_catalogo('empleados', self.load_empleado_data)
             
             # Layout final
             layout.addLayout(form_layout)
             layout.addLayout(btn_layout)
+            layout.addWidget(self.empleado_filtro)
             layout.addWidget(self.empleado_table)
             widget.setLayout(layout)
             self.stacked_widget.addWidget(widget)
 
         def refresh_empleado_table(self):
-            query = """SELECT e.id_empleado, e.nombre, e.domicilio, e.puesto, d.nombre as departamento
-                FROM empleados e
-                LEFT JOIN departamentos d ON e.id_departamento = d.id_departamento"""
-            empleados = self.db.execute_query(query, fetch=True)
-            
-            if empleados is not None:
-                self.empleado_table.setRowCount(len(empleados))
-                for row_idx, row_data in enumerate(empleados):
-                    self.empleado_table.setItem(row_idx, 0, QTableWidgetItem(str(row_data['id_empleado'])))
-                    self.empleado_table.setItem(row_idx, 1, QTableWidgetItem(row_data['nombre']))
-                    self.empleado_table.setItem(row_idx, 2, QTableWidgetItem(row_data['domicilio']))
-                    self.empleado_table.setItem(row_idx, 3, QTableWidgetItem(row_data['puesto']))
-                    self.empleado_table.setItem(row_idx, 4, QTableWidgetItem(row_data['departamento']))
+            self.refresh_tabla('empleados')
 
+        @con_accion("empleados.seleccionar")
         def load_empleado_data(self, row):
-            id_item = self.empleado_table.item(row, 0)
-            if id_item:
-                id_empleado = id_item.text()
-                query = "SELECT * FROM empleados WHERE id_empleado = %s"
-                empleado = self.db.execute_query(query, (id_empleado,), fetch=True)
-                
-                if empleado and len(empleado) > 0:
-                    empleado = empleado[0]
-                    self.empleado_id.setText(str(empleado['id_empleado']))
-                    self.empleado_nombre.setText(empleado['nombre'])
-                    self.empleado_domicilio.setText(empleado['domicilio'])
-                    self.empleado_puesto.setText(empleado['puesto'])
-                    
-                    if empleado['id_departamento']:
-                        index = self.empleado_departamento.findData(empleado['id_departamento'])
-                        if index >= 0:
-                            self.empleado_departamento.setCurrentIndex(index)
+            id_empleado = self.modelos['empleados'].llave_en(row)
+            if id_empleado is not None:
+                self.ejecutar_catalogo(
+                    'empleados', 'obtener', id_empleado, clave="empleados.seleccionar",
+                    al_terminar=lambda empleado: empleado and self.mostrar_empleado(empleado)
+                )
 
+        def mostrar_empleado(self, empleado):
+            self.originales['empleados'] = empleado
+            self.empleado_id.setText(str(empleado['id_empleado']))
+            self.empleado_nombre.setText(empleado['nombre'])
+            self.empleado_domicilio.setText(empleado['domicilio'])
+            self.empleado_puesto.setText(empleado['puesto'])
+
+            if empleado['id_departamento']:
+                index = self.empleado_departamento.findData(empleado['id_departamento'])
+                if index >= 0:
+                    self.empleado_departamento.setCurrentIndex(index)
+
+        def datos_empleado(self):
+            return {
+                'nombre': self.empleado_nombre.text(),
+                'domicilio': self.empleado_domicilio.text(),
+                'puesto': self.empleado_puesto.text(),
+                'id_departamento': self.empleado_departamento.currentData(),
+            }
+
+        @con_accion("empleados.{0}")
         def handle_empleado_action(self, action):
             if action == "Crear":
-                nombre = self.empleado_nombre.text().strip()
-                domicilio = self.empleado_domicilio.text().strip()
-                puesto = self.empleado_puesto.text().strip()
-                
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del empleado es obligatorio")
-                    return
-                    
-                id_departamento = self.empleado_departamento.currentData()
-                
-                query = """INSERT INTO empleados 
-                        (nombre, domicilio, puesto, id_departamento) 
-                        VALUES (%s, %s, %s, %s)"""
-                params = (
-                    nombre,
-                    domicilio,
-                    puesto,
-                    id_departamento if id_departamento else None
-                )
-                
-                result = self.db.execute_query(query, params)
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Empleado creado correctamente")
-                    self.refresh_empleado_table()
-                    self.handle_empleado_action("Limpiar")
+                def creado(result):
+                    if result is not None:
+                        QMessageBox.information(self, "Éxito", "Empleado creado correctamente")
+                        self.refresh_empleado_table()
+                        self.invalidar_referencia('empleados')
+                        self.handle_empleado_action("Limpiar")
+                self.ejecutar_catalogo('empleados', 'crear', self.datos_empleado(), al_terminar=creado)
             
             elif action == "Actualizar":
-                id_empleado = self.empleado_id.text().strip()
-                if not id_empleado:
+                original = self.originales.get('empleados')
+                if not self.empleado_id.text().strip() or original is None:
                     QMessageBox.warning(self, "Error", "Seleccione un empleado para actualizar")
                     return
                     
-                nombre = self.empleado_nombre.text().strip()
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del empleado es obligatorio")
-                    return
-                    
-                query = """UPDATE empleados 
-                        SET nombre = %s, domicilio = %s, puesto = %s, id_departamento = %s
-                        WHERE id_empleado = %s"""
-                params = (
-                    nombre,
-                    self.empleado_domicilio.text().strip(),
-                    self.empleado_puesto.text().strip(),
-                    self.empleado_departamento.currentData(),
-                    id_empleado
+                def actualizado(result):
+                    if result is not None:
+                        self.originales['empleados'] = result
+                        QMessageBox.information(self, "Éxito", "Empleado actualizado correctamente")
+                        self.modelos['empleados'].recargar_fila(result['id_empleado'])
+                        self.invalidar_referencia('empleados')
+                self.ejecutar_catalogo(
+                    'empleados', 'guardar_cambios', original, self.datos_empleado(), al_terminar=actualizado,
+                    al_conflicto=lambda e: self.resolver_conflicto(
+                        'empleados', original['id_empleado'], e, self.mostrar_empleado,
+                        lambda: self.handle_empleado_action("Limpiar")
+                    )
                 )
-                
-                result = self.db.execute_query(query, params)
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Empleado actualizado correctamente")
-                    self.refresh_empleado_table()
             
             elif action == "Eliminar":
                 id_empleado = self.empleado_id.text().strip()
@@ -868,32 +895,19 @@ class SearsManagementSystem(QMainWindow):
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    try:
-                        # Verificar si hay ventas asociadas
-                        query_check = "SELECT COUNT(*) AS count FROM ventas WHERE id_empleado = %s"
-                        count = self.db.execute_query(query_check, (id_empleado,), fetch=True)
-                        
-                        if count and count[0]['count'] > 0:
-                            QMessageBox.warning(
-                                self, "Error", 
-                                "No se puede eliminar: Este empleado tiene ventas asociadas"
-                            )
-                            return
-                        
-                        query = "DELETE FROM empleados WHERE id_empleado = %s"
-                        result = self.db.execute_query(query, (id_empleado,))
-                        
-                        if result is not None and result > 0:
+                    def eliminado(result):
+                        if result:
                             QMessageBox.information(self, "Éxito", "Empleado eliminado correctamente")
                             self.refresh_empleado_table()
+                            self.invalidar_referencia('empleados')
                             self.handle_empleado_action("Limpiar")
                         else:
                             QMessageBox.warning(self, "Error", "No se encontró el empleado para eliminar")
-                    except Error as e:
-                        QMessageBox.critical(self, "Error", f"Error al eliminar: {str(e)}")
+                    self.ejecutar_catalogo('empleados', 'eliminar', id_empleado, al_terminar=eliminado)
             
             elif action == "Limpiar":
                 self.empleado_id.clear()
+                self.originales.pop('empleados', None)
                 self.empleado_nombre.clear()
                 self.empleado_domicilio.clear()
                 self.empleado_puesto.clear()
@@ -938,98 +952,72 @@ class SearsManagementSystem(QMainWindow):
                 btn_layout.addWidget(btn)
             
             # Tabla
-            self.cliente_table = QTableWidget()
-            self.cliente_table.setColumnCount(4)
-            self.cliente_table.setHorizontalHeaderLabels(["ID", "Nombre", "Correo", "Teléfono"])
-            self.cliente_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
-            self.cliente_table.cellClicked.connect(lambda r, _: self.load_cliente_data(r))
+            self.cliente_table, self.cliente_filtro = self.crear_tabla_catalogo('clientes', self.load_cliente_data)
             
             # Layout final
             layout.addLayout(form_layout)
             layout.addLayout(btn_layout)
+            layout.addWidget(self.cliente_filtro)
             layout.addWidget(self.cliente_table)
             widget.setLayout(layout)
             self.stacked_widget.addWidget(widget)
 
         def refresh_cliente_table(self):
-            query = "SELECT id_cliente, nombre, correo, telefono FROM clientes"
-            clientes = self.db.execute_query(query, fetch=True)
-            
-            if clientes is not None:
-                self.cliente_table.setRowCount(len(clientes))
-                for row_idx, row_data in enumerate(clientes):
-                    self.cliente_table.setItem(row_idx, 0, QTableWidgetItem(str(row_data['id_cliente'])))
-                    self.cliente_table.setItem(row_idx, 1, QTableWidgetItem(row_data['nombre']))
-                    self.cliente_table.setItem(row_idx, 2, QTableWidgetItem(row_data['correo']))
-                    self.cliente_table.setItem(row_idx, 3, QTableWidgetItem(row_data['telefono']))
+            self.refresh_tabla('clientes')
 
+        @con_accion("clientes.seleccionar")
         def load_cliente_data(self, row):
-            id_item = self.cliente_table.item(row, 0)
-            if id_item:
-                id_cliente = id_item.text()
-                query = "SELECT * FROM clientes WHERE id_cliente = %s"
-                cliente = self.db.execute_query(query, (id_cliente,), fetch=True)
-                
-                if cliente and len(cliente) > 0:
-                    cliente = cliente[0]
-                    self.cliente_id.setText(str(cliente['id_cliente']))
-                    self.cliente_nombre.setText(cliente['nombre'])
-                    self.cliente_correo.setText(cliente['correo'])
-                    self.cliente_telefono.setText(cliente['telefono'])
+            id_cliente = self.modelos['clientes'].llave_en(row)
+            if id_cliente is not None:
+                self.ejecutar_catalogo(
+                    'clientes', 'obtener', id_cliente, clave="clientes.seleccionar",
+                    al_terminar=lambda cliente: cliente and self.mostrar_cliente(cliente)
+                )
 
+        def mostrar_cliente(self, cliente):
+            self.originales['clientes'] = cliente
+            self.cliente_id.setText(str(cliente['id_cliente']))
+            self.cliente_nombre.setText(cliente['nombre'])
+            self.cliente_correo.setText(cliente['correo'])
+            self.cliente_telefono.setText(cliente['telefono'])
+
+        def datos_cliente(self):
+            return {
+                'nombre': self.cliente_nombre.text(),
+                'correo': self.cliente_correo.text(),
+                'telefono': self.cliente_telefono.text(),
+            }
+
+        @con_accion("clientes.{0}")
         def handle_cliente_action(self, action):
             if action == "Crear":
-                nombre = self.cliente_nombre.text().strip()
-                correo = self.cliente_correo.text().strip()
-                telefono = self.cliente_telefono.text().strip()
-                
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del cliente es obligatorio")
-                    return
-                if not correo:
-                    QMessageBox.warning(self, "Error", "El correo del cliente es obligatorio")
-                    return
-                    
-                query = "INSERT INTO clientes (nombre, correo, telefono) VALUES (%s, %s, %s)"
-                result = self.db.execute_query(query, (nombre, correo, telefono))
-                
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Cliente creado correctamente")
-                    self.refresh_cliente_table()
-                    self.load_clientes_empleados()  # Actualizar combo de clientes en ventas
-                    self.handle_cliente_action("Limpiar")
+                def creado(result):
+                    if result is not None:
+                        QMessageBox.information(self, "Éxito", "Cliente creado correctamente")
+                        self.refresh_cliente_table()
+                        self.invalidar_referencia('clientes')
+                        self.handle_cliente_action("Limpiar")
+                self.ejecutar_catalogo('clientes', 'crear', self.datos_cliente(), al_terminar=creado)
             
             elif action == "Actualizar":
-                id_cliente = self.cliente_id.text().strip()
-                if not id_cliente:
+                original = self.originales.get('clientes')
+                if not self.cliente_id.text().strip() or original is None:
                     QMessageBox.warning(self, "Error", "Seleccione un cliente para actualizar")
                     return
                     
-                nombre = self.cliente_nombre.text().strip()
-                if not nombre:
-                    QMessageBox.warning(self, "Error", "El nombre del cliente es obligatorio")
-                    return
-                    
-                correo = self.cliente_correo.text().strip()
-                if not correo:
-                    QMessageBox.warning(self, "Error", "El correo del cliente es obligatorio")
-                    return
-                    
-                query = """UPDATE clientes 
-                        SET nombre = %s, correo = %s, telefono = %s 
-                        WHERE id_cliente = %s"""
-                params = (
-                    nombre,
-                    correo,
-                    self.cliente_telefono.text().strip(),
-                    id_cliente
+                def actualizado(result):
+                    if result is not None:
+                        self.originales['clientes'] = result
+                        QMessageBox.information(self, "Éxito", "Cliente actualizado correctamente")
+                        self.modelos['clientes'].recargar_fila(result['id_cliente'])
+                        self.invalidar_referencia('clientes')
+                self.ejecutar_catalogo(
+                    'clientes', 'guardar_cambios', original, self.datos_cliente(), al_terminar=actualizado,
+                    al_conflicto=lambda e: self.resolver_conflicto(
+                        'clientes', original['id_cliente'], e, self.mostrar_cliente,
+                        lambda: self.handle_cliente_action("Limpiar")
+                    )
                 )
-                
-                result = self.db.execute_query(query, params)
-                if result is not None:
-                    QMessageBox.information(self, "Éxito", "Cliente actualizado correctamente")
-                    self.refresh_cliente_table()
-                    self.load_clientes_empleados()  # Actualizar combo de clientes en ventas
             
             elif action == "Eliminar":
                 id_cliente = self.cliente_id.text().strip()
@@ -1044,33 +1032,19 @@ class SearsManagementSystem(QMainWindow):
                 )
                 
                 if reply == QMessageBox.StandardButton.Yes:
-                    try:
-                        # Verificar si hay ventas asociadas
-                        query_check = "SELECT COUNT(*) AS count FROM ventas WHERE id_cliente = %s"
-                        count = self.db.execute_query(query_check, (id_cliente,), fetch=True)
-                        
-                        if count and count[0]['count'] > 0:
-                            QMessageBox.warning(
-                                self, "Error", 
-                                "No se puede eliminar: Este cliente tiene ventas asociadas"
-                            )
-                            return
-                        
-                        query = "DELETE FROM clientes WHERE id_cliente = %s"
-                        result = self.db.execute_query(query, (id_cliente,))
-                        
-                        if result is not None and result > 0:
+                    def eliminado(result):
+                        if result:
                             QMessageBox.information(self, "Éxito", "Cliente eliminado correctamente")
                             self.refresh_cliente_table()
-                            self.load_clientes_empleados()  # Actualizar combo de clientes en ventas
+                            self.invalidar_referencia('clientes')
                             self.handle_cliente_action("Limpiar")
                         else:
                             QMessageBox.warning(self, "Error", "No se encontró el cliente para eliminar")
-                    except Error as e:
-                        QMessageBox.critical(self, "Error", f"Error al eliminar: {str(e)}")
+                    self.ejecutar_catalogo('clientes', 'eliminar', id_cliente, al_terminar=eliminado)
             
             elif action == "Limpiar":
                 self.cliente_id.clear()
+                self.originales.pop('clientes', None)
                 self.cliente_nombre.clear()
                 self.cliente_correo.clear()
                 self.cliente_telefono.clear()
@@ -1083,11 +1057,23 @@ class SearsManagementSystem(QMainWindow):
             # Parte superior: Cliente, Empleado
             top_layout = QHBoxLayout()
             
+            # Con miles de clientes el combo no se llena item por item: usa el
+            # modelo compartido y se busca escribiendo (completador)
             self.cliente_combo = QComboBox()
             self.cliente_combo.setMinimumWidth(250)
+            self.cliente_combo.setModel(self.modelos_referencia['clientes'])
+            self.cliente_combo.setEditable(True)
+            self.cliente_combo.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+            completador = QCompleter(self.modelos_referencia['clientes'], self.cliente_combo)
+            completador.setCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+            completador.setFilterMode(Qt.MatchFlag.MatchContains)
+            completador.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
+            self.cliente_combo.setCompleter(completador)
+            self.cliente_combo.view().setUniformItemSizes(True)
             
             self.empleado_combo = QComboBox()
             self.empleado_combo.setMinimumWidth(250)
+            self.empleado_combo.setModel(self.modelos_referencia['empleados'])
             
             self.cliente_combo.setToolTip("Seleccione el cliente")
             self.empleado_combo.setToolTip("Seleccione el empleado que realiza la venta")
@@ -1104,6 +1090,7 @@ class SearsManagementSystem(QMainWindow):
             search_layout = QHBoxLayout()
             self.producto_input = QLineEdit()
             self.producto_input.setPlaceholderText("Nombre o Código")
+            self.producto_input.returnPressed.connect(self.escanear_producto)
             self.buscar_btn = QPushButton("Buscar")
             self.buscar_btn.clicked.connect(self.buscar_producto)
             search_layout.addWidget(QLabel("Producto:"))
@@ -1131,10 +1118,15 @@ class SearsManagementSystem(QMainWindow):
             cantidad_layout.addWidget(self.agregar_btn)
             layout.addLayout(cantidad_layout)
 
-            # Carrito de venta con botones de eliminación
-            self.venta_table = QTableWidget(0, 5)
-            self.venta_table.setHorizontalHeaderLabels(["ID", "Nombre", "Cantidad", "Subtotal", "Quitar"])
+            # Carrito de venta; la columna Quitar elimina la línea
+            self.modelo_carrito = ModeloCarrito(parent=self)
+            self.carrito = self.modelo_carrito.carrito
+            self.venta_table = QTableView()
+            self.venta_table.setModel(self.modelo_carrito)
+            self.venta_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+            self.venta_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
             self.venta_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            self.venta_table.clicked.connect(self.click_carrito)
             layout.addWidget(QLabel("Carrito de venta:"))
             layout.addWidget(self.venta_table)
 
@@ -1166,142 +1158,111 @@ class SearsManagementSystem(QMainWindow):
 
             widget.setLayout(layout)
             self.stacked_widget.addWidget(widget)
-            self.carrito = []
 
         def load_clientes_empleados(self):
-            try:
-                # Limpiar los combobox
-                self.cliente_combo.clear()
-                self.empleado_combo.clear()
-                
-                # Cargar clientes (excluyendo al cliente general)
-                clientes = self.db.execute_query(
-                    "SELECT id_cliente, nombre FROM clientes WHERE id_cliente != 1 ORDER BY nombre", 
-                    fetch=True
-                )
-                
-                # Cargar empleados activos (asumiendo que nivel_acceso > 0 significa activo)
-                empleados = self.db.execute_query(
-                    """SELECT id_empleado, nombre, puesto 
-                    FROM empleados 
-                    WHERE nivel_acceso > 0 
-                    ORDER BY nombre""", 
-                    fetch=True
-                )
-                
-                # Añadir opción por defecto
-                self.cliente_combo.addItem("Cliente General", 1)  # Usamos el ID 1 para cliente general
-                self.empleado_combo.addItem("Seleccione empleado...", None)
-                
-                # Llenar combobox de clientes
-                if clientes:
-                    for cliente in clientes:
-                        self.cliente_combo.addItem(
-                            f"{cliente['nombre']}", 
-                            cliente['id_cliente']
-                        )
-                
-                # Llenar combobox de empleados
-                if empleados:
-                    for empleado in empleados:
-                        self.empleado_combo.addItem(
-                            f"{empleado['nombre']} ({empleado['puesto']})", 
-                            empleado['id_empleado']
-                        )
-                        
-            except Exception as e:
-                print(f"Error al cargar clientes/empleados: {e}")
-                QMessageBox.warning(self, "Error", "No se pudieron cargar los empleados/clientes")
+            # Combos de cliente y empleado de la pantalla de ventas
+            self.refresh_referencia('clientes')
+            self.refresh_referencia('empleados')
 
         def actualizar_stock_disponible(self, row, column):
             # Actualiza el label de stock cuando se selecciona un producto
-            stock = int(self.resultado_table.item(row, 3).text())
+            stock = self.producto_en_fila(row)["stock"]
             self.stock_label.setText(f"Stock disponible: {stock}")
             self.cantidad_input.setMaximum(stock)
             self.cantidad_input.setValue(1)  # Resetear a 1 cada vez que se selecciona un producto
 
+        @con_accion("ventas.escanear")
+        def escanear_producto(self):
+            # Un código escaneado que está en caché va directo al carrito
+            producto = self.servicio_ventas.escanear(self.producto_input.text())
+            if producto is None:
+                self.buscar_producto()
+                return
+            self.llenar_resultados([producto])
+            self.resultado_table.setCurrentCell(0, 0)
+            self.agregar_producto(producto, self.cantidad_input.value(), al_agregar=self.producto_input.clear)
+
+        @con_accion("ventas.buscar")
         def buscar_producto(self):
             texto = self.producto_input.text().strip()
-            query = """
-    SELECT id_producto, nombre, precio_publico, stock 
-    FROM productos 
-    WHERE nombre LIKE %s OR id_producto = %s OR codigo_barras = %s
-"""
-            resultados = self.db.execute_query(query, (f"%{texto}%", texto, texto), fetch=True)
+            # Acierto en la caché: sin viaje a la base
+            producto = self.servicio_ventas.escanear(texto)
+            if producto is not None:
+                self.worker.cancelar("buscar_producto")
+                self.llenar_resultados([producto])
+                return
+            # Código de barras/id exacto o búsqueda por nombre en el índice de trigramas.
+            # Una búsqueda nueva descarta el resultado de la anterior
+            self.worker.ejecutar(
+                self.servicio_ventas.buscar, texto,
+                al_terminar=self.llenar_resultados,
+                clave="buscar_producto"
+            )
+
+        def llenar_resultados(self, resultados):
             self.resultado_table.setRowCount(0)
             
             if resultados:
                 for row in resultados:
                     r = self.resultado_table.rowCount()
                     self.resultado_table.insertRow(r)
-                    self.resultado_table.setItem(r, 0, QTableWidgetItem(str(row["id_producto"])))
+                    id_item = QTableWidgetItem(str(row["id_producto"]))
+                    id_item.setData(Qt.ItemDataRole.UserRole, row)
+                    self.resultado_table.setItem(r, 0, id_item)
                     self.resultado_table.setItem(r, 1, QTableWidgetItem(row["nombre"]))
                     self.resultado_table.setItem(r, 2, QTableWidgetItem(f"{row['precio_publico']:.2f}"))
                     self.resultado_table.setItem(r, 3, QTableWidgetItem(str(row["stock"])))
 
+        @con_accion("ventas.agregar")
         def agregar_a_venta(self):
             selected = self.resultado_table.currentRow()
             if selected == -1:
                 QMessageBox.warning(self, "Error", "Seleccione un producto")
                 return
-                
-            cantidad = self.cantidad_input.value()
-            stock = int(self.resultado_table.item(selected, 3).text())
             
-            if cantidad > stock:
-                QMessageBox.warning(self, "Error", "No hay suficiente stock")
-                return
-                
-            id_prod = int(self.resultado_table.item(selected, 0).text())
-            nombre = self.resultado_table.item(selected, 1).text()
-            precio = float(self.resultado_table.item(selected, 2).text())
-            subtotal = precio * cantidad
-            
-            # Verificar si el producto ya está en el carrito
-            for item in self.carrito:
-                if item["id"] == id_prod:
-                    # Verificar si al sumar la cantidad supera el stock
-                    if (item["cantidad"] + cantidad) > stock:
-                        QMessageBox.warning(self, "Error", "No hay suficiente stock para agregar más unidades")
-                        return
-                    item["cantidad"] += cantidad
-                    item["subtotal"] += subtotal
-                    self.actualizar_tabla_venta()
-                    self.actualizar_total()
-                    return
-                    
-            # Si no está, agregarlo
-            self.carrito.append({
-                "id": id_prod, 
-                "nombre": nombre, 
-                "cantidad": cantidad, 
-                "subtotal": subtotal,
-                "precio_unitario": precio,
-                "stock_disponible": stock
-            })
-            self.actualizar_tabla_venta()
+            self.agregar_producto(self.producto_en_fila(selected), self.cantidad_input.value())
+
+        def producto_en_fila(self, row):
+            # Precio y stock de la caché (o de la fila del resultado), no del texto de las celdas
+            id_item = self.resultado_table.item(row, 0)
+            return self.servicio_ventas.producto(
+                int(id_item.text()), respaldo=id_item.data(Qt.ItemDataRole.UserRole)
+            )
+
+        def agregar_producto(self, producto, cantidad, al_agregar=None):
+            # Apartar el stock en la base (otro hilo) y, ya apartado, poner la línea
+            en_carrito = self.carrito.cantidad(producto["id_producto"])
+            self.worker.ejecutar(
+                self.servicio_ventas.apartar, producto, cantidad, en_carrito,
+                al_terminar=lambda disponible: self.producto_apartado(producto, cantidad, disponible, al_agregar),
+                al_fallar=lambda e: self.apartado_fallido(e, cantidad),
+                cancelable=False
+            )
+
+        def producto_apartado(self, producto, cantidad, disponible, al_agregar):
+            self.modelo_carrito.agregar(producto, cantidad, disponible)
             self.actualizar_total()
+            if al_agregar:
+                al_agregar()
 
-        def actualizar_tabla_venta(self):
-            self.venta_table.setRowCount(0)
-            for row, item in enumerate(self.carrito):
-                self.venta_table.insertRow(row)
-                self.venta_table.setItem(row, 0, QTableWidgetItem(str(item["id"])))
-                self.venta_table.setItem(row, 1, QTableWidgetItem(item["nombre"]))
-                self.venta_table.setItem(row, 2, QTableWidgetItem(str(item["cantidad"])))
-                self.venta_table.setItem(row, 3, QTableWidgetItem(f"${item['subtotal']:.2f}"))
-                
-                # Botón para eliminar este producto específico
-                btn_eliminar = QPushButton("X")
-                btn_eliminar.setStyleSheet("background-color: #ffcccc; max-width: 30px;")
-                btn_eliminar.clicked.connect(lambda _, r=row: self.eliminar_producto_carrito(r))
-                self.venta_table.setCellWidget(row, 4, btn_eliminar)
+        def apartado_fallido(self, e, cantidad):
+            if isinstance(e, StockInsuficienteError):
+                if e.solicitado > cantidad:
+                    QMessageBox.warning(self, "Error", "No hay suficiente stock para agregar más unidades")
+                else:
+                    QMessageBox.warning(self, "Error", "No hay suficiente stock")
+            else:
+                QMessageBox.critical(self, "Error", f"No se pudo apartar el producto:\n{str(e)}")
+
+        def click_carrito(self, index):
+            if index.column() == ModeloCarrito.COLUMNA_QUITAR:
+                self.eliminar_producto_carrito(index.row())
 
         def eliminar_producto_carrito(self, row):
             if 0 <= row < len(self.carrito):
-                self.carrito.pop(row)
-                self.actualizar_tabla_venta()
+                linea = self.modelo_carrito.quitar(row)
                 self.actualizar_total()
+                self.worker.ejecutar(self.servicio_ventas.liberar, linea.id, cancelable=False)
 
         def limpiar_carrito(self):
             if self.carrito:
@@ -1311,15 +1272,15 @@ class SearsManagementSystem(QMainWindow):
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
                 )
                 if reply == QMessageBox.StandardButton.Yes:
-                    self.carrito.clear()
-                    self.venta_table.setRowCount(0)
+                    self.modelo_carrito.vaciar()
                     self.actualizar_total()
                     self.ticket_display.clear()
+                    self.worker.ejecutar(self.servicio_ventas.liberar, cancelable=False)
 
         def actualizar_total(self):
-            total = sum(item["subtotal"] for item in self.carrito)
-            self.total_label.setText(f"Total: ${total:.2f}")
+            self.total_label.setText(f"Total: ${self.carrito.total:.2f}")
 
+        @con_accion("ventas.confirmar")
         def confirmar_venta(self):
             if not self.carrito:
                 QMessageBox.warning(self, "Error", "El carrito está vacío")
@@ -1332,89 +1293,326 @@ class SearsManagementSystem(QMainWindow):
                 QMessageBox.warning(self, "Error", "Seleccione un empleado")
                 return
             
-            # Verificar stock antes de procesar la venta
-            for item in self.carrito:
-                # Obtener stock actual de la base de datos
-                query = "SELECT stock FROM productos WHERE id_producto = %s"
-                producto = self.db.execute_query(query, (item["id"],), fetch=True)
-                
-                if not producto or producto[0]["stock"] < item["cantidad"]:
-                    QMessageBox.warning(
-                        self, "Error", 
-                        f"No hay suficiente stock para {item['nombre']}\nStock actual: {producto[0]['stock'] if producto else 0}"
-                    )
-                    return
+            # Copia del carrito y datos del ticket: la venta se registra en otro hilo
+            lineas = self.carrito.lineas()
+            ticket = {
+                "cliente": self.cliente_combo.currentText(),
+                "empleado": self.empleado_combo.currentText()
+            }
+            
+            # Bloquear el carrito mientras se registra la venta
+            self.bloquear_carrito(True)
+            
+            # Registrar venta, detalles y stock en una sola transacción
+            self.worker.ejecutar(
+                self.servicio_ventas.cobrar, id_cliente, id_empleado, lineas,
+                al_terminar=lambda venta: self.venta_registrada(venta, lineas, ticket),
+                al_fallar=lambda e: self.venta_fallida(e, lineas),
+                al_finalizar=lambda: self.bloquear_carrito(False),
+                cancelable=False
+            )
+
+        def bloquear_carrito(self, bloquear):
+            self.confirmar_btn.setEnabled(not bloquear)
+            self.agregar_btn.setEnabled(not bloquear)
+            self.limpiar_btn.setEnabled(not bloquear)
+            self.venta_table.setEnabled(not bloquear)
+
+        def venta_registrada(self, venta, lineas, ticket):
+            # Mostrar ticket
+            self.ticket_display.setPlainText(
+                formatear_ticket(venta, lineas, ticket['cliente'], ticket['empleado'])
+            )
             
-            try:
-                # Calcular totales
-                subtotal = sum(item["subtotal"] for item in self.carrito)
-                iva = subtotal * 0.16  # Asumiendo 16% de IVA
-                total = subtotal + iva
-                
-                # Generar folio
-                folio = f"V-{time.strftime('%Y%m%d')}-{random.randint(1000, 9999)}"
-                
-                # Registrar la venta
-                result = self.db.execute_query(
-                    """INSERT INTO ventas 
-                    (folio, id_cliente, id_empleado, fecha, subtotal, iva, total, estado, metodo_pago) 
-                    VALUES (%s, %s, %s, NOW(), %s, %s, %s, 'completada', 'efectivo')""", 
-                    (folio, id_cliente, id_empleado, subtotal, iva, total)
+            # Limpiar carrito y actualizar datos
+            self.modelo_carrito.vaciar()
+            self.actualizar_total()
+            self.refresh_producto_table()  # Actualizar tabla de productos
+            self.buscar_producto()  # Actualizar resultados de búsqueda
+            self.tablero.invalidar()
+            
+            if venta.get('pendiente'):
+                QMessageBox.information(
+                    self, "Sin conexión",
+                    f"Venta guardada en la caja; se enviará al volver la conexión\nFolio: {venta['folio']}"
                 )
-                
-                if result is None:
-                    QMessageBox.critical(self, "Error", "No se pudo registrar la venta")
-                    return
-                    
-                id_venta = self.db.connection.cursor().lastrowid
-                
-                # Registrar detalles de venta y actualizar stock
-                resumen = f"Venta #{folio}\n"
-                resumen += f"Fecha: {time.strftime('%d/%m/%Y %H:%M')}\n"
-                resumen += f"Cliente: {self.cliente_combo.currentText()}\n"
-                resumen += f"Empleado: {self.empleado_combo.currentText()}\n\n"
-                resumen += "Productos:\n"
-                
-                for item in self.carrito:
-                    # Registrar detalle
-                    self.db.execute_query(
-                        """INSERT INTO detalle_ventas 
-                        (id_venta, id_producto, cantidad, precio_unitario, importe) 
-                        VALUES (%s, %s, %s, %s, %s)""",
-                        (id_venta, item["id"], item["cantidad"], item["precio_unitario"], item["subtotal"])
-                    )
-                    
-                    # Actualizar stock del producto
-                    self.db.execute_query(
-                        "UPDATE productos SET stock = stock - %s WHERE id_producto = %s",
-                        (item["cantidad"], item["id"])
-                    )
-                    
-                    resumen += f"- {item['nombre']} x {item['cantidad']} @ ${item['precio_unitario']:.2f} = ${item['subtotal']:.2f}\n"
-                
-                resumen += f"\nSubtotal: ${subtotal:.2f}\n"
-                resumen += f"IVA (16%): ${iva:.2f}\n"
-                resumen += f"TOTAL: ${total:.2f}"
-                
-                # Mostrar ticket
-                self.ticket_display.setPlainText(resumen)
-                
-                # Limpiar carrito y actualizar datos
-                self.carrito.clear()
-                self.venta_table.setRowCount(0)
-                self.actualizar_total()
-                self.refresh_producto_table()  # Actualizar tabla de productos
-                self.buscar_producto()  # Actualizar resultados de búsqueda
-                
-                QMessageBox.information(self, "Éxito", f"Venta registrada correctamente\nFolio: {folio}")
-            
-            except Exception as e:
+                self.mostrar_estado_diario()
+                return
+            QMessageBox.information(self, "Éxito", f"Venta registrada correctamente\nFolio: {venta['folio']}")
+
+        def venta_fallida(self, e, lineas):
+            if isinstance(e, StockInsuficienteError):
+                nombre = next(
+                    (item['nombre'] for item in lineas if item['id'] == e.id_producto),
+                    str(e.id_producto)
+                )
+                QMessageBox.warning(
+                    self, "Error", 
+                    f"No hay suficiente stock para {nombre}\nStock actual: {e.stock_actual}"
+                )
+            else:
                 QMessageBox.critical(self, "Error", f"Error al registrar la venta:\n{str(e)}")
                 print(f"Error en confirmar_venta: {e}")
 
+        # ------------------------- TABLERO -------------------------
+        def init_tablero_view(self):
+            widget = QWidget()
+            layout = QVBoxLayout()
+
+            # Totales del día
+            totales_layout = QHBoxLayout()
+            self.tablero_total_label = QLabel("Ventas de hoy: $0.00")
+            self.tablero_ventas_label = QLabel("Tickets: 0")
+            self.tablero_promedio_label = QLabel("Ticket promedio: $0.00")
+            for label in (self.tablero_total_label, self.tablero_ventas_label, self.tablero_promedio_label):
+                label.setStyleSheet("font-size: 16px; font-weight: bold;")
+                totales_layout.addWidget(label)
+            totales_layout.addStretch()
+            self.tablero_hora_label = QLabel("")
+            totales_layout.addWidget(self.tablero_hora_label)
+            actualizar_btn = QPushButton("Actualizar")
+            actualizar_btn.clicked.connect(lambda: self.refresh_tablero(forzar=True))
+            totales_layout.addWidget(actualizar_btn)
+            layout.addLayout(totales_layout)
+
+            tablas_layout = QHBoxLayout()
+            self.tablero_productos_table = self.crear_tabla_tablero(
+                tablas_layout, "Productos más vendidos hoy:", ["Producto", "Unidades", "Importe"]
+            )
+            self.tablero_cajeros_table = self.crear_tabla_tablero(
+                tablas_layout, "Ventas por cajero:", ["Cajero", "Tickets", "Total"]
+            )
+            layout.addLayout(tablas_layout)
+            self.tablero_stock_table = self.crear_tabla_tablero(
+                layout, "Productos con poco stock:", ["Código", "Producto", "Stock"]
+            )
+
+            widget.setLayout(layout)
+            self.stacked_widget.addWidget(widget)
+
+            # Se refresca solo mientras la pantalla está a la vista
+            self.tablero_timer = QTimer(self)
+            self.tablero_timer.setInterval(TTL_TABLERO * 1000)
+            self.tablero_timer.timeout.connect(self.refresh_tablero)
+            self.tablero_timer.start()
+
+        def crear_tabla_tablero(self, layout, titulo, columnas):
+            contenedor = QVBoxLayout()
+            contenedor.addWidget(QLabel(titulo))
+            tabla = QTableWidget(0, len(columnas))
+            tabla.setHorizontalHeaderLabels(columnas)
+            tabla.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+            tabla.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+            contenedor.addWidget(tabla)
+            layout.addLayout(contenedor)
+            return tabla
+
+        @con_accion("tablero")
+        def refresh_tablero(self, forzar=False):
+            # Los números salen de los totales por día y de la caché del
+            # tablero; si siguen vigentes, la tarea regresa sin consultar
+            if not forzar and self.stacked_widget.currentIndex() != 6:
+                return
+            self.worker.ejecutar(
+                self.tablero.obtener, forzar,
+                al_terminar=self.mostrar_tablero,
+                al_fallar=self.error_tablero,
+                clave="tablero"
+            )
+
+        def mostrar_tablero(self, datos):
+            self.tablero_total_label.setText(f"Ventas de hoy: ${datos['total']:,.2f}")
+            self.tablero_ventas_label.setText(f"Tickets: {datos['ventas']}")
+            self.tablero_promedio_label.setText(f"Ticket promedio: ${datos['ticket_promedio']:,.2f}")
+            self.tablero_hora_label.setText(f"Actualizado: {datos['hora']}")
+            self.llenar_tabla_tablero(self.tablero_productos_table, [
+                (p['nombre'], str(p['unidades']), f"${float(p['importe']):,.2f}")
+                for p in datos['productos']
+            ])
+            self.llenar_tabla_tablero(self.tablero_cajeros_table, [
+                (c['nombre'], str(c['ventas']), f"${float(c['total']):,.2f}")
+                for c in datos['cajeros']
+            ])
+            self.llenar_tabla_tablero(self.tablero_stock_table, [
+                (p['codigo_barras'], p['nombre'], str(p['stock']))
+                for p in datos['stock_bajo']
+            ])
+
+        def llenar_tabla_tablero(self, tabla, filas):
+            tabla.setRowCount(len(filas))
+            for i, fila in enumerate(filas):
+                for j, valor in enumerate(fila):
+                    tabla.setItem(i, j, QTableWidgetItem(valor))
+
+        def error_tablero(self, e):
+            print(f"Error al cargar el tablero: {e}")
+            self.statusBar().showMessage("No se pudo actualizar el tablero", 5000)
+
+        # ------------------------- IMPORTACIÓN -------------------------
+        @con_accion("importar.{0}")
+        def importar_catalogo(self, tabla):
+            ruta, _ = QFileDialog.getOpenFileName(
+                self, f"Importar {tabla}", "", "CSV o JSON (*.csv *.json *.jsonl *.ndjson)"
+            )
+            if not ruta:
+                return
+            self.progreso_importacion = QProgressDialog(f"Importando {tabla}...", None, 0, 0, self)
+            self.progreso_importacion.setWindowModality(Qt.WindowModality.WindowModal)
+            self.progreso_importacion.setMinimumDuration(0)
+            self.progreso_importacion.show()
+            self.worker.ejecutar(
+                importar, self.db, tabla, ruta,
+                al_progreso=self.avance_importacion,
+                al_terminar=self.importacion_terminada,
+                al_fallar=self.error_importacion,
+                al_finalizar=self.progreso_importacion.close,
+                cancelable=False
+            )
+
+        def avance_importacion(self, avance):
+            self.progreso_importacion.setLabelText(
+                f"Importando {avance['tabla']}: {avance['procesadas']} filas leídas\n"
+                f"{avance['insertadas']} nuevas, {avance['actualizadas']} actualizadas, "
+                f"{avance['con_error']} con error"
+            )
+
+        def importacion_terminada(self, resultado):
+            # Un solo refresco al final, no uno por fila
+            tabla = resultado.tabla
+            if self.modelos[tabla].iniciado:
+                self.modelos[tabla].recargar()
+            if tabla in self.modelos_referencia:
+                self.invalidar_referencia(tabla)
+            if tabla == 'productos':
+                self.refresh_cache_productos()
+
+            mensaje = (
+                f"{resultado.procesadas} filas leídas en {resultado.segundos:.1f}s\n"
+                f"{resultado.insertadas} nuevas, {resultado.actualizadas} actualizadas, "
+                f"{resultado.con_error} con error"
+            )
+            if resultado.errores:
+                mensaje += "\n\n" + "\n".join(
+                    f"Fila {numero}: {error}" for numero, error in resultado.errores[:10]
+                )
+                if resultado.con_error > 10:
+                    mensaje += f"\n... y {resultado.con_error - 10} más"
+                QMessageBox.warning(self, "Importación terminada", mensaje)
+            else:
+                QMessageBox.information(self, "Éxito", mensaje)
+
+        def error_importacion(self, e):
+            QMessageBox.critical(self, "Error", f"No se pudo importar el archivo:\n{str(e)}")
+            print(f"Error en importación: {e}")
+
+        # ------------------------- REPORTES -------------------------
+        def exportar_reporte(self):
+            dialogo = QDialog(self)
+            dialogo.setWindowTitle("Exportar reporte de ventas")
+            layout = QVBoxLayout(dialogo)
+            
+            reporte = QComboBox()
+            for nombre, definicion in REPORTES.items():
+                reporte.addItem(definicion.titulo, nombre)
+            
+            hoy = QDate.currentDate()
+            desde = QDateEdit(QDate(hoy.year(), hoy.month(), 1))
+            hasta = QDateEdit(hoy)
+            for fecha in (desde, hasta):
+                fecha.setCalendarPopup(True)
+                fecha.setDisplayFormat("yyyy-MM-dd")
+            
+            # Filtros opcionales con los datos de referencia que ya están en memoria
+            empleado = QComboBox()
+            departamento = QComboBox()
+            for combo, tabla in ((empleado, 'empleados'), (departamento, 'departamentos')):
+                combo.addItem("Todos", None)
+                for id_registro, texto_registro in sorted(self.referencias.obtener(tabla).items(), key=lambda x: x[1]):
+                    combo.addItem(texto_registro, id_registro)
+            
+            for etiqueta, control in (
+                ("Reporte:", reporte), ("Desde:", desde), ("Hasta:", hasta),
+                ("Empleado:", empleado), ("Departamento:", departamento)
+            ):
+                hbox = QHBoxLayout()
+                hbox.addWidget(QLabel(etiqueta))
+                hbox.addWidget(control)
+                layout.addLayout(hbox)
+            
+            botones = QDialogButtonBox(
+                QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel
+            )
+            botones.accepted.connect(dialogo.accept)
+            botones.rejected.connect(dialogo.reject)
+            layout.addWidget(botones)
+            if dialogo.exec() != QDialog.DialogCode.Accepted:
+                return
+            
+            nombre = reporte.currentData()
+            ruta, _ = QFileDialog.getSaveFileName(
+                self, "Guardar reporte", f"{nombre}_{desde.date().toString('yyyyMMdd')}.csv",
+                "CSV (*.csv);;CSV comprimido (*.csv.gz);;Parquet (*.parquet)"
+            )
+            if not ruta:
+                return
+            
+            filtros = {'empleado': empleado.currentData(), 'departamento': departamento.currentData()}
+            definicion = REPORTES[nombre]
+            filtros = {filtro: valor for filtro, valor in filtros.items() if filtro in definicion.filtros}
+            self.progreso_reporte = QProgressDialog(f"Exportando {definicion.titulo}...", None, 0, 0, self)
+            self.progreso_reporte.setWindowModality(Qt.WindowModality.WindowModal)
+            self.progreso_reporte.setMinimumDuration(0)
+            self.progreso_reporte.show()
+            self.worker.ejecutar(
+                exportar, self.db, nombre, ruta, desde.date().toPyDate(), hasta.date().toPyDate(),
+                al_progreso=lambda filas: self.progreso_reporte.setLabelText(
+                    f"Exportando {definicion.titulo}: {filas} filas"
+                ),
+                al_terminar=lambda resultado, r=ruta: QMessageBox.information(
+                    self, "Éxito", f"{resultado[0]} filas exportadas a {r} en {resultado[1]:.1f}s"
+                ),
+                al_fallar=lambda e: QMessageBox.critical(self, "Error", f"No se pudo exportar el reporte:\n{str(e)}"),
+                al_finalizar=self.progreso_reporte.close,
+                cancelable=False,
+                **filtros
+            )
+
+        def exportar_metricas(self):
+            ruta, _ = QFileDialog.getSaveFileName(
+                self, "Exportar métricas SQL", "metricas_sql.json",
+                "JSON (*.json);;Prometheus (*.prom *.txt)"
+            )
+            if not ruta:
+                return
+            instrumentacion = self.db.instrumentacion
+            contenido = (
+                instrumentacion.exportar_json() if ruta.endswith('.json')
+                else instrumentacion.exportar_prometheus()
+            )
+            try:
+                with open(ruta, 'w', encoding='utf-8') as archivo:
+                    archivo.write(contenido)
+            except OSError as e:
+                QMessageBox.critical(self, "Error", f"No se pudieron guardar las métricas:\n{str(e)}")
+                return
+            QMessageBox.information(self, "Éxito", f"Métricas guardadas en {ruta}")
+
         def closeEvent(self, event):
-            if hasattr(self, 'db') and hasattr(self.db, 'connection'):
-                self.db.connection.close()
+            if hasattr(self, 'cache_productos'):
+                self.cache_productos.detener_refresco()
+            # Primero las tareas en curso: un cobro que termina en el diario
+            # necesita que siga abierto
+            if hasattr(self, 'worker'):
+                self.worker.cancelar_todo()
+                self.worker.esperar()
+            if getattr(self, 'carrito', None):
+                # Que otras cajas no esperen a que venzan los apartados
+                self.servicio_ventas.liberar()
+            if hasattr(self, 'reenviador'):
+                self.reenviador.detener()
+                self.diario.close()
+            if hasattr(self, 'db'):
+                self.db.close()
             event.accept()
 
 if __name__ == "__main__":
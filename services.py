@@ -0,0 +1,318 @@
+from busqueda import BuscadorProductos
+from database_manager import DB_ERRORS
+from folios import GeneradorFolios
+from ventas import registrar_venta, cancelar_venta, StockInsuficienteError
+
+
+class DatosInvalidosError(ValueError):
+    pass
+
+
+class RegistroEnUsoError(Exception):
+    pass
+
+
+class ConflictoVersionError(Exception):
+    # Otro usuario cambió (o borró) el registro desde que se leyó; actual es
+    # el registro como está ahora en la base, o None si ya no existe
+    def __init__(self, entidad, actual):
+        if actual is None:
+            mensaje = f"Otro usuario eliminó este {entidad}"
+        else:
+            mensaje = f"Otro usuario modificó este {entidad}; revise los datos actuales"
+        super().__init__(mensaje)
+        self.actual = actual
+
+
+class Campo:
+    __slots__ = ('nombre', 'convertir', 'obligatorio', 'etiqueta')
+
+    def __init__(self, nombre, convertir=None, obligatorio=False, etiqueta=None):
+        self.nombre = nombre
+        self.convertir = convertir      # None: texto tal cual
+        self.obligatorio = obligatorio
+        self.etiqueta = etiqueta or nombre
+
+    def limpiar(self, valor, entidad):
+        if isinstance(valor, str):
+            valor = valor.strip()
+        if valor is None or valor == "":
+            if self.obligatorio:
+                raise DatosInvalidosError(f"El {self.etiqueta} del {entidad} es obligatorio")
+            # Texto vacío se guarda como '', números y llaves foráneas como NULL
+            return valor if self.convertir is None else None
+        if self.convertir is None:
+            return valor
+        try:
+            return self.convertir(valor)
+        except (TypeError, ValueError):
+            raise DatosInvalidosError("Los valores deben ser números válidos")
+
+    def mismo_valor(self, nuevo, anterior):
+        # nuevo ya pasó por limpiar(); anterior viene de la base (Decimal, NULL...)
+        if anterior is None or anterior == "":
+            return nuevo is None or nuevo == ""
+        if self.convertir is None:
+            return nuevo == anterior
+        return nuevo == self.convertir(anterior)
+
+
+class Catalogo:
+    def __init__(self, tabla, llave, entidad, campos, dependencias, mensaje_en_uso, vivas=()):
+        self.tabla = tabla
+        self.llave = llave
+        self.entidad = entidad                  # nombre en singular para los mensajes
+        self.campos = campos
+        self.dependencias = dependencias        # [(tabla, columna)] que impiden borrar
+        self.mensaje_en_uso = mensaje_en_uso
+        self.vivas = vivas                      # columnas que otros cambian sin subir la versión
+
+
+CATALOGOS = {
+    'departamentos': Catalogo(
+        'departamentos', 'id_departamento', "departamento",
+        [Campo('nombre', obligatorio=True), Campo('ubicacion'), Campo('encargado')],
+        [('productos', 'id_departamento'), ('empleados', 'id_departamento')],
+        "Hay productos o empleados asociados a este departamento"
+    ),
+    'proveedores': Catalogo(
+        'proveedores', 'id_proveedor', "proveedor",
+        [Campo('nombre', obligatorio=True), Campo('contacto'), Campo('telefono')],
+        [('productos', 'id_proveedor')],
+        "Hay productos asociados a este proveedor"
+    ),
+    'productos': Catalogo(
+        'productos', 'id_producto', "producto",
+        [
+            Campo('nombre', obligatorio=True),
+            Campo('descripcion'),
+            Campo('precio_costo', float, True, "precio de costo"),
+            Campo('precio_publico', float, True, "precio público"),
+            Campo('stock', int, True),
+            Campo('id_departamento', int),
+            Campo('id_proveedor', int),
+        ],
+        [('detalle_ventas', 'id_producto')],
+        "Este producto tiene ventas asociadas",
+        # Las ventas y cancelaciones mueven el stock (triggers) sin tocar la versión
+        vivas=('stock',)
+    ),
+    'empleados': Catalogo(
+        'empleados', 'id_empleado', "empleado",
+        [Campo('nombre', obligatorio=True), Campo('domicilio'), Campo('puesto'), Campo('id_departamento', int)],
+        [('ventas', 'id_empleado')],
+        "Este empleado tiene ventas asociadas"
+    ),
+    'clientes': Catalogo(
+        'clientes', 'id_cliente', "cliente",
+        [Campo('nombre', obligatorio=True), Campo('correo', obligatorio=True), Campo('telefono')],
+        [('ventas', 'id_cliente')],
+        "Este cliente tiene ventas asociadas"
+    ),
+}
+
+
+class CatalogService:
+    # Altas, bajas y cambios de un catálogo sin depender de Qt. Los datos
+    # llegan como dict (p. ej. el texto de los campos del formulario) y se
+    # validan aquí; los errores de reglas de negocio se levantan como
+    # excepciones y los de la base siguen la convención de execute_query
+    # (None).
+    def __init__(self, db, catalogo):
+        self.db = db
+        self.catalogo = catalogo
+
+    def obtener(self, id_registro):
+        c = self.catalogo
+        filas = self.db.execute_query(
+            f"SELECT * FROM {c.tabla} WHERE {c.llave} = %s", (id_registro,), fetch=True
+        )
+        return filas[0] if filas else None
+
+    def validar(self, datos):
+        return {
+            campo.nombre: campo.limpiar(datos.get(campo.nombre), self.catalogo.entidad)
+            for campo in self.catalogo.campos
+        }
+
+    def crear(self, datos):
+        # Regresa el id del nuevo registro
+        valores = self.validar(datos)
+        columnas = ", ".join(valores)
+        marcadores = ", ".join(["%s"] * len(valores))
+        return self.db.execute_query(
+            f"INSERT INTO {self.catalogo.tabla} ({columnas}) VALUES ({marcadores})",
+            tuple(valores.values()),
+            insert=True
+        )
+
+    def guardar_cambios(self, original, datos):
+        # Concurrencia optimista: original es el registro como se leyó
+        # (obtener). Solo se escriben las columnas que cambiaron y solo si la
+        # versión sigue igual; si no, ConflictoVersionError con el registro
+        # actual. Regresa el registro guardado (None si falla la base).
+        c = self.catalogo
+        valores = self.validar(datos)
+        cambios = {
+            campo.nombre: valores[campo.nombre] for campo in c.campos
+            if not campo.mismo_valor(valores[campo.nombre], original[campo.nombre])
+        }
+        if not cambios:
+            return original
+
+        asignaciones = ", ".join(f"{columna} = %s" for columna in cambios)
+        condiciones = "".join(f" AND {columna} = %s" for columna in cambios if columna in c.vivas)
+        filas = self.db.execute_query(
+            f"UPDATE {c.tabla} SET {asignaciones}, version = version + 1 "
+            f"WHERE {c.llave} = %s AND version = %s{condiciones}",
+            (
+                *cambios.values(), original[c.llave], original['version'],
+                *(original[columna] for columna in cambios if columna in c.vivas)
+            )
+        )
+        if filas is None:
+            return None
+        if filas == 0:
+            raise ConflictoVersionError(c.entidad, self.obtener(original[c.llave]))
+        return dict(original, **cambios, version=original['version'] + 1)
+
+    def en_uso(self, id_registro):
+        # Una sola consulta con EXISTS para todas las tablas que lo referencian
+        dependencias = self.catalogo.dependencias
+        condiciones = " OR ".join(
+            f"EXISTS (SELECT 1 FROM {tabla} WHERE {columna} = %s)" for tabla, columna in dependencias
+        )
+        fila = self.db.execute_query(
+            f"SELECT {condiciones} AS en_uso", (id_registro,) * len(dependencias), fetch=True
+        )
+        return bool(fila[0]['en_uso']) if fila else None
+
+    def eliminar(self, id_registro):
+        # Regresa el número de registros borrados (0 si no existía)
+        if self.en_uso(id_registro):
+            raise RegistroEnUsoError(self.catalogo.mensaje_en_uso)
+        c = self.catalogo
+        return self.db.execute_query(f"DELETE FROM {c.tabla} WHERE {c.llave} = %s", (id_registro,))
+
+
+def crear_servicios_catalogo(db):
+    return {nombre: CatalogService(db, catalogo) for nombre, catalogo in CATALOGOS.items()}
+
+
+class SalesService:
+    # Flujo de la caja sin interfaz: encontrar productos, armar el carrito y
+    # cobrar. Es seguro usarlo desde varios hilos (cada venta toma su propia
+    # conexión del pool), así que puede correr muchas cajas en paralelo.
+    def __init__(self, db, cache=None, buscador=None, folios=None, reenviador=None, reservas=None):
+        self.db = db
+        self.cache = cache
+        self.buscador = buscador or BuscadorProductos(db, cache=cache)
+        self.folios = folios or GeneradorFolios(db)
+        # Con un Reenviador (diario_ventas.py) la caja sigue cobrando sin conexión
+        self.reenviador = reenviador
+        # Con ReservasStock (reservas.py) lo que está en el carrito queda
+        # apartado en la base; sin él se valida contra el stock leído
+        self.reservas = reservas
+
+    def escanear(self, codigo):
+        # Solo memoria: None si el código no está en la caché
+        codigo = (codigo or "").strip()
+        if self.cache is None or not codigo.isdigit():
+            return None
+        return self.cache.por_codigo(codigo)
+
+    def buscar(self, texto):
+        return self.buscador.buscar(texto)
+
+    def producto(self, id_producto, respaldo=None):
+        # Precio y stock vigentes de la caché; si no está, el respaldo
+        # (p. ej. la fila que ya se mostró en los resultados)
+        producto = self.cache.por_id(id_producto) if self.cache is not None else None
+        return producto if producto is not None else respaldo
+
+    def agregar_al_carrito(self, carrito, producto, cantidad):
+        # carrito: un Carrito (carrito.py) o el ModeloCarrito que lo muestra
+        disponible = self.apartar(producto, cantidad, carrito.cantidad(producto["id_producto"]))
+        return carrito.agregar(producto, cantidad, disponible)
+
+    def apartar(self, producto, cantidad, en_carrito=0):
+        # Aparta cantidad unidades más del producto y regresa el stock
+        # disponible para esta caja. Toca la base: la interfaz lo llama en
+        # el DBWorker y después agrega la línea al carrito
+        id_producto = producto["id_producto"]
+        if self._reservas_en_linea():
+            try:
+                return self.reservas.reservar(id_producto, cantidad)
+            except DB_ERRORS as e:
+                if not self._conexion_perdida(e):
+                    raise
+        # Sin apartados (o sin conexión): el stock de la caché o del resultado
+        stock = producto["stock"]
+        if en_carrito + cantidad > stock:
+            raise StockInsuficienteError(id_producto, stock, en_carrito + cantidad)
+        return stock
+
+    def cobrar(self, id_cliente, id_empleado, lineas, metodo_pago='efectivo', folio=None):
+        if not lineas:
+            raise DatosInvalidosError("El carrito está vacío")
+        if not id_empleado:
+            raise DatosInvalidosError("Seleccione un empleado")
+        if self.reenviador is not None and not self.reenviador.en_linea:
+            venta = self._cobrar_sin_conexion(id_cliente, id_empleado, lineas, metodo_pago)
+        else:
+            try:
+                folio = folio or self.folios.siguiente()
+                venta = registrar_venta(
+                    self.db, folio, id_cliente, id_empleado, lineas, metodo_pago,
+                    caja=self.reservas.caja if self.reservas is not None else None
+                )
+            except DB_ERRORS as e:
+                if not self._conexion_perdida(e):
+                    raise
+                # Sin conexión no se sabe si el COMMIT alcanzó a llegar a la
+                # base: va al diario con el mismo folio y el reenvío no la
+                # registra otra vez si ya está (sin folio todavía, uno local)
+                venta = self._cobrar_sin_conexion(id_cliente, id_empleado, lineas, metodo_pago, folio)
+        # Reflejar la venta en la caché hasta el siguiente refresco
+        if self.cache is not None:
+            for linea in lineas:
+                self.cache.descontar(linea["id"], linea["cantidad"])
+        return venta
+
+    def liberar(self, id_producto=None):
+        # Suelta lo apartado (un producto o todo el carrito). Si la base no
+        # responde no pasa nada: el apartado vence solo
+        if not self._reservas_en_linea():
+            return
+        try:
+            self.reservas.liberar(id_producto)
+        except DB_ERRORS as e:
+            print(f"No se pudieron liberar los apartados: {e}")
+
+    def _conexion_perdida(self, e):
+        # Solo una conexión caída manda la caja al diario. Bloqueos, pool
+        # agotado o errores de SQL se reportan como antes: el diario se
+        # reenvía sin validar stock y una espera pasajera acabaría en una
+        # venta sin revisar
+        if self.reenviador is None or not self.db.backend.is_disconnect(e):
+            return False
+        self.reenviador.sin_conexion()
+        return True
+
+    def _reservas_en_linea(self):
+        return self.reservas is not None and (self.reenviador is None or self.reenviador.en_linea)
+
+    def _cobrar_sin_conexion(self, id_cliente, id_empleado, lineas, metodo_pago, folio=None):
+        # El stock se validó contra la caché al armar el carrito
+        return self.reenviador.diario.agregar(
+            self.folios.terminal, id_cliente, id_empleado, lineas, metodo_pago, folio
+        )
+
+    def cancelar(self, id_venta, id_empleado=None):
+        # Lanza VentaNoCancelableError si no existe o ya estaba cancelada
+        cantidades = cancelar_venta(self.db, id_venta, id_empleado)
+        # Regresar el stock en la caché hasta el siguiente refresco
+        if self.cache is not None:
+            for id_producto, cantidad in cantidades.items():
+                self.cache.descontar(id_producto, -cantidad)
+        return cantidades
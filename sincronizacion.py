@@ -0,0 +1,157 @@
+import threading
+
+# Segundos que la marca se recorre hacia atrás: la transacción más larga que
+# se espera. Una fila que se escribió antes de tomar la marca pero se
+# confirmó después de la lectura trae una fecha_actualizacion anterior a la
+# marca; con el margen la siguiente consulta todavía la alcanza. Las filas
+# repetidas no hacen daño, quien aplica los cambios las sobrescribe
+MARGEN_MARCA = 120
+
+ULTIMA_ELIMINACION = "SELECT MAX(id_eliminacion) AS ultima FROM eliminaciones WHERE tabla = %s"
+
+ELIMINACIONES = """SELECT id_eliminacion, id_registro FROM eliminaciones
+    WHERE tabla = %s AND id_eliminacion > %s
+    ORDER BY id_eliminacion"""
+
+
+def hora_marca(db):
+    # Hora del servidor menos MARGEN_MARCA, para usarla como marca de cambios.
+    # Se usa el reloj de la base para no depender del reloj de cada caja
+    resultado = db.execute_query(
+        "SELECT NOW() + INTERVAL %s SECOND AS ahora", (-MARGEN_MARCA,), fetch=True
+    )
+    return resultado[0]['ahora'] if resultado else None
+
+
+class Cambios:
+    __slots__ = ('filas', 'eliminados', 'completo', 'marca', 'ultima_eliminacion', 'secuencia')
+
+    def __init__(self, filas, eliminados, completo, marca, ultima_eliminacion, secuencia):
+        self.filas = filas
+        self.eliminados = eliminados
+        self.completo = completo
+        self.marca = marca
+        self.ultima_eliminacion = ultima_eliminacion
+        self.secuencia = secuencia
+
+
+class SincronizadorTabla:
+    # Obtiene solo lo que cambió en una tabla desde la última sincronización:
+    # filas con fecha_actualizacion reciente y registros borrados (tabla
+    # eliminaciones, llenada por triggers). La primera consulta es completa.
+    #
+    # filtro_cambios puede ser una lista de WHERE: cada uno arma un SELECT y
+    # se unen con UNION. Así cada parte usa su índice; un OR entre columnas
+    # de las dos tablas de un JOIN obliga a recorrer la tabla completa.
+    # filtro_completo: WHERE de la primera consulta, para quien solo necesita
+    # parte de la tabla (los cambios se traen todos, para poder quitar las
+    # filas que dejan de cumplirlo).
+    #
+    # consultar() corre en un hilo de trabajo y no mueve las marcas; quien
+    # aplica el resultado llama a confirmar(), que descarta resultados viejos
+    # que lleguen fuera de orden.
+    def __init__(self, db, tabla, llave, consulta, filtro_cambios, filtro_completo=""):
+        self.db = db
+        self.tabla = tabla
+        self.llave = llave
+        self.consulta = consulta              # SELECT ... {filtro}
+        # WHERE con un %s por cada marca
+        self.filtros_cambios = (filtro_cambios,) if isinstance(filtro_cambios, str) else tuple(filtro_cambios)
+        self.filtro_completo = filtro_completo
+        self._lock = threading.Lock()
+        self._marca = None
+        self._ultima_eliminacion = 0
+        self._secuencia = 0
+        self._aplicada = 0
+
+    def consultar(self, solo_marcas=False):
+        # solo_marcas: en la primera consulta solo fija las marcas, sin leer
+        # la tabla (para quien carga las filas por su cuenta, p. ej. por páginas)
+        with self._lock:
+            self._secuencia += 1
+            secuencia = self._secuencia
+            marca = self._marca
+            ultima_eliminacion = self._ultima_eliminacion
+
+        ahora = hora_marca(self.db)
+        if ahora is None:
+            return None
+
+        if marca is None:
+            # Se lee la última eliminación antes que las filas para no perder
+            # borrados que ocurran mientras se carga la tabla
+            ultima = self.db.execute_query(ULTIMA_ELIMINACION, (self.tabla,), fetch=True)
+            if ultima is None:
+                return None
+            if solo_marcas:
+                return Cambios([], [], True, ahora, ultima[0]['ultima'] or 0, secuencia)
+            filas = self.db.execute_query(self.consulta_completa(), fetch=True)
+            if filas is None:
+                return None
+            return Cambios(filas, [], True, ahora, ultima[0]['ultima'] or 0, secuencia)
+
+        consulta = self.consulta_cambios()
+        filas = self.db.execute_query(consulta, (marca,) * consulta.count('%s'), fetch=True)
+        eliminaciones = self.db.execute_query(ELIMINACIONES, (self.tabla, ultima_eliminacion), fetch=True)
+        if filas is None or eliminaciones is None:
+            return None
+        if eliminaciones:
+            ultima_eliminacion = eliminaciones[-1]['id_eliminacion']
+        eliminados = [e['id_registro'] for e in eliminaciones]
+        return Cambios(filas, eliminados, False, ahora, ultima_eliminacion, secuencia)
+
+    def confirmar(self, cambios):
+        with self._lock:
+            if cambios is None or cambios.secuencia <= self._aplicada:
+                return False
+            self._aplicada = cambios.secuencia
+            self._marca = cambios.marca
+            self._ultima_eliminacion = cambios.ultima_eliminacion
+            return True
+
+    def consulta_completa(self):
+        return self.consulta.format(filtro=self.filtro_completo)
+
+    def consulta_cambios(self):
+        return "\nUNION\n".join(self.consulta.format(filtro=filtro) for filtro in self.filtros_cambios)
+
+    def reiniciar(self):
+        # La siguiente consulta vuelve a ser completa
+        with self._lock:
+            self._marca = None
+
+
+def crear_sincronizadores(db):
+    return {
+        'departamentos': SincronizadorTabla(
+            db, 'departamentos', 'id_departamento',
+            "SELECT id_departamento, nombre, ubicacion, encargado FROM departamentos {filtro}",
+            "WHERE fecha_actualizacion >= %s"
+        ),
+        'proveedores': SincronizadorTabla(
+            db, 'proveedores', 'id_proveedor',
+            "SELECT id_proveedor, nombre, contacto, telefono FROM proveedores {filtro}",
+            "WHERE fecha_actualizacion >= %s"
+        ),
+        # Un cambio de nombre del departamento también cambia las filas que lo muestran
+        'productos': SincronizadorTabla(
+            db, 'productos', 'id_producto',
+            """SELECT p.id_producto, p.nombre, p.descripcion, p.precio_costo,
+                        p.precio_publico, p.stock, d.nombre as departamento
+                FROM productos p
+                LEFT JOIN departamentos d ON p.id_departamento = d.id_departamento {filtro}""",
+            ("WHERE p.fecha_actualizacion >= %s", "WHERE d.fecha_actualizacion >= %s")
+        ),
+        'empleados': SincronizadorTabla(
+            db, 'empleados', 'id_empleado',
+            """SELECT e.id_empleado, e.nombre, e.domicilio, e.puesto, d.nombre as departamento
+                FROM empleados e
+                LEFT JOIN departamentos d ON e.id_departamento = d.id_departamento {filtro}""",
+            ("WHERE e.fecha_actualizacion >= %s", "WHERE d.fecha_actualizacion >= %s")
+        ),
+        'clientes': SincronizadorTabla(
+            db, 'clientes', 'id_cliente',
+            "SELECT id_cliente, nombre, correo, telefono FROM clientes {filtro}",
+            "WHERE fecha_actualizacion >= %s"
+        ),
+    }
@@ -0,0 +1,74 @@
+import threading
+import time
+
+TTL_TABLERO = 30        # segundos que se reutilizan los números ya leídos
+STOCK_BAJO = 5          # productos con este stock o menos se listan
+LIMITE = 10             # filas de los rankings
+
+# "Hoy" es la fecha del servidor, la misma con la que se guardan las ventas
+CONSULTA_HOY = "SELECT ventas, total FROM resumen_ventas_dia WHERE fecha = DATE(NOW())"
+CONSULTA_PRODUCTOS = """SELECT p.id_producto, p.nombre, r.unidades, r.importe
+    FROM resumen_productos_dia r
+    JOIN productos p ON p.id_producto = r.id_producto
+    WHERE r.fecha = DATE(NOW()) AND r.unidades > 0
+    ORDER BY r.importe DESC LIMIT %s"""
+CONSULTA_CAJEROS = """SELECT e.id_empleado, e.nombre, r.ventas, r.total
+    FROM resumen_empleados_dia r
+    JOIN empleados e ON e.id_empleado = r.id_empleado
+    WHERE r.fecha = DATE(NOW()) AND r.ventas > 0
+    ORDER BY r.total DESC"""
+CONSULTA_STOCK = """SELECT id_producto, codigo_barras, nombre, stock FROM productos
+    WHERE stock <= %s ORDER BY stock, nombre LIMIT %s"""
+
+
+class Tablero:
+    # Números del tablero de ventas del día: ingresos, productos más
+    # vendidos, totales por cajero y productos con poco stock. Salen de los
+    # totales por día (resumenes.py), no de detalle_ventas, y se guardan unos
+    # segundos para que varias ventanas o refrescos seguidos no vuelvan a
+    # consultar la base. Se puede llamar desde cualquier hilo.
+    def __init__(self, db, ttl=TTL_TABLERO, stock_bajo=STOCK_BAJO, limite=LIMITE):
+        self.db = db
+        self.ttl = ttl
+        self.stock_bajo = stock_bajo
+        self.limite = limite
+        self._lock = threading.Lock()
+        self._datos = None
+        self._vence = 0.0
+
+    def obtener(self, forzar=False):
+        with self._lock:
+            if not forzar and self._datos is not None and time.monotonic() < self._vence:
+                return self._datos
+        datos = self._consultar()
+        with self._lock:
+            self._datos = datos
+            self._vence = time.monotonic() + self.ttl
+        return datos
+
+    def invalidar(self):
+        with self._lock:
+            self._vence = 0.0
+
+    def _consultar(self):
+        with self.db.transaction() as cursor:
+            cursor.execute(CONSULTA_HOY)
+            hoy = cursor.fetchall()
+            cursor.execute(CONSULTA_PRODUCTOS, (self.limite,))
+            productos = cursor.fetchall()
+            cursor.execute(CONSULTA_CAJEROS)
+            cajeros = cursor.fetchall()
+            cursor.execute(CONSULTA_STOCK, (self.stock_bajo, self.limite * 2))
+            stock_bajo = cursor.fetchall()
+
+        ventas = int(hoy[0]['ventas']) if hoy else 0
+        total = float(hoy[0]['total']) if hoy else 0.0
+        return {
+            'ventas': ventas,
+            'total': total,
+            'ticket_promedio': total / ventas if ventas else 0.0,
+            'productos': productos,
+            'cajeros': cajeros,
+            'stock_bajo': stock_bajo,
+            'hora': time.strftime('%H:%M:%S'),
+        }
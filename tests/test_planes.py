@@ -0,0 +1,55 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from benchmark import sembrar
+from database_manager import DatabaseManager, SQLiteBackend
+from migraciones import ConsultaFrecuente, consultas_frecuentes, revisar_planes
+
+# Correr desde la raíz del repositorio:
+#   python -m unittest discover tests      (o python -m pytest tests)
+
+
+class PlanesConsultasFrecuentes(unittest.TestCase):
+    # Falla si alguna consulta frecuente de la aplicación recorre una tabla
+    # completa según EXPLAIN, sobre una base SQLite nueva con datos sembrados.
+    # Sin ANALYZE SQLite supone tablas grandes: con pocas filas de muestra y
+    # estadísticas, preferiría leer completas las tablas chicas aunque haya
+    # índice, que no es lo que se quiere revisar.
+    @classmethod
+    def setUpClass(cls):
+        cls.directorio = tempfile.mkdtemp(prefix='sears_planes_')
+        cls.db = DatabaseManager(SQLiteBackend(os.path.join(cls.directorio, 'planes.sqlite')))
+        sembrar(cls.db, productos=2000, clientes=500, ventas=200)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.db.close()
+        shutil.rmtree(cls.directorio, ignore_errors=True)
+
+    def test_sin_escaneos(self):
+        for consulta, plan, escaneos in revisar_planes(self.db):
+            with self.subTest(consulta=consulta.nombre):
+                self.assertEqual(escaneos, [], f"{consulta.nombre}: {plan}")
+
+    def test_nombres_unicos(self):
+        nombres = [consulta.nombre for consulta in consultas_frecuentes()]
+        self.assertEqual(len(nombres), len(set(nombres)))
+
+    def test_detecta_escaneo(self):
+        # El filtro de cambios con OR entre las dos tablas del JOIN (el que
+        # se reemplazó por UNION) no puede usar índices
+        consulta = ConsultaFrecuente(
+            'prueba.or_join',
+            """SELECT p.id_producto FROM productos p
+            LEFT JOIN departamentos d ON p.id_departamento = d.id_departamento
+            WHERE p.fecha_actualizacion >= %s OR d.fecha_actualizacion >= %s""",
+            ('2000-01-01 00:00:00', '2000-01-01 00:00:00')
+        )
+        (_, _, escaneos), = revisar_planes(self.db, [consulta])
+        self.assertIn('p', escaneos)
+
+
+if __name__ == "__main__":
+    unittest.main()
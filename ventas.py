@@ -0,0 +1,208 @@
+import time
+
+from resumenes import actualizar_resumenes
+
+IVA = 0.16  # 16% de IVA
+
+# Quién descuenta el stock al vender:
+#   'trigger'    -> after_venta_insert (db23270652.sql) resta el stock y registra
+#                   el movimiento en inventario por cada detalle insertado.
+#                   Es el valor por defecto porque el esquema incluye el trigger;
+#                   la aplicación NO debe restar otra vez.
+#   'aplicacion' -> para bases sin ese trigger: registrar_venta resta el stock
+#                   con un solo UPDATE y escribe los movimientos de inventario.
+MANEJO_STOCK = 'trigger'
+
+# {marcadores}: un %s por producto
+BLOQUEAR_STOCK = """SELECT id_producto, stock FROM productos
+    WHERE id_producto IN ({marcadores})
+    ORDER BY id_producto FOR UPDATE"""
+
+APARTADO_OTRAS_CAJAS = """SELECT id_producto, SUM(cantidad) AS apartado FROM reservas_stock
+    WHERE id_producto IN ({marcadores}) AND caja <> %s AND vence > NOW()
+    GROUP BY id_producto"""
+
+CANTIDADES_VENDIDAS = """SELECT id_producto, SUM(cantidad) AS cantidad FROM detalle_ventas
+    WHERE id_venta = %s GROUP BY id_producto"""
+
+
+class StockInsuficienteError(Exception):
+    def __init__(self, id_producto, stock_actual, solicitado):
+        super().__init__(
+            f"No hay suficiente stock para el producto {id_producto} "
+            f"(actual: {stock_actual}, solicitado: {solicitado})"
+        )
+        self.id_producto = id_producto
+        self.stock_actual = stock_actual
+        self.solicitado = solicitado
+
+
+class VentaNoCancelableError(Exception):
+    pass
+
+
+def calcular_totales(lineas):
+    subtotal = sum(linea["subtotal"] for linea in lineas)
+    iva = subtotal * IVA
+    return subtotal, iva, subtotal + iva
+
+
+def registrar_venta(db, folio, id_cliente, id_empleado, lineas, metodo_pago='efectivo',
+                    manejo_stock=None, caja=None):
+    # Registra la venta completa en una sola transacción con un número fijo
+    # de viajes a la base, sin importar cuántas líneas tenga el carrito:
+    # bloqueo de stock, cabecera, detalle (executemany), si el stock es de
+    # la aplicación, descuento de stock y movimientos de inventario, y al
+    # final los totales por día (resumenes.py).
+    with db.transaction() as cursor:
+        return registrar_venta_en(
+            cursor, folio, id_cliente, id_empleado, lineas, metodo_pago, manejo_stock, caja=caja
+        )
+
+
+def registrar_venta_en(cursor, folio, id_cliente, id_empleado, lineas, metodo_pago='efectivo',
+                       manejo_stock=None, fecha=None, validar_stock=True, caja=None):
+    # Lo mismo dentro de una transacción abierta (p. ej. varias ventas del
+    # diario sin conexión en un solo commit). fecha: la de la venta si no es
+    # ahora; validar_stock=False registra la venta aunque el stock no alcance
+    # (la mercancía ya salió de la tienda). caja: la que cobra
+    # (ReservasStock.caja); lo apartado por otras cajas no se vende y lo
+    # apartado por esta se libera con la venta.
+    manejo_stock = manejo_stock or MANEJO_STOCK
+    if manejo_stock not in ('trigger', 'aplicacion'):
+        raise ValueError(f"Manejo de stock desconocido: {manejo_stock}")
+
+    lineas = list(lineas)
+    cantidades = {}
+    for linea in lineas:
+        cantidades[linea["id"]] = cantidades.get(linea["id"], 0) + linea["cantidad"]
+
+    # Bloquear siempre en el mismo orden evita interbloqueos entre cajas
+    ids = sorted(cantidades)
+    marcadores = ", ".join(["%s"] * len(ids))
+    subtotal, iva, total = calcular_totales(lineas)
+
+    cursor.execute(BLOQUEAR_STOCK.format(marcadores=marcadores), ids)
+    stock = {row["id_producto"]: row["stock"] for row in cursor.fetchall()}
+
+    if validar_stock and caja is not None:
+        # Con las filas ya bloqueadas, lo que tienen apartado las demás cajas
+        cursor.execute(APARTADO_OTRAS_CAJAS.format(marcadores=marcadores), ids + [caja])
+        for row in cursor.fetchall():
+            stock[row["id_producto"]] = stock.get(row["id_producto"], 0) - int(row["apartado"])
+
+    for id_producto in ids:
+        if validar_stock and stock.get(id_producto, 0) < cantidades[id_producto]:
+            raise StockInsuficienteError(id_producto, max(stock.get(id_producto, 0), 0), cantidades[id_producto])
+
+    cursor.execute(
+        """INSERT INTO ventas
+        (folio, id_cliente, id_empleado, fecha, subtotal, iva, total, estado, metodo_pago)
+        VALUES (%s, %s, %s, COALESCE(%s, NOW()), %s, %s, %s, 'completada', %s)""",
+        (folio, id_cliente, id_empleado, fecha, subtotal, iva, total, metodo_pago)
+    )
+    id_venta = cursor.lastrowid
+
+    cursor.executemany(
+        """INSERT INTO detalle_ventas
+        (id_venta, id_producto, cantidad, precio_unitario, importe)
+        VALUES (%s, %s, %s, %s, %s)""",
+        [
+            (id_venta, linea["id"], linea["cantidad"], linea["precio_unitario"], linea["subtotal"])
+            for linea in lineas
+        ]
+    )
+
+    if manejo_stock == 'aplicacion':
+        # Un solo UPDATE para todas las líneas
+        casos = " ".join(["WHEN %s THEN %s"] * len(ids))
+        params = []
+        for id_producto in ids:
+            params.extend((id_producto, cantidades[id_producto]))
+        cursor.execute(
+            f"""UPDATE productos SET stock = stock - CASE id_producto {casos} END
+            WHERE id_producto IN ({marcadores})""",
+            params + ids
+        )
+        cursor.executemany(
+            """INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
+            VALUES (%s, 'salida', %s, %s, %s)""",
+            [
+                (id_producto, cantidades[id_producto], id_empleado, f"Venta #{id_venta}")
+                for id_producto in ids
+            ]
+        )
+
+    if caja is not None:
+        cursor.execute("DELETE FROM reservas_stock WHERE caja = %s", (caja,))
+
+    # Al final: la fila del día queda bloqueada hasta el commit
+    actualizar_resumenes(cursor, id_venta)
+
+    return {
+        "id_venta": id_venta,
+        "folio": folio,
+        "subtotal": subtotal,
+        "iva": iva,
+        "total": total
+    }
+
+
+def cancelar_venta(db, id_venta, id_empleado=None):
+    # Marca la venta como cancelada, regresa el stock con su movimiento de
+    # inventario y resta la venta de los totales por día, en una sola
+    # transacción. El detalle se conserva. Regresa {id_producto: cantidad}.
+    with db.transaction() as cursor:
+        cursor.execute(
+            "SELECT estado, id_empleado FROM ventas WHERE id_venta = %s FOR UPDATE", (id_venta,)
+        )
+        venta = cursor.fetchall()
+        if not venta:
+            raise VentaNoCancelableError(f"No existe la venta {id_venta} (o ya se archivó)")
+        if venta[0]["estado"] == 'cancelada':
+            raise VentaNoCancelableError(f"La venta {id_venta} ya está cancelada")
+
+        cursor.execute(CANTIDADES_VENDIDAS, (id_venta,))
+        cantidades = {fila["id_producto"]: int(fila["cantidad"]) for fila in cursor.fetchall()}
+
+        cursor.execute("UPDATE ventas SET estado = 'cancelada' WHERE id_venta = %s", (id_venta,))
+        if cantidades:
+            # Mismo orden de bloqueo que registrar_venta
+            ids = sorted(cantidades)
+            casos = " ".join(["WHEN %s THEN %s"] * len(ids))
+            params = []
+            for id_producto in ids:
+                params.extend((id_producto, cantidades[id_producto]))
+            cursor.execute(
+                f"""UPDATE productos SET stock = stock + CASE id_producto {casos} END
+                WHERE id_producto IN ({', '.join(['%s'] * len(ids))})""",
+                params + ids
+            )
+            cursor.executemany(
+                """INSERT INTO inventario (id_producto, tipo_movimiento, cantidad, id_usuario, motivo)
+                VALUES (%s, 'entrada', %s, %s, %s)""",
+                [
+                    (id_producto, cantidades[id_producto], id_empleado or venta[0]["id_empleado"],
+                     f"Cancelación venta #{id_venta}")
+                    for id_producto in ids
+                ]
+            )
+
+        actualizar_resumenes(cursor, id_venta, signo=-1)
+    return cantidades
+
+
+def formatear_ticket(venta, lineas, cliente, empleado):
+    resumen = f"Venta #{venta['folio']}\n"
+    resumen += f"Fecha: {time.strftime('%d/%m/%Y %H:%M')}\n"
+    resumen += f"Cliente: {cliente}\n"
+    resumen += f"Empleado: {empleado}\n\n"
+    resumen += "Productos:\n"
+
+    for item in lineas:
+        resumen += f"- {item['nombre']} x {item['cantidad']} @ ${item['precio_unitario']:.2f} = ${item['subtotal']:.2f}\n"
+
+    resumen += f"\nSubtotal: ${venta['subtotal']:.2f}\n"
+    resumen += f"IVA (16%): ${venta['iva']:.2f}\n"
+    resumen += f"TOTAL: ${venta['total']:.2f}"
+    return resumen